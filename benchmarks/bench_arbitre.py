@@ -0,0 +1,71 @@
+"""
+Banc d'essai de l'arbitre du serveur.
+
+On joue des parties aleatoires en parallele, un mouvement par partie a tour de role, comme autant de salles d'un
+serveur. On compare la validation avec le cache d'echiquiers de l'arbitre, pour plusieurs capacites, a celle qui
+reconstruit l'echiquier en rejouant toute la partie a chaque mouvement : debit de validation, echiquiers reconstruits
+et echiquiers gardes en memoire.
+
+Utilisation ::
+
+    python -m benchmarks.bench_arbitre --parties 2000 --coups 40
+"""
+import argparse
+import random
+import time
+
+import chess
+
+import ti103_chess.arbitre as arbitre
+
+
+def tours(nombre, coups, graine=103):
+    """
+    Retourne les mouvements de parties aleatoires sous forme de couples (partie, mouvement UCI), entrelaces.
+    """
+    generateur = random.Random(graine)
+    parties = []
+    for k in range(nombre):
+        echiquier = chess.Board()
+        for _ in range(coups):
+            legaux = list(echiquier.legal_moves)
+            if not legaux:
+                break
+            echiquier.push(generateur.choice(legaux))
+        parties.append([m.uci() for m in echiquier.move_stack])
+    return [(str(k), partie[c]) for c in range(coups) for k, partie in enumerate(parties) if c < len(partie)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=2000)
+    parser.add_argument('--coups', type=int, default=40)
+    args = parser.parse_args()
+
+    mouvements = tours(args.parties, args.coups)
+
+    historiques = {str(k): [] for k in range(args.parties)}
+    debut = time.perf_counter()
+    for partie, uci in mouvements:
+        echiquier = chess.Board()
+        for coup in historiques[partie]:
+            echiquier.push_uci(coup)
+        assert chess.Move.from_uci(uci) in echiquier.legal_moves
+        historiques[partie].append(uci)
+    duree = time.perf_counter() - debut
+    print(f"Partie rejouee :        {len(mouvements) / duree:10,.0f} mouvements/s")
+
+    for capacite in (args.parties, args.parties // 4, args.parties // 16):
+        juge = arbitre.Arbitre(capacite)
+        for k in range(args.parties):
+            juge.nouvelle(str(k))
+        debut = time.perf_counter()
+        for partie, uci in mouvements:
+            juge.joue(partie, uci)
+        duree = time.perf_counter() - debut
+        print(f"Arbitre, cache {capacite:6d} : {len(mouvements) / duree:10,.0f} mouvements/s, "
+              f"{juge.reconstructions:8d} reconstructions, {juge.evictions:8d} evictions")
+
+
+if __name__ == '__main__':
+    main()
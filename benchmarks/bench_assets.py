@@ -0,0 +1,64 @@
+"""
+Banc d'essai de la creation des echiquiers affiches : duree par echiquier et memoire du processus.
+
+Un processus peut afficher beaucoup d'echiquiers, par exemple les vues de spectateurs. On en cree un grand nombre, et
+on les garde tous, de deux facons : comme avant, en rechargeant l'image des pieces, en repeignant l'echiquier vide et
+en decoupant des images propres a chaque echiquier ; puis avec les images du cache du processus. On mesure la duree de
+creation d'un echiquier et la croissance de la memoire residente du processus.
+
+Utilisation ::
+
+    python -m benchmarks.bench_assets --echiquiers 500
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame  # noqa: E402
+
+import ti103_chess.board as board  # noqa: E402
+
+
+def memoire():
+    """
+    Retourne la memoire residente du processus, en octets (Linux).
+    """
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def sans_cache(ecran):
+    image = pygame.image.load(os.path.join(os.path.dirname(board.__file__), 'ressources', 'img.png')).convert()
+    echiquier = pygame.Surface((680, 680))
+    echiquier.fill((175, 141, 120))
+    for x in range(8):
+        for y in range(x % 2, 8, 2):
+            pygame.draw.rect(echiquier, (250, 240, 230), (x * 85, y * 85, 85, 85))
+    return board.Echiquier(ecran, echiquier, image)
+
+
+def avec_cache(ecran):
+    return board.Echiquier(ecran)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--echiquiers', type=int, default=500)
+    args = parser.parse_args()
+
+    ecran = board.nouvelle_partie('bench').ecran   # Charge aussi le cache
+    for nom, cree in (("Sans cache", sans_cache), ("Avec cache", avec_cache)):
+        avant = memoire()
+        debut = time.perf_counter()
+        echiquiers = [cree(ecran) for _ in range(args.echiquiers)]
+        duree = time.perf_counter() - debut
+        croissance = memoire() - avant
+        print(f"{nom:10s}: {duree / len(echiquiers) * 1e6:8.1f} us par echiquier, "
+              f"{croissance / len(echiquiers) / 1024:8.1f} Ko de memoire par echiquier")
+        del echiquiers
+
+
+if __name__ == '__main__':
+    main()
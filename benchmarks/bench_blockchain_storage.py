@@ -0,0 +1,58 @@
+"""
+Banc d'essai de l'enregistrement de la blockchain sur le disque.
+
+On scelle un grand nombre de blocs contenant chacun quelques parties synthetiques dans un journal, puis on mesure le
+temps de relecture de la chaine, d'un parcours de tous ses blocs et d'acces a un bloc quelconque par son rang.
+
+Utilisation ::
+
+    python -m benchmarks.bench_blockchain_storage --blocs 100000
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import ti103_chess.blockchain as bc
+from benchmarks.bench_patricia_trie import parties_synthetiques
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--blocs', type=int, default=100000)
+    parser.add_argument('--parties', type=int, default=2, help="Parties par bloc")
+    parser.add_argument('--intervalle', type=float, default=1.0, help="Intervalle de synchronisation, en secondes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chaine = bc.BlockChain.ouvre(dossier, intervalle_fsync=args.intervalle)
+        parties = parties_synthetiques(args.blocs * args.parties, 20)
+        debut = time.perf_counter()
+        for _ in range(args.blocs):
+            for _ in range(args.parties):
+                chaine.head().transactions.extend(next(parties))
+            chaine.new()
+        chaine.journal.ferme()
+        duree = time.perf_counter() - debut
+        print(f"Ecriture :   {args.blocs / duree:10,.0f} blocs/s")
+
+        debut = time.perf_counter()
+        relue = bc.BlockChain.ouvre(dossier)
+        print(f"Relecture :  {(time.perf_counter() - debut) * 1000:10.2f} ms pour {len(relue.chain) - 1:,} blocs")
+
+        debut = time.perf_counter()
+        for bloc in relue.chain:
+            bloc.hash()
+        print(f"Parcours :   {time.perf_counter() - debut:10.2f} s pour signer tous les blocs")
+
+        alea = random.Random(103)
+        rangs = [alea.randrange(args.blocs) for _ in range(10000)]
+        debut = time.perf_counter()
+        for rang in rangs:
+            relue.journal.lit(rang)
+        print(f"Acces :      {(time.perf_counter() - debut) / len(rangs) * 1e6:10.1f} us par bloc")
+        relue.journal.ferme()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Banc d'essai de la boucle du client, sans fenetre : latence entre l'entree du joueur et l'envoi de son mouvement.
+
+Un fil joue le role du joueur (les Blancs) : quand c'est a lui, il choisit un mouvement legal et le fait a la souris,
+en deposant ses evenements dans la file de pygame. Un autre fil joue le role du serveur : a chaque mouvement envoye, il
+repond par un mouvement des Noirs, comme le fil reseau du client socketio. La boucle tourne a cadence fixe avec le
+pilote video factice de SDL. On mesure le temps entre le depot des evenements et l'appel de la fonction d'envoi, et
+la duree des images.
+
+Utilisation ::
+
+    python -m benchmarks.bench_client --mouvements 200 --fps 30 60 120
+"""
+import argparse
+import os
+import random
+import statistics
+import threading
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import chess  # noqa: E402
+import pygame  # noqa: E402
+
+import ti103_chess.board as board  # noqa: E402
+import ti103_chess.boucle as boucle  # noqa: E402
+
+
+def jouables(reference):
+    """
+    Retourne les mouvements legaux que l'on peut faire a la souris : tous, sauf les promotions en une autre piece que
+    la dame.
+    """
+    return [m for m in reference.legal_moves if m.promotion in (None, chess.QUEEN)]
+
+
+def mesure(fps, nombre, generateur):
+    """
+    Fait jouer nombre mouvements au joueur. Retourne les latences d'envoi et les durees des images, en secondes.
+    """
+    partie = board.nouvelle_partie('bench')
+    reference = chess.Board()   # L'echiquier du joueur et du serveur simules
+    tour = threading.Event()
+    tour.set()
+    latences, entrees = [], []
+
+    def envoie(ply, mouvement):
+        latences.append(time.perf_counter() - entrees[-1])
+        threading.Thread(target=repond, args=(mouvement,)).start()
+
+    def repond(mouvement):
+        # Le serveur relaie un mouvement des Noirs apres un aller-retour reseau
+        time.sleep(0.005)
+        reference.push_uci(mouvement)
+        coups = jouables(reference)
+        if coups:
+            coup = generateur.choice(coups)
+            reference.push(coup)
+            execution.recoit_coup(len(reference.move_stack), coup.uci())
+        if not coups or not jouables(reference) or len(reference.move_stack) > 80:
+            # Nouvelle partie, envoyee comme apres un mouvement refuse
+            reference.reset()
+            execution.recoit_position(reference.fen())
+        tour.set()
+
+    def joueur():
+        try:
+            for _ in range(nombre):
+                if not tour.wait(5):
+                    raise RuntimeError("Mouvement non envoye")
+                tour.clear()
+                time.sleep(generateur.uniform(0, 0.02))   # Le temps de reflexion, sans rapport avec les images
+                coup = generateur.choice(jouables(reference))
+                entrees.append(time.perf_counter())
+                for genre, case in ((pygame.MOUSEBUTTONDOWN, chess.square_name(coup.from_square)),
+                                    (pygame.MOUSEBUTTONUP, chess.square_name(coup.to_square))):
+                    x, y = board.coordonnees(case)
+                    pygame.event.post(pygame.event.Event(genre, button=1, pos=(x + 42, y + 42)))
+            tour.wait(5)
+        finally:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    execution = boucle.Boucle(partie, 'Blanc', envoie, fps)
+    images = []
+    fil = threading.Thread(target=joueur)
+    fil.start()
+    horloge = pygame.time.Clock()
+    while True:
+        debut = time.perf_counter()
+        if not execution.etape():
+            break
+        images.append(time.perf_counter() - debut)
+        horloge.tick(fps)
+    fil.join()
+    return latences, images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mouvements', type=int, default=200)
+    parser.add_argument('--fps', type=int, nargs='+', default=[30, 60, 120])
+    args = parser.parse_args()
+
+    for fps in args.fps:
+        latences, images = mesure(fps, args.mouvements, random.Random(103))
+        latences = sorted(latences)
+        print(f"{fps:4d} images/s : latence mediane {statistics.median(latences) * 1e3:6.2f} ms, "
+              f"p99 {latences[int(len(latences) * 0.99) - 1] * 1e3:6.2f} ms, max {latences[-1] * 1e3:6.2f} ms "
+              f"(periode {1e3 / fps:5.2f} ms) ; image mediane {statistics.median(images) * 1e3:5.2f} ms "
+              f"({len(latences)} mouvements)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Banc d'essai du serveur de jeu reparti sur plusieurs processus.
+
+On lance le serveur asyncio avec 1, 2, 4... processus (voir ti103_chess.server_asgi --workers), puis des processus
+pilotes qui jouent chacun une part des parties. Les joueurs d'une partie se connectent au processus proprietaire de la
+partie, et un spectateur la suit depuis un autre processus : ses mouvements lui parviennent par le bus. On mesure le
+debit de mouvements relayes et la latence de relais pour chaque nombre de processus.
+
+Le debit ne peut croitre avec le nombre de processus que s'il y a assez de coeurs pour le serveur et les pilotes.
+
+Utilisation ::
+
+    python -m benchmarks.bench_cluster --workers 1 2 4 --parties 400 --coups 20 --pilotes 2
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import subprocess
+import sys
+import time
+
+import ti103_chess.bus as bus
+from benchmarks.bench_server_asgi import partie
+
+
+async def pilote_async(port, workers, numeros, coups):
+    latences = []
+    vus = []
+    connexions = asyncio.Semaphore(100)
+    taches = []
+    for numero in numeros:
+        rang = bus.proprietaire(str(numero), workers)
+        taches.append(partie(f'http://127.0.0.1:{port + rang}', numero, coups, latences, connexions,
+                             f'http://127.0.0.1:{port + (rang + 1) % workers}', vus))
+    await asyncio.gather(*taches)
+    return latences, vus
+
+
+def pilote(arguments):
+    """
+    Joue une part des parties dans un processus pilote et retourne les latences et les mouvements vus.
+    """
+    return asyncio.run(pilote_async(*arguments))
+
+
+def mesure(workers, parties, coups, pilotes, port):
+    """
+    Lance le serveur avec workers processus, joue les parties et retourne le debit, les latences et les mouvements vus
+    par les spectateurs.
+    """
+    serveur = subprocess.Popen([sys.executable, '-m', 'ti103_chess.server_asgi', '--port', str(port),
+                                '--workers', str(workers)])
+    try:
+        time.sleep(2 + workers / 2)   # Le temps que les processus ecoutent
+        with multiprocessing.Pool(pilotes) as pool:
+            debut = time.perf_counter()
+            resultats = pool.map(pilote, [(port, workers, range(k, parties, pilotes), coups) for k in range(pilotes)])
+            duree = time.perf_counter() - debut
+    finally:
+        serveur.terminate()
+        serveur.wait()
+
+    latences = sorted(latence for resultat in resultats for latence in resultat[0])
+    vus = sum(v for resultat in resultats for v in resultat[1])
+    return len(latences) / duree, latences, vus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--parties', type=int, default=400)
+    parser.add_argument('--coups', type=int, default=20)
+    parser.add_argument('--pilotes', type=int, default=2, help="Processus qui simulent les clients")
+    parser.add_argument('--port', type=int, default=3200)
+    args = parser.parse_args()
+
+    print(f"{args.parties} parties de {args.coups} demi-coups, {3 * args.parties} clients, "
+          f"{multiprocessing.cpu_count()} coeurs")
+    for workers in args.workers:
+        debit, latences, vus = mesure(workers, args.parties, args.coups, args.pilotes, args.port)
+        print(f"{workers} processus : {debit:8,.0f} mouvements/s, "
+              f"latence p50 {statistics.median(latences) * 1000:7.1f} ms, "
+              f"p99 {latences[int(0.99 * (len(latences) - 1))] * 1000:7.1f} ms, "
+              f"{vus / (args.parties * args.coups):.0%} des mouvements vus par les spectateurs")
+
+
+if __name__ == '__main__':
+    main()
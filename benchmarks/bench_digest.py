@@ -0,0 +1,82 @@
+"""
+Micro-banc d'essai des algorithmes de hachage de la couche digest.
+
+Pour chaque algorithme, on mesure le debit sur un gros bloc d'octets, le nombre de signatures de noeuds par seconde
+(petits messages, le cas de l'arbre) et le temps de hachage complet d'un arbre. On verifie enfin que la signature de
+l'arbre est la meme dans plusieurs processus lances avec des PYTHONHASHSEED differents.
+
+Utilisation ::
+
+    python -m benchmarks.bench_digest --parties 20000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import ti103_chess.digest as digest
+from benchmarks.bench_patricia_trie import charge, noeuds_internes, parties_synthetiques
+
+
+SIGNATURE = """
+import sys
+import ti103_chess.digest as digest
+from benchmarks.bench_patricia_trie import charge, parties_synthetiques
+digest.utilise(sys.argv[1])
+racine, _ = charge(parties_synthetiques(200, 40))
+print(racine.hash().hex())
+"""
+
+
+def stable(nom):
+    """
+    Verifie que la signature d'un arbre calculee par deux processus differents est la meme.
+    """
+    signatures = set()
+    for graine in ('0', '103'):
+        env = dict(os.environ, PYTHONHASHSEED=graine)
+        sortie = subprocess.run([sys.executable, '-c', SIGNATURE, nom], env=env, check=True, capture_output=True,
+                                text=True)
+        signatures.add(sortie.stdout)
+    return len(signatures) == 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=20000)
+    parser.add_argument('--volume', type=int, default=64, help="Taille du gros bloc d'octets, en Mio")
+    args = parser.parse_args()
+
+    gros = os.urandom(args.volume * 2 ** 20)
+    enfants = [os.urandom(digest.TAILLE) for _ in range(3)]
+    racine, _ = charge(parties_synthetiques(args.parties, 40))
+    internes, mouvements = noeuds_internes(racine)
+
+    print(f"{'algorithme':>10} {'Mio/s':>10} {'noeuds/s':>12} {'arbre (ms)':>12}  stable")
+    for nom in digest.ALGORITHMES:
+        digest.utilise(nom)
+
+        debut = time.perf_counter()
+        digest.empreinte(gros)
+        debit = args.volume / (time.perf_counter() - debut)
+
+        n = 200000
+        debut = time.perf_counter()
+        for _ in range(n):
+            digest.empreinte_noeud('e2e4', enfants)
+        noeuds = n / (time.perf_counter() - debut)
+
+        for noeud in internes:
+            noeud._signature = None
+        debut = time.perf_counter()
+        racine.hash()
+        arbre = (time.perf_counter() - debut) * 1000
+
+        print(f"{nom:>10} {debit:10.0f} {noeuds:12,.0f} {arbre:12.1f}  {'oui' if stable(nom) else 'NON'}")
+
+    print(f"(arbre de {mouvements:,} mouvements)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Banc d'essai de l'explorateur d'ouvertures : latence des requetes sur un grand arbre de parties.
+
+On enregistre des parties synthetiques avec un resultat tire au hasard, puis on interroge l'explorateur sur des
+prefixes de parties enregistrees, a plusieurs profondeurs. On affiche le debit d'enregistrement, avec et sans
+statistiques, puis les latences medianes et au 99e centile d'une requete complete : la reponse de l'explorateur et
+son encodage en JSON, comme le fait le serveur.
+
+Utilisation ::
+
+    python -m benchmarks.bench_explorateur --parties 2000000 --longueur 40
+"""
+import argparse
+import json
+import random
+import time
+
+import ti103_chess.explorateur as explorateur
+import ti103_chess.patricia_trie as pm
+from benchmarks.bench_patricia_trie import parties_synthetiques
+
+
+def centile(durees, fraction):
+    """
+    Retourne le centile donne d'une liste de durees triee.
+    """
+    return durees[min(int(fraction * len(durees)), len(durees) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=200000)
+    parser.add_argument('--longueur', type=int, default=40)
+    parser.add_argument('--requetes', type=int, default=2000, help="Nombre de requetes par profondeur")
+    parser.add_argument('--profondeurs', type=int, nargs='+', default=[0, 2, 5, 10, 20])
+    args = parser.parse_args()
+
+    alea = random.Random(103)
+    parties = list(parties_synthetiques(args.parties, args.longueur))
+    resultats = alea.choices(pm.RESULTATS, weights=(37, 35, 28, 0), k=args.parties)
+
+    debut = time.perf_counter()
+    racine = pm.PatriciaMerkleTrie('')
+    for partie in parties:
+        racine.extend(partie)
+    sans = time.perf_counter() - debut
+
+    ouvertures = explorateur.Explorateur()
+    debut = time.perf_counter()
+    for partie, resultat in zip(parties, resultats):
+        ouvertures.ajoute(partie, resultat)
+    avec = time.perf_counter() - debut
+    print(f"{args.parties} parties de {args.longueur} coups : {args.parties / sans:9.0f} parties/s sans statistiques, "
+          f"{args.parties / avec:9.0f} parties/s avec")
+    assert ouvertures.racine.statistiques().parties == args.parties
+
+    for profondeur in args.profondeurs:
+        durees = []
+        for partie in alea.choices(parties, k=args.requetes):
+            debut = time.perf_counter()
+            json.dumps(ouvertures.reponse(partie[:profondeur]))
+            durees.append(time.perf_counter() - debut)
+        durees.sort()
+        suivants = len(ouvertures.suivants(parties[0][:profondeur]))
+        print(f"  profondeur {profondeur:2d} ({suivants:4d} suivants) : mediane {centile(durees, 0.5) * 1e6:8.1f} us, "
+              f"99e centile {centile(durees, 0.99) * 1e6:8.1f} us, maximum {durees[-1] * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
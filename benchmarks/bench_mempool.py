@@ -0,0 +1,75 @@
+"""
+Banc d'essai de la mempool.
+
+Plusieurs fils deposent des parties terminees, comme autant de sessions de jeu. On compare le scellage d'un bloc par
+partie, sur le chemin du depot, avec la mempool qui scelle par lots dans son propre fil : temps de depot vu par les
+sessions et debit de parties scellees.
+
+Utilisation ::
+
+    python -m benchmarks.bench_mempool --parties 20000 --sessions 8 --lot 1000
+"""
+import argparse
+import threading
+import time
+
+import ti103_chess.blockchain as bc
+import ti103_chess.mempool as mp
+from benchmarks.bench_patricia_trie import parties_synthetiques
+
+
+def sessions(nombre, parties, depose):
+    """
+    Lance des fils qui se partagent les parties a deposer et retourne le temps moyen d'un depot en microsecondes.
+    """
+    durees = []
+
+    def session(k):
+        debut = time.perf_counter()
+        for partie in parties[k::nombre]:
+            depose(partie)
+        durees.append(time.perf_counter() - debut)
+
+    fils = [threading.Thread(target=session, args=(k,)) for k in range(nombre)]
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+    return sum(durees) / len(parties) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=20000)
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--lot', type=int, default=1000)
+    args = parser.parse_args()
+
+    parties = list(parties_synthetiques(args.parties, 60))
+
+    chaine = bc.BlockChain()
+    verrou = threading.Lock()
+
+    def scelle(partie):
+        with verrou:
+            chaine.head().transactions.extend(partie)
+            chaine.new()
+
+    debut = time.perf_counter()
+    depot = sessions(args.sessions, parties, scelle)
+    duree = time.perf_counter() - debut
+    print(f"Un bloc par partie : depot {depot:8.1f} us, {args.parties / duree:8,.0f} parties scellees/s")
+
+    chaine = bc.BlockChain()
+    mempool = mp.Mempool(chaine, taille_max=args.lot, delai_max=0.5)
+    debut = time.perf_counter()
+    depot = sessions(args.sessions, parties, mempool.soumet)
+    mempool.ferme()
+    duree = time.perf_counter() - debut
+    metriques = mempool.metriques()
+    print(f"Mempool :            depot {depot:8.1f} us, {args.parties / duree:8,.0f} parties scellees/s "
+          f"({metriques['blocs']} blocs, latence moyenne {metriques['latence_moyenne'] * 1000:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Banc d'essai du hachage incremental de l'arbre de Patricia Merkle.
+
+On construit un arbre d'environ un million de mouvements, puis on compare le temps d'un hachage complet (toutes les
+signatures en cache effacees) avec celui d'un rehachage apres l'ajout d'un seul mouvement.
+
+Utilisation ::
+
+    python -m benchmarks.bench_merkle_hash --noeuds 1000000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_patricia_trie import charge, noeuds_internes, parties_synthetiques
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--noeuds', type=int, default=1000000)
+    parser.add_argument('--longueur', type=int, default=40)
+    parser.add_argument('--ajouts', type=int, default=1000)
+    args = parser.parse_args()
+
+    # Les parties synthetiques partagent peu de coups passe l'ouverture : environ longueur - 5 noeuds par partie.
+    racine, _ = charge(parties_synthetiques(args.noeuds // (args.longueur - 5), args.longueur))
+    tous, mouvements = noeuds_internes(racine)
+    print(f"Arbre de {mouvements:,} mouvements ({len(tous):,} noeuds internes)")
+
+    for noeud in tous:
+        noeud._signature = None
+    debut = time.perf_counter()
+    racine.hash()
+    complet = time.perf_counter() - debut
+    print(f"Hachage complet :     {complet * 1000:10.1f} ms")
+
+    alea = random.Random(103)
+    feuilles = [racine._position(noeud, noeud.debut + len(noeud.mouvements) - 1)
+                for noeud in tous if not noeud.children]
+    debut = time.perf_counter()
+    for i in range(args.ajouts):
+        alea.choice(feuilles).add(f"x{i}")
+        racine.hash()
+    incremental = (time.perf_counter() - debut) / args.ajouts
+    print(f"Hachage incremental : {incremental * 1000:10.3f} ms par mouvement ajoute")
+    print(f"Acceleration :        {complet / incremental:10.0f} x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Banc d'essai de l'arbre de Patricia Merkle.
+
+On charge un grand nombre de parties synthetiques dans l'arbre et on mesure le nombre d'insertions par seconde ainsi
+que la memoire maximale consommee. Les parties sont generees de facon a partager leurs ouvertures, comme de vraies
+parties : les premiers coups sont tires parmi peu de choix, puis l'arbre s'evase.
+
+Utilisation ::
+
+    python -m benchmarks.bench_patricia_trie --parties 100000 --longueur 40
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+import ti103_chess.patricia_trie as pm
+
+
+CASES = [c + r for c in "abcdefgh" for r in "12345678"]
+
+
+def parties_synthetiques(nombre, longueur, graine=103):
+    """
+    Genere des parties synthetiques sous forme de listes de coups UCI.
+
+    Au coup n, le coup est choisi parmi 2 + 2 * n possibilites, ce qui donne des ouvertures tres partagees (beaucoup
+    d'enfants sous 'e2e4') et des fins de parties presque toutes distinctes.
+    """
+    alea = random.Random(graine)
+    vocabulaire = [a + b for a in CASES for b in CASES if a != b]
+    for _ in range(nombre):
+        yield [vocabulaire[alea.randrange(min(2 + 2 * n, len(vocabulaire)))] for n in range(longueur)]
+
+
+def charge(parties):
+    """
+    Insere toutes les parties dans un nouvel arbre et retourne l'arbre et le nombre de coups inseres.
+    """
+    racine = pm.PatriciaMerkleTrie('')
+    coups = 0
+    for partie in parties:
+        noeud = racine
+        for mouvement in partie:
+            noeud = noeud.add(mouvement)
+        coups += len(partie)
+    return racine, coups
+
+
+def noeuds_internes(racine):
+    """
+    Retourne la liste des noeuds internes (aretes compressees) de l'arbre, et le nombre de mouvements qu'ils portent.
+    """
+    resultat = []
+    mouvements = 0
+    pile = [racine._noeud]
+    while pile:
+        noeud = pile.pop()
+        resultat.append(noeud)
+        mouvements += len(noeud.mouvements)
+        pile.extend(noeud.enfants())
+    return resultat, mouvements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=100000)
+    parser.add_argument('--longueur', type=int, default=40)
+    args = parser.parse_args()
+
+    parties = list(parties_synthetiques(args.parties, args.longueur))
+
+    debut = time.perf_counter()
+    racine, coups = charge(parties)
+    duree = time.perf_counter() - debut
+    print(f"{args.parties} parties, {coups} insertions en {duree:.2f} s : {coups / duree:,.0f} insertions/s")
+    internes, mouvements = noeuds_internes(racine)
+    print(f"{mouvements:,} mouvements distincts ranges dans {len(internes):,} noeuds internes")
+
+    debut = time.perf_counter()
+    racine.hash()
+    print(f"Hachage complet : {time.perf_counter() - debut:.2f} s")
+
+    # La mesure memoire se fait a part : tracemalloc ralentit beaucoup les insertions.
+    del racine
+    tracemalloc.start()
+    racine, _ = charge(parties)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Memoire maximale : {pic / 2 ** 20:.1f} Mio")
+
+
+if __name__ == '__main__':
+    main()
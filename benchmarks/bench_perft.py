@@ -0,0 +1,69 @@
+"""
+Banc d'essai du generateur de mouvements en bitboards : positions par seconde en perft, face a chess.Board.
+
+On compte les suites de mouvements legaux (perft) depuis des positions fixes jusqu'a une profondeur donnee, avec les
+positions du module bitboard, jouees et annulees sur place, puis avec chess.Board (push et pop). On verifie que les
+deux comptes sont egaux. On mesure ensuite la verification d'un seul mouvement, celle de l'echiquier affiche et de
+l'arbitre du serveur : Position.est_legal face a chess.Board.is_legal.
+
+Utilisation ::
+
+    python -m benchmarks.bench_perft --profondeur 4
+"""
+import argparse
+import time
+
+import chess
+
+import ti103_chess.bitboard as bitboard
+from benchmarks.bench_recherche import POSITIONS
+
+
+def perft(board, profondeur):
+    """
+    Compte les suites de mouvements legaux avec chess.Board.
+    """
+    if profondeur <= 1:
+        return board.legal_moves.count() if profondeur == 1 else 1
+    total = 0
+    for mouvement in board.legal_moves:
+        board.push(mouvement)
+        total += perft(board, profondeur - 1)
+        board.pop()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profondeur', type=int, default=4)
+    parser.add_argument('--repetitions', type=int, default=20000, help="Verifications de mouvements par position")
+    args = parser.parse_args()
+
+    for nom, fen in POSITIONS.items():
+        debut = time.perf_counter()
+        nombre = bitboard.perft(bitboard.Position(fen), args.profondeur)
+        duree = time.perf_counter() - debut
+        debut = time.perf_counter()
+        attendu = perft(chess.Board(fen), args.profondeur)
+        reference = time.perf_counter() - debut
+        assert nombre == attendu, (nom, nombre, attendu)
+        print(f"{nom}, perft {args.profondeur} = {nombre} : bitboards {nombre / duree:9.0f} positions/s, "
+              f"chess.Board {nombre / reference:9.0f} positions/s, acceleration {reference / duree:4.1f}")
+
+        position, board = bitboard.Position(fen), chess.Board(fen)
+        mouvements = list(board.legal_moves)
+        codes = [bitboard.code(m) for m in mouvements]
+        debut = time.perf_counter()
+        for k in range(args.repetitions):
+            position.est_legal(codes[k % len(codes)])
+        duree = time.perf_counter() - debut
+        debut = time.perf_counter()
+        for k in range(args.repetitions):
+            board.is_legal(mouvements[k % len(mouvements)])
+        reference = time.perf_counter() - debut
+        print(f"  verification d'un mouvement : bitboards {duree / args.repetitions * 1e6:5.1f} us, "
+              f"chess.Board {reference / args.repetitions * 1e6:5.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Banc d'essai de l'importation de fichiers PGN.
+
+On genere un fichier PGN compresse de parties aleatoires (mais legales), puis on l'importe avec un nombre croissant
+de processus. On affiche le debit en parties par seconde et la memoire maximale du processus principal, qui doit
+rester stable quelle que soit la taille du fichier (--repetitions).
+
+Utilisation ::
+
+    python -m benchmarks.bench_pgn_import --parties 2000 --repetitions 10 --processus 1 2 4
+"""
+import argparse
+import gzip
+import os
+import random
+import resource
+import tempfile
+
+import chess
+import chess.pgn
+
+import ti103_chess.pgn_import as pi
+
+
+def partie_aleatoire(alea, longueur):
+    """
+    Retourne le texte PGN d'une partie aleatoire d'au plus longueur demi-coups.
+    """
+    partie = chess.pgn.Game()
+    noeud = partie
+    for _ in range(longueur):
+        coups = list(noeud.board().legal_moves)
+        if not coups:
+            break
+        noeud = noeud.add_variation(alea.choice(coups))
+    partie.headers['Result'] = alea.choice(['1-0', '0-1', '1/2-1/2'])
+    return str(partie)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=2000)
+    parser.add_argument('--repetitions', type=int, default=10)
+    parser.add_argument('--longueur', type=int, default=80)
+    parser.add_argument('--processus', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--lot', type=int, default=500)
+    args = parser.parse_args()
+
+    alea = random.Random(103)
+    texte = '\n\n'.join(partie_aleatoire(alea, args.longueur) for _ in range(args.parties)) + '\n\n'
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'parties.pgn.gz')
+        with gzip.open(chemin, 'wt') as f:
+            for _ in range(args.repetitions):
+                f.write(texte)
+        print(f"Fichier de {args.parties * args.repetitions} parties, {os.path.getsize(chemin) / 2 ** 20:.1f} Mio "
+              f"compresse")
+
+        for processus in args.processus:
+            _, rapport = pi.importe(chemin, processus=processus, taille_lot=args.lot)
+            memoire = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"{processus} processus : {rapport} (memoire maximale {memoire:.0f} Mio)")
+
+
+if __name__ == '__main__':
+    main()
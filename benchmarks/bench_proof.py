@@ -0,0 +1,59 @@
+"""
+Banc d'essai des preuves d'inclusion d'une partie dans un bloc.
+
+On scelle un bloc contenant un grand nombre de parties synthetiques, puis on compare, pour un client leger, la
+taille et le temps de verification d'une preuve avec ceux du bloc complet (telecharge au format compact puis dont
+toutes les signatures sont recalculees).
+
+Utilisation ::
+
+    python -m benchmarks.bench_proof --parties 10000
+"""
+import argparse
+import random
+import time
+
+import ti103_chess.blockchain as bc
+import ti103_chess.proof as proof
+import ti103_chess.trie_compact as tc
+from benchmarks.bench_patricia_trie import parties_synthetiques
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=10000)
+    parser.add_argument('--preuves', type=int, default=1000)
+    args = parser.parse_args()
+
+    parties = list(parties_synthetiques(args.parties, 60))
+    chaine = bc.BlockChain()
+    for partie in parties:
+        chaine.head().transactions.extend(partie)
+    chaine.new()
+    bloc = chaine.chain[0]
+    signature = bloc.hash()
+
+    compact = tc.TrieCompact.depuis_trie(bloc.transactions)
+    taille_bloc = len(compact.octets())
+    debut = time.perf_counter()
+    compact.recalcule()
+    duree_bloc = time.perf_counter() - debut
+
+    echantillon = random.Random(103).sample(parties, args.preuves)
+    debut = time.perf_counter()
+    preuves = [proof.prouve(bloc, partie).octets() for partie in echantillon]
+    duree_production = (time.perf_counter() - debut) / len(preuves)
+
+    debut = time.perf_counter()
+    assert all(proof.verifie(proof.Preuve.depuis_octets(p), signature) for p in preuves)
+    duree_preuve = (time.perf_counter() - debut) / len(preuves)
+    taille_preuve = sum(map(len, preuves)) / len(preuves)
+
+    print(f"Bloc complet : {taille_bloc / 1024:10.1f} Kio, verification {duree_bloc * 1000:10.3f} ms")
+    print(f"Preuve :       {taille_preuve / 1024:10.1f} Kio, verification {duree_preuve * 1000:10.3f} ms "
+          f"(production {duree_production * 1000:.3f} ms)")
+    print(f"Gain :         {taille_bloc / taille_preuve:10.0f} x en taille, {duree_bloc / duree_preuve:.0f} x en temps")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Banc d'essai du format des mouvements echanges entre les clients et le serveur.
+
+Pour chaque mouvement, on mesure le cout de serialisation de bout en bout : l'encodage par le client, le decodage et le
+reencodage par le serveur, puis le decodage par le client qui le recoit. On compare l'ancien format JSON, avec les
+coordonnees de la piece a l'ecran, et les trames binaires du module protocole. On compare aussi le nombre d'octets
+envoyes.
+
+Utilisation ::
+
+    python -m benchmarks.bench_protocole --mouvements 200000
+"""
+import argparse
+import json
+import random
+import time
+
+import ti103_chess.moves as moves
+import ti103_chess.protocole as protocole
+
+
+def ancien(sid, mouvements):
+    """
+    Le format JSON d'origine, de client.py et server.py. Retourne le nombre d'octets envoyes.
+    """
+    octets = 0
+    for mouvement in mouvements:
+        envoi = json.dumps({"sid": sid, "move": mouvement + "340425"})
+        data_recv = json.loads(envoi)
+        relais = json.dumps({"sid": data_recv["sid"], "move": data_recv["move"]})
+        json.loads(relais)["move"]
+        octets += len(envoi) + len(relais)
+    return octets
+
+
+def binaire(salle, mouvements):
+    """
+    Les trames binaires, decodees et reencodees par le serveur pour y mettre le demi-coup de reference.
+    """
+    octets = 0
+    for k, mouvement in enumerate(mouvements):
+        ply = k % 200 + 1   # Des parties de 200 demi-coups
+        envoi = protocole.encode(salle, ply, mouvement)
+        coup = protocole.decode(envoi)
+        relais = protocole.encode(salle, coup.ply, coup.mouvement)
+        protocole.decode(relais).mouvement
+        octets += len(envoi) + len(relais)
+    return octets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mouvements', type=int, default=200000)
+    args = parser.parse_args()
+
+    generateur = random.Random(103)
+    mouvements = [generateur.choice(moves.CASES) + generateur.choice(moves.CASES) for _ in range(args.mouvements)]
+    mouvements = [m if m[:2] != m[2:] else 'e2e4' for m in mouvements]
+    for nom, fonction, argument in (("JSON", ancien, 'Xk3q9mW2aB7cD1eFAAAB'), ("Binaire", binaire, '103')):
+        debut = time.perf_counter()
+        octets = fonction(argument, mouvements)
+        duree = time.perf_counter() - debut
+        print(f"{nom:8s}: {duree / len(mouvements) * 1e6:6.2f} us par mouvement, "
+              f"{octets / len(mouvements):5.1f} octets par mouvement (aller et relais)")
+
+
+if __name__ == '__main__':
+    main()
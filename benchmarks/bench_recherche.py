@@ -0,0 +1,43 @@
+"""
+Banc d'essai du moteur de recherche : noeuds par seconde et temps pour atteindre chaque profondeur.
+
+On cherche dans des positions fixes, chacune avec une table de transposition neuve, jusqu'a une profondeur donnee.
+Pour chaque profondeur terminee, on affiche le temps ecoule depuis le debut de la recherche, les noeuds visites, la
+vitesse et le mouvement retenu.
+
+Utilisation ::
+
+    python -m benchmarks.bench_recherche --profondeur 5
+"""
+import argparse
+
+import chess
+
+import ti103_chess.recherche as recherche
+
+
+POSITIONS = {
+    "Depart": chess.STARTING_FEN,
+    "Milieu de partie": "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP2BPPP/R2QKB1R w KQ - 0 9",
+    "Kiwipete": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "Finale": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profondeur', type=int, default=5)
+    parser.add_argument('--octets', type=int, default=16 << 20, help="Taille de la table de transposition")
+    args = parser.parse_args()
+
+    for nom, fen in POSITIONS.items():
+        print(nom)
+        moteur = recherche.Recherche(recherche.TableTransposition(args.octets))
+        moteur.cherche(chess.Board(fen), profondeur=args.profondeur,
+                       rapport=lambda r: print(f"  profondeur {r.profondeur:2d} : {r.duree:7.2f} s, {r.noeuds:8d} "
+                                               f"noeuds, {r.noeuds / r.duree:7.0f} noeuds/s, {r.mouvement} "
+                                               f"({r.score:+d})"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Banc d'essai du rendu de l'echiquier, sans fenetre : images par seconde et temps processeur par image.
+
+Avec le pilote video factice de SDL, on fait des images sans attendre, dans trois cas : l'ancien rendu, ou tout
+l'ecran est redessine a chaque image ; une image par mouvement, ou seules les cases touchees sont redessinees ; et des
+images sans changement, ou rien n'est dessine.
+
+Utilisation ::
+
+    python -m benchmarks.bench_rendu --images 2000
+"""
+import argparse
+import itertools
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import ti103_chess.board as board  # noqa: E402
+
+
+# Les cavaliers font des allers-retours : autant de mouvements que l'on veut
+_CYCLE = ['g1f3', 'g8f6', 'f3g1', 'f6g8']
+
+
+def complet(partie, mouvement):
+    partie.deplace(mouvement)
+    partie.complet = True
+    partie.update_screen()
+
+
+def par_cases(partie, mouvement):
+    partie.deplace(mouvement)
+    partie.update_screen()
+
+
+def repos(partie, mouvement):
+    partie.update_screen()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--images', type=int, default=2000)
+    args = parser.parse_args()
+
+    for nom, image in (("Ecran complet", complet), ("Cases touchees", par_cases), ("Sans changement", repos)):
+        # Chaque cas repart de la position de depart : le cycle des cavaliers y est toujours legal
+        partie = board.nouvelle_partie('bench')
+        partie.update_screen()
+        mouvements = itertools.islice(itertools.cycle(_CYCLE), args.images)
+        debut, processeur = time.perf_counter(), time.process_time()
+        for mouvement in mouvements:
+            image(partie, mouvement)
+        duree, processeur = time.perf_counter() - debut, time.process_time() - processeur
+        print(f"{nom:16s}: {args.images / duree:9.0f} images/s, {processeur / args.images * 1e6:7.1f} us de "
+              f"processeur par image")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Banc d'essai de la resynchronisation d'un client qui se reconnecte.
+
+Le client a manque les derniers mouvements d'une partie. On mesure le cout de son rattrapage, de la demande au serveur
+jusqu'a son echiquier a jour : avec le journal des mouvements de l'arbitre (une trame de lot des seuls mouvements
+manques, joues a la suite sur l'echiquier du client), et en renvoyant toute la partie en JSON pour reconstruire
+l'echiquier depuis le debut. Le premier cout ne doit dependre que du nombre de mouvements manques, pas de la longueur
+de la partie.
+
+Utilisation ::
+
+    python -m benchmarks.bench_resync --repetitions 200
+"""
+import argparse
+import itertools
+import json
+import time
+
+import chess
+
+import ti103_chess.arbitre as arbitre
+import ti103_chess.protocole as protocole
+
+
+# Les cavaliers font des allers-retours : une partie legale aussi longue que l'on veut
+_CYCLE = ['g1f3', 'g8f6', 'f3g1', 'f6g8']
+
+
+def par_lot(juge, client, ply):
+    """
+    Rattrapage par le journal : une trame de lot des mouvements qui suivent le demi-coup ply. Retourne sa taille.
+    """
+    trame = protocole.encode_lot('103', ply + 1, juge.coups_depuis('103', ply))
+    for mouvement in protocole.decode_lot(trame).mouvement:
+        client.push_uci(mouvement)
+    return len(trame)
+
+
+def complet(juge, client, ply):
+    """
+    Rattrapage complet : toute la partie en JSON, rejouee sur un nouvel echiquier. Retourne la taille du message.
+    """
+    message = json.dumps({"salle": '103', "fen": juge.fen('103'), "coups": juge.coups('103')})
+    echiquier = chess.Board()
+    for mouvement in json.loads(message)["coups"]:
+        echiquier.push_uci(mouvement)
+    return len(message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repetitions', type=int, default=200)
+    args = parser.parse_args()
+
+    for longueur in (40, 200, 1000):
+        juge = arbitre.Arbitre()
+        juge.nouvelle('103')
+        for mouvement in itertools.islice(itertools.cycle(_CYCLE), longueur):
+            juge.joue('103', mouvement)
+
+        for manques in (1, 8, 32):
+            ply = longueur - manques
+            depart = chess.Board()
+            for mouvement in juge.coups('103')[:ply]:
+                depart.push_uci(mouvement)
+
+            for nom, fonction in (("Lot", par_lot), ("Complet", complet)):
+                clients = [depart.copy(stack=False) for _ in range(args.repetitions)]
+                debut = time.perf_counter()
+                for client in clients:
+                    octets = fonction(juge, client, ply)
+                duree = (time.perf_counter() - debut) / args.repetitions
+                print(f"Partie de {longueur:4d} demi-coups, {manques:2d} manques, {nom:7s}: {duree * 1e6:8.1f} us, "
+                      f"{duree / manques * 1e6:6.1f} us par mouvement manque, {octets:6d} octets")
+
+
+if __name__ == '__main__':
+    main()
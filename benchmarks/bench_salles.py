@@ -0,0 +1,96 @@
+"""
+Banc d'essai de la diffusion des mouvements, a tous les clients ou par salle.
+
+On simule un serveur avec un grand nombre de parties simultanees, chacune avec deux joueurs et des spectateurs. Chaque
+client simule a sa file de messages recus, et trie les messages comme client.py : il decode le JSON et ignore ceux
+qu'il a lui-meme envoyes. On compare la diffusion a tous les clients connectes (broadcast=True) et l'envoi aux seuls
+membres de la salle (voir le module salles) : nombre de messages et latence d'un mouvement, du depot par le joueur
+jusqu'a son traitement par le dernier destinataire.
+
+Le transport reseau n'est pas simule : seul le cout de la diffusion et du tri, qui croit avec le nombre de parties,
+est mesure.
+
+Utilisation ::
+
+    python -m benchmarks.bench_salles --parties 1000 --spectateurs 1 --coups 2
+"""
+import argparse
+import collections
+import json
+import random
+import statistics
+import time
+
+import ti103_chess.salles as salles
+
+
+class Client:
+    """
+    Un client simule : une file de messages recus et le traitement de client.py.
+    """
+    def __init__(self, sid):
+        self.sid = sid
+        self.file = collections.deque()
+        self.mouvements = 0
+
+    def traite(self):
+        while self.file:
+            update_move = json.loads(self.file.popleft())
+            if update_move["sid"] != self.sid:
+                self.mouvements += 1
+
+
+def simule(clients, tours, destinataires):
+    """
+    Joue les mouvements, un tour apres l'autre, et retourne le nombre de messages envoyes et les latences en secondes.
+    """
+    messages = 0
+    latences = []
+    for joueur, mouvement in tours:
+        debut = time.perf_counter()
+        x_json = json.dumps({"sid": joueur, "move": mouvement})
+        cibles = destinataires(joueur)
+        for sid in cibles:
+            clients[sid].file.append(x_json)
+        for sid in cibles:
+            clients[sid].traite()
+        latences.append(time.perf_counter() - debut)
+        messages += len(cibles)
+    return messages, latences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=1000)
+    parser.add_argument('--spectateurs', type=int, default=1)
+    parser.add_argument('--coups', type=int, default=2, help="Mouvements joues par partie")
+    args = parser.parse_args()
+
+    registre = salles.Registre()
+    joueurs = []
+    for k in range(args.parties):
+        blanc, noir = f'b{k}', f'n{k}'
+        salle = registre.cree(blanc)
+        registre.rejoint(noir, salle)
+        for s in range(args.spectateurs):
+            registre.rejoint(f's{k}-{s}', salle, spectateur=True)
+        joueurs += [blanc, noir]
+
+    sids = [sid for salle in registre.salles.values() for sid in salle.membres()]
+    generateur = random.Random(103)
+    tours = [(joueur, 'e2e4' + '%03d%03d' % (generateur.randrange(680), generateur.randrange(680)))
+             for c in range(args.coups) for joueur in joueurs[c % 2::2]]
+
+    print(f"{args.parties} parties, {len(sids)} clients, {len(tours)} mouvements")
+    for nom, destinataires in (("Broadcast", lambda joueur: sids), ("Salles", registre.destinataires)):
+        clients = {sid: Client(sid) for sid in sids}
+        messages, latences = simule(clients, tours, destinataires)
+        latences.sort()
+        p50 = statistics.median(latences)
+        p99 = latences[int(0.99 * (len(latences) - 1))]
+        print(f"{nom:10s}: {messages:12,d} messages ({messages / len(tours):8.1f} par mouvement), "
+              f"latence p50 {p50 * 1000:8.3f} ms, p99 {p99 * 1000:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Banc d'essai du serveur de jeu asyncio, avec des milliers de clients simules.
+
+On lance le serveur (voir ti103_chess.server_asgi) dans un processus a part, puis on connecte deux clients socket.io
+par partie depuis une seule boucle asyncio. Dans chaque partie, les joueurs jouent chacun a leur tour, des qu'ils ont
+recu le mouvement de l'autre. On mesure la latence de relais d'un mouvement : de son envoi par un joueur a sa reception
+par l'autre, apres validation par le serveur. Les mouvements sont envoyes en trames binaires (voir protocole).
+
+Utilisation ::
+
+    python -m benchmarks.bench_server_asgi --parties 1000 --coups 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+import socketio
+
+import ti103_chess.protocole as protocole
+
+
+# Les cavaliers font des allers-retours : la suite reste legale aussi longtemps que l'on veut
+CAVALIERS = ['g1f3', 'g8f6', 'f3g1', 'f6g8']
+
+
+async def partie(url, numero, coups, latences, connexions, url_spectateur=None, vus=None):
+    """
+    Joue une partie entre deux clients simules et ajoute les latences de relais a la liste.
+
+    Avec url_spectateur, un spectateur suit aussi la partie depuis ce serveur, et ajoute a la liste vus le nombre de
+    mouvements qu'il a recus.
+    """
+    blanc = socketio.AsyncClient()
+    noir = socketio.AsyncClient()
+    envois = {}      # Demi-coup -> instant d'envoi
+    termine = asyncio.Event()
+    joueurs = [blanc, noir]
+    spectateur = socketio.AsyncClient() if url_spectateur else None
+    recus = []
+
+    async def envoie(client, ply):
+        envois[ply + 1] = time.perf_counter()   # Le serveur numerote les demi-coups a partir de 1
+        await client.emit('connected', protocole.encode(salle, ply + 1, CAVALIERS[ply % 4]))
+
+    def reception(client):
+        async def handler(data):
+            ply = protocole.decode(data).ply
+            latences.append(time.perf_counter() - envois.pop(ply))
+            if ply == coups:
+                termine.set()
+            else:
+                await envoie(client, ply)
+        return handler
+
+    salle = str(numero)
+    for client in joueurs:
+        client.on('server response', reception(client))
+
+    async with connexions:
+        for client in joueurs:
+            await client.connect(url, transports=['websocket'])
+        if spectateur:
+            spectateur.on('server response', recus.append)
+            await spectateur.connect(url_spectateur, transports=['websocket'])
+    await blanc.call('create', json.dumps({"salle": salle, "binaire": True}))
+    await noir.call('join', json.dumps({"salle": salle, "binaire": True}))
+    if spectateur:
+        await spectateur.call('join', json.dumps({"salle": salle, "binaire": True, "spectateur": True}))
+
+    await envoie(blanc, 0)
+    await termine.wait()
+    if spectateur:
+        for _ in range(100):   # Les derniers mouvements peuvent encore passer par le bus
+            if len(recus) >= coups:
+                break
+            await asyncio.sleep(0.01)
+        vus.append(len(recus))
+        joueurs.append(spectateur)
+    for client in joueurs:
+        await client.disconnect()
+
+
+async def charge(url, parties, coups):
+    """
+    Joue toutes les parties en meme temps et retourne les latences et la duree totale.
+    """
+    latences = []
+    connexions = asyncio.Semaphore(100)   # Limite les connexions simultanees en cours d'etablissement
+    debut = time.perf_counter()
+    await asyncio.gather(*(partie(url, k, coups, latences, connexions) for k in range(parties)))
+    return latences, time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=1000)
+    parser.add_argument('--coups', type=int, default=20)
+    parser.add_argument('--port', type=int, default=3103)
+    args = parser.parse_args()
+
+    serveur = subprocess.Popen([sys.executable, '-m', 'ti103_chess.server_asgi', '--port', str(args.port)])
+    try:
+        time.sleep(2)   # Le temps que le serveur ecoute
+        latences, duree = asyncio.run(charge(f'http://127.0.0.1:{args.port}', args.parties, args.coups))
+    finally:
+        serveur.terminate()
+        serveur.wait()
+
+    latences.sort()
+    print(f"{args.parties} parties, {2 * args.parties} clients, {len(latences)} mouvements relayes en {duree:.1f} s "
+          f"({len(latences) / duree:,.0f} mouvements/s)")
+    print(f"Latence de relais : p50 {statistics.median(latences) * 1000:.2f} ms, "
+          f"p99 {latences[int(0.99 * (len(latences) - 1))] * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Banc d'essai de la recherche repartie sur plusieurs processus (Lazy SMP) : acceleration du temps pour atteindre une
+profondeur.
+
+Pour chaque nombre de processus, on cherche des positions fixes jusqu'a une profondeur donnee, avec une table de
+transposition partagee neuve. On compare le temps mis par la recherche principale pour terminer la derniere
+profondeur a celui d'un seul processus. L'acceleration depend des coeurs disponibles : elle est affichee avec leur
+nombre.
+
+Utilisation ::
+
+    python -m benchmarks.bench_smp --profondeur 5 --processus 1 2 4 8
+"""
+import argparse
+import os
+
+import chess
+
+import ti103_chess.recherche as recherche
+from benchmarks.bench_recherche import POSITIONS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profondeur', type=int, default=5)
+    parser.add_argument('--processus', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--octets', type=int, default=64 << 20, help="Taille de la table de transposition partagee")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} coeurs, {len(os.sched_getaffinity(0))} utilisables")
+    for nom in ("Milieu de partie", "Kiwipete"):
+        print(nom)
+        reference = None
+        for processus in args.processus:
+            parallele = recherche.RechercheParallele(processus, args.octets)
+            try:
+                resultat = parallele.cherche(chess.Board(POSITIONS[nom]), profondeur=args.profondeur)
+            finally:
+                parallele.ferme()
+            reference = reference or resultat.duree
+            print(f"  {processus} processus : profondeur {resultat.profondeur} en {resultat.duree:6.2f} s, "
+                  f"acceleration {reference / resultat.duree:4.2f}, {resultat.noeuds:8d} noeuds en tout, "
+                  f"{resultat.mouvement}")
+
+
+if __name__ == '__main__':
+    main()
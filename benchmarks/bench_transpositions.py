@@ -0,0 +1,104 @@
+"""
+Banc d'essai de l'index des positions : construction, mise a jour, memoire et latence des requetes.
+
+On joue des parties aleatoires legales, ou les premiers mouvements sont tires parmi peu de choix pour que les parties
+se croisent par transposition, comme de vraies ouvertures. On mesure la construction de l'index en un parcours d'un
+arbre deja rempli, puis l'enregistrement des memes parties par l'index, et on affiche son rapport : les positions
+dedupliquees et la memoire economisee. On mesure enfin la latence des statistiques et des mouvements suivants d'une
+position, quel que soit l'ordre des mouvements, a plusieurs profondeurs. Avec --ouvertures, l'index se limite aux
+premiers demi-coups des parties.
+
+Utilisation ::
+
+    python -m benchmarks.bench_transpositions --parties 50000 --longueur 40
+"""
+import argparse
+import random
+import time
+
+import ti103_chess.bitboard as bitboard
+import ti103_chess.moves as moves
+import ti103_chess.patricia_trie as pm
+import ti103_chess.transpositions as transpositions
+from benchmarks.bench_explorateur import centile
+
+
+def parties_legales(nombre, longueur, graine=103):
+    """
+    Genere des parties aleatoires legales, sous forme de listes de coups UCI, avec un resultat.
+
+    Au demi-coup n, le mouvement est choisi parmi les 2 + n premiers mouvements legaux, dans l'ordre de leur code.
+    """
+    alea = random.Random(graine)
+    position = bitboard.Position()
+    for _ in range(nombre):
+        partie = []
+        for n in range(longueur):
+            legaux = sorted(position.mouvements())
+            if not legaux:
+                break
+            code = legaux[alea.randrange(min(2 + n, len(legaux)))]
+            position.joue(code)
+            partie.append(moves.decode(code))
+        for _ in partie:
+            position.annule()
+        yield partie, alea.choices(pm.RESULTATS, weights=(37, 35, 28, 0))[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=20000)
+    parser.add_argument('--longueur', type=int, default=30)
+    parser.add_argument('--requetes', type=int, default=2000, help="Nombre de requetes par profondeur")
+    parser.add_argument('--profondeurs', type=int, nargs='+', default=[2, 4, 8, 16])
+    parser.add_argument('--ouvertures', type=int, default=None, help="Nombre de demi-coups indexes (tous par defaut)")
+    args = parser.parse_args()
+
+    parties = list(parties_legales(args.parties, args.longueur))
+
+    racine = pm.PatriciaMerkleTrie('')
+    for mouvements, resultat in parties:
+        racine.extend(mouvements, resultat)
+    debut = time.perf_counter()
+    index = transpositions.IndexPositions(racine, args.ouvertures)
+    duree = time.perf_counter() - debut
+    print(f"Construction en un parcours : {index.positions} positions en {duree:6.2f} s, "
+          f"{index.positions / duree:9.0f} positions/s")
+
+    debut = time.perf_counter()
+    index = transpositions.IndexPositions(pm.PatriciaMerkleTrie(''), args.ouvertures)
+    for mouvements, resultat in parties:
+        index.ajoute(mouvements, resultat)
+    duree = time.perf_counter() - debut
+    print(f"Mise a jour par ajoute : {args.parties} parties de {args.longueur} coups, "
+          f"{args.parties / duree:9.0f} parties/s")
+
+    rapport = index.rapport()
+    print(f"{rapport.positions} positions de l'arbre, {rapport.distinctes} distinctes, {rapport.transposees} atteintes "
+          f"par plusieurs ordres de mouvements : {rapport.octets / 2 ** 20:7.1f} Mo au lieu de "
+          f"{rapport.octets_sans_deduplication / 2 ** 20:7.1f} Mo, "
+          f"{(rapport.octets_sans_deduplication - rapport.octets) / 2 ** 20:7.1f} Mo economises")
+
+    alea = random.Random(103)
+    for profondeur in args.profondeurs:
+        cles = []
+        for mouvements, _ in alea.choices(parties, k=args.requetes):
+            position = bitboard.Position()
+            for mouvement in mouvements[:profondeur]:
+                position.joue(moves.encode(mouvement))
+            cles.append(position.cle())
+        durees, ordres = [], 0
+        for cle in cles:
+            debut = time.perf_counter()
+            index.statistiques(cle)
+            index.suivants(cle)
+            durees.append(time.perf_counter() - debut)
+            ordres += len(index.chemins(cle))
+        durees.sort()
+        print(f"  profondeur {profondeur:2d} ({ordres / len(cles):5.1f} ordres par position) : mediane "
+              f"{centile(durees, 0.5) * 1e6:8.1f} us, 99e centile {centile(durees, 0.99) * 1e6:8.1f} us, "
+              f"maximum {durees[-1] * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Banc d'essai de l'arbre de Patricia Merkle compact.
+
+On compare la memoire de l'arbre en objets Python avec la taille du fichier compact, puis on mesure le temps
+d'ouverture du fichier par mmap et le nombre de recherches par seconde directement sur le fichier.
+
+Utilisation ::
+
+    python -m benchmarks.bench_trie_compact --parties 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import ti103_chess.trie_compact as tc
+from benchmarks.bench_patricia_trie import charge, parties_synthetiques
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--parties', type=int, default=100000)
+    parser.add_argument('--longueur', type=int, default=40)
+    parser.add_argument('--recherches', type=int, default=100000)
+    args = parser.parse_args()
+
+    parties = list(parties_synthetiques(args.parties, args.longueur))
+    tracemalloc.start()
+    racine, coups = charge(parties)
+    memoire, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    racine.hash()
+
+    debut = time.perf_counter()
+    compact = tc.TrieCompact.depuis_trie(racine)
+    print(f"Conversion :          {time.perf_counter() - debut:8.2f} s")
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'arbre.pmtc')
+        compact.ecrire(chemin)
+        taille = os.path.getsize(chemin)
+        nb_coups = len(compact.coups)
+        print(f"Objets Python :       {memoire / 2 ** 20:8.1f} Mio ({memoire / nb_coups:.0f} octets par mouvement)")
+        print(f"Fichier compact :     {taille / 2 ** 20:8.1f} Mio ({taille / nb_coups:.0f} octets par mouvement)")
+
+        debut = time.perf_counter()
+        compact = tc.TrieCompact.ouvrir(chemin)
+        print(f"Ouverture (mmap) :    {(time.perf_counter() - debut) * 1000:8.3f} ms")
+
+        alea = random.Random(103)
+        requetes = [partie[:alea.randrange(1, args.longueur)] for partie in alea.choices(parties, k=args.recherches)]
+        debut = time.perf_counter()
+        for requete in requetes:
+            compact.cherche(requete)
+        duree = time.perf_counter() - debut
+        print(f"Recherches :          {args.recherches / duree:8,.0f} /s")
+        assert compact.hash() == racine.hash()
+        compact.fermer()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Banc d'essai de la verification parallele de la blockchain.
+
+On scelle une chaine dans un journal, puis on la verifie avec un nombre croissant de processus et on affiche
+l'acceleration obtenue par rapport a un seul processus.
+
+Utilisation ::
+
+    python -m benchmarks.bench_verify --blocs 20000 --processus 1 2 4 8
+"""
+import argparse
+import tempfile
+import time
+
+import ti103_chess.blockchain as bc
+from benchmarks.bench_patricia_trie import parties_synthetiques
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--blocs', type=int, default=20000)
+    parser.add_argument('--parties', type=int, default=5, help="Parties par bloc")
+    parser.add_argument('--processus', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chaine = bc.BlockChain.ouvre(dossier, intervalle_fsync=60)
+        parties = parties_synthetiques(args.blocs * args.parties, 40)
+        for _ in range(args.blocs):
+            for _ in range(args.parties):
+                chaine.head().transactions.extend(next(parties))
+            chaine.new()
+        chaine.journal.synchronise()
+
+        reference = None
+        for processus in args.processus:
+            debut = time.perf_counter()
+            resultat = chaine.verify(processus=processus)
+            duree = time.perf_counter() - debut
+            reference = reference or duree
+            print(f"{processus} processus : {duree:7.2f} s, acceleration {reference / duree:4.1f} x "
+                  f"({'intacte' if resultat is None else f'bloc {resultat} corrompu'})")
+        chaine.journal.ferme()
+
+
+if __name__ == '__main__':
+    main()
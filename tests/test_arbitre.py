@@ -0,0 +1,100 @@
+"""Tests de l'arbitre du serveur."""
+import random
+import time
+
+import chess
+import pytest
+
+import ti103_chess.arbitre as arbitre
+
+
+def test_ar01():
+    """
+    Cas de test Arbitre 01
+
+    Valider le refus des mouvements illegaux.
+
+    On joue une ouverture dans une partie, puis on propose un mouvement illegal, un mouvement hors de son tour et un
+    mouvement d'une partie inconnue, puis un mouvement au mauvais demi-coup.
+    On verifie que seuls les mouvements legaux sont enregistres.
+    """
+    juge = arbitre.Arbitre()
+    juge.nouvelle('1')
+    assert juge.joue('1', 'e2e4', 'Blanc') == 1
+    assert juge.joue('1', 'e7e5', 'Noir') == 2
+
+    with pytest.raises(arbitre.MouvementIllegal):
+        juge.joue('1', 'e4e5')
+    with pytest.raises(arbitre.MouvementIllegal):
+        juge.joue('1', 'd7d5', 'Noir')
+    with pytest.raises(arbitre.MouvementIllegal):
+        juge.joue('1', 'g1f3', 'Spectateur')
+    with pytest.raises(KeyError):
+        juge.joue('2', 'e2e4')
+    with pytest.raises(arbitre.Desynchronisation):
+        juge.joue('1', 'g1f3', 'Blanc', ply=5)
+
+    assert juge.coups('1') == ['e2e4', 'e7e5']
+    assert juge.termine('1') == ['e2e4', 'e7e5'] and '1' not in juge
+
+
+def test_ar02():
+    """
+    Cas de test Arbitre 02
+
+    Valider l'eviction et la reconstruction des echiquiers.
+
+    On joue des parties aleatoires en alternance avec un cache plus petit que le nombre de parties.
+    On verifie que les positions de reference restent celles d'un chess.Board qui a joue chaque partie.
+    """
+    generateur = random.Random(103)
+    juge = arbitre.Arbitre(capacite=3)
+    temoins = {}
+    for partie in map(str, range(10)):
+        juge.nouvelle(partie)
+        temoins[partie] = chess.Board()
+
+    for _ in range(20):
+        for partie, temoin in temoins.items():
+            if temoin.is_game_over():
+                continue
+            mouvement = generateur.choice(list(temoin.legal_moves))
+            juge.joue(partie, mouvement.uci())
+            temoin.push(mouvement)
+
+    assert juge.evictions > 0 and juge.reconstructions > 0
+    for partie, temoin in temoins.items():
+        assert juge.fen(partie) == temoin.fen()
+        assert juge.coups(partie) == [m.uci() for m in temoin.move_stack]
+
+
+def test_ar03():
+    """
+    Cas de test Arbitre 03
+
+    Valider le rattrapage des mouvements et l'abandon des parties.
+
+    On joue quelques mouvements, puis on demande ceux qui suivent un demi-coup, valide ou non. On abandonne ensuite
+    des parties.
+    On verifie que les demi-coups hors de la partie sont refuses, qu'une partie abandonnee est gardee jusqu'au delai,
+    et qu'elle l'est toujours si elle est reprise.
+    """
+    juge = arbitre.Arbitre(delai_abandon=0.05)
+    juge.nouvelle('1')
+    for uci in ('e2e4', 'e7e5', 'g1f3'):
+        juge.joue('1', uci)
+    assert juge.coups_depuis('1', 1) == ['e7e5', 'g1f3']
+    assert juge.coups_depuis('1', 3) == []
+    for ply in (-1, 4, '1', None, True):
+        with pytest.raises(ValueError):
+            juge.coups_depuis('1', ply)
+
+    juge.nouvelle('2')
+    juge.abandonne('1')
+    juge.abandonne('2')
+    juge.reprend('2')
+    assert '1' in juge
+    time.sleep(0.1)
+    juge.nouvelle('3')
+    juge.abandonne('3')
+    assert '1' not in juge and '2' in juge and '3' in juge
@@ -0,0 +1,88 @@
+"""Tests du generateur de mouvements en bitboards."""
+import random
+
+import chess
+
+import ti103_chess.bitboard as bitboard
+import ti103_chess.moves as moves
+import ti103_chess.recherche as recherche
+
+
+# Positions de reference et leurs nombres de suites de mouvements legaux, par profondeur
+PERFT = {
+    chess.STARTING_FEN: [20, 400, 8902],
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1": [48, 2039, 97862],
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1": [14, 191, 2812],
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1": [6, 264, 9467],
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8": [44, 1486],
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10": [46, 2079],
+}
+
+
+def perft(board, profondeur):
+    """
+    Compte les suites de mouvements legaux avec chess.Board, pour comparer.
+    """
+    if profondeur == 1:
+        return board.legal_moves.count()
+    total = 0
+    for mouvement in board.legal_moves:
+        board.push(mouvement)
+        total += perft(board, profondeur - 1)
+        board.pop()
+    return total
+
+
+def test_bb01():
+    """
+    Cas de test Bitboard 01
+
+    Valider le nombre de suites de mouvements legaux (perft) depuis des positions de reference.
+
+    On compte les suites de mouvements de chaque profondeur depuis la position de depart, Kiwipete et d'autres
+    positions connues pour leurs roques, prises en passant, promotions et clouages.
+    On verifie les nombres connus, ceux de chess.Board a la profondeur 2, et que la position est rendue intacte.
+    """
+    for fen, nombres in PERFT.items():
+        position = bitboard.Position(fen)
+        assert position.fen() == chess.Board(fen).fen()
+        assert [bitboard.perft(position, p) for p in range(1, len(nombres) + 1)] == nombres
+        assert bitboard.perft(position, 2) == perft(chess.Board(fen), 2)
+        assert position.fen() == chess.Board(fen).fen() and not position._pile
+
+
+def test_bb02():
+    """
+    Cas de test Bitboard 02
+
+    Valider les mouvements legaux, joues et annules, sur des parties aleatoires.
+
+    On joue des parties aleatoires sur une position en bitboards et sur un chess.Board, puis on les annule.
+    On verifie a chaque demi-coup les mouvements legaux, la FEN, la verification d'un seul mouvement et l'echec, et
+    que deux positions ont la meme cle de Zobrist si et seulement si leurs FEN sans les compteurs sont les memes.
+    On verifie aussi que la cle tenue a jour par joue et annule est celle du moteur de recherche pour le chess.Board.
+    """
+    generateur = random.Random(103)
+    cles = {}
+    tous = [moves.encode(uci) for uci in ('e2e4', 'e1g1', 'e7e8q', 'a7a8n', 'b1c3', 'd5e6', 'h7h5', 'e8c8')]
+    for _ in range(30):
+        position, board = bitboard.Position(), chess.Board()
+        fens = []
+        while not board.is_game_over() and len(board.move_stack) < 150:
+            legaux = position.mouvements()
+            assert sorted(moves.decode(c) for c in legaux) == sorted(m.uci() for m in board.legal_moves)
+            assert position.fen() == board.fen() and position.echec() == board.is_check()
+            for code in tous + generateur.sample(legaux, min(3, len(legaux))):
+                assert position.est_legal(code) == board.is_legal(chess.Move.from_uci(moves.decode(code)))
+            fens.append(position.fen())
+            assert cles.setdefault(' '.join(position.fen().split()[:4]), position.cle()) == position.cle()
+            assert position.cle() == recherche.cle(board)
+            mouvement = generateur.choice(list(board.legal_moves))
+            position.joue(bitboard.code(mouvement))
+            board.push(mouvement)
+        assert position.fen() == board.fen()
+        while fens:
+            position.annule()
+            assert position.fen() == fens.pop()
+            assert position.cle() == cles[' '.join(position.fen().split()[:4])]
+    assert len(set(cles.values())) == len(cles)
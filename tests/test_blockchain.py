@@ -0,0 +1,162 @@
+"""Tests de la blockchain."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import ti103_chess.blockchain as bc
+import ti103_chess.storage as storage
+
+
+SIGNATURE = """
+import ti103_chess.blockchain as bc
+bloc = bc.Block(7, bytes(32))
+bloc.time = 1617667200.5
+bloc.transactions.add('e2e4').add('e7e5')
+bloc.transactions.add('d2d4')
+print(bloc.hash().hex())
+"""
+
+
+def test_bc01():
+    """
+    Cas de test Blockchain 01
+
+    Valider que la signature d'un bloc ne depend pas du processus qui la calcule.
+
+    On calcule la signature d'un meme bloc dans deux processus avec des PYTHONHASHSEED differents.
+    On verifie que les deux signatures sont identiques.
+    """
+    signatures = set()
+    for graine in ('1', '2'):
+        env = dict(os.environ, PYTHONHASHSEED=graine)
+        sortie = subprocess.run([sys.executable, '-c', SIGNATURE], env=env, check=True, capture_output=True, text=True)
+        signatures.add(sortie.stdout)
+
+    assert len(signatures) == 1
+
+
+def test_bc02():
+    """
+    Cas de test Blockchain 02
+
+    Valider le chainage des blocs.
+
+    On cree une chaine et on ajoute un bloc.
+    On verifie que le nouveau bloc retient la signature du precedent.
+    On modifie les transactions du premier bloc et on verifie que sa signature ne correspond plus.
+    """
+    chaine = bc.BlockChain()
+    chaine.new()
+    assert chaine.head().previous_hash == chaine.chain[0].hash()
+
+    chaine.chain[0].transactions.add('e2e4')
+    assert chaine.head().previous_hash != chaine.chain[0].hash()
+
+
+def test_bc03(tmp_path):
+    """
+    Cas de test Blockchain 03
+
+    Valider l'enregistrement d'une chaine sur le disque et sa relecture.
+
+    On cree une chaine dans un dossier, on enregistre des parties et on scelle plusieurs blocs.
+    On rouvre la chaine depuis le dossier.
+    On verifie que les blocs relus ont les memes signatures et les memes parties.
+    """
+    chaine = bc.BlockChain.ouvre(tmp_path, intervalle_fsync=60, taille_segment=512)
+    for i in range(5):
+        chaine.head().transactions.add('e2e4').add('e7e5' if i % 2 else 'c7c5')
+        chaine.new()
+    signatures = [bloc.hash() for bloc in chaine.chain[:-1]]
+    chaine.journal.ferme()
+
+    relue = bc.BlockChain.ouvre(tmp_path)
+    assert [bloc.hash() for bloc in relue.chain[:-1]] == signatures
+    assert relue.head().index == 6
+    assert relue.head().previous_hash == signatures[-1]
+    assert ['e2e4', 'e7e5'] in relue.chain[1].transactions
+    assert relue.journal.lit(3)[3] == signatures[3]
+    assert len([nom for nom in tmp_path.iterdir() if nom.name.startswith('segment-')]) > 1
+
+
+def test_bc04(tmp_path):
+    """
+    Cas de test Blockchain 04
+
+    Valider la verification parallele d'une chaine.
+
+    On cree une chaine enregistree dans un journal et on verifie qu'elle est intacte.
+    On altere l'horodatage d'un bloc directement dans son segment.
+    On verifie que la verification designe ce bloc.
+    On verifie aussi qu'une chaine en memoire dont un lien est altere est detectee.
+    """
+    chaine = bc.BlockChain.ouvre(tmp_path, intervalle_fsync=60)
+    for i in range(12):
+        chaine.head().transactions.add('e2e4').add('g8f6' if i % 3 else 'e7e5')
+        chaine.new()
+    assert chaine.verify(processus=2) is None
+
+    segment, _, position = storage._INDEX.unpack_from(chaine.journal._index, 7 * storage._INDEX.size)
+    with open(chaine.journal._chemin(segment), 'r+b') as f:
+        f.seek(position + 16)   # Horodatage de l'enregistrement
+        f.write(b'\xff')
+    assert chaine.verify(processus=2) == 7
+
+    memoire = bc.BlockChain()
+    for _ in range(6):
+        memoire.head().transactions.add('d2d4')
+        memoire.new()
+    assert memoire.verify(processus=1) is None
+    memoire.chain[4].previous_hash = bytes(32)
+    assert memoire.verify(processus=2) == 4
+
+
+def test_bc05(tmp_path):
+    """
+    Cas de test Blockchain 05
+
+    Valider une chaine dont les mouvements ne sont pas en UCI.
+
+    On cree une chaine en memoire avec des mouvements comme 'e4', qui n'ont pas de format compact.
+    On verifie qu'elle est verifiee en memoire, et qu'un lien altere est detecte.
+    On verifie qu'une chaine enregistree dans un journal refuse un tel bloc sans changer.
+    """
+    memoire = bc.BlockChain()
+    for mouvement in ('e4', 'e5', 'Cf3'):
+        memoire.head().transactions.add(mouvement)
+        memoire.new()
+    assert memoire.verify(processus=2) is None
+    memoire.chain[2].previous_hash = bytes(32)
+    assert memoire.verify(processus=2) == 2
+
+    chaine = bc.BlockChain.ouvre(tmp_path, intervalle_fsync=60)
+    chaine.head().transactions.add('e2e4')
+    chaine.new()
+    chaine.head().transactions.add('e5')
+    with pytest.raises(ValueError, match="UCI"):
+        chaine.new()
+    assert len(chaine.chain) == 2 and len(chaine.journal) == 1 and chaine.verify() is None
+    chaine.journal.ferme()
+
+
+def test_bc06(tmp_path):
+    """
+    Cas de test Blockchain 06
+
+    Valider la synchronisation du journal sans bloc suivant.
+
+    On scelle un seul bloc dans un journal dont l'intervalle de synchronisation est court, puis on attend le minuteur.
+    On verifie qu'un lecteur du dossier voit le bloc sans que rien d'autre ne soit ajoute ni ferme.
+    """
+    chaine = bc.BlockChain.ouvre(tmp_path, intervalle_fsync=0.2)
+    chaine.head().transactions.add('e2e4')
+    chaine.new()
+    assert len(storage.Journal(tmp_path, lecture_seule=True)) == 0
+
+    chaine.journal._minuterie.join(5)
+    lecteur = storage.Journal(tmp_path, lecture_seule=True)
+    assert len(lecteur) == 1 and lecteur.lit(0)[3] == chaine.chain[0].hash()
+    assert chaine.journal._minuterie is None
+    chaine.journal.ferme()
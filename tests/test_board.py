@@ -0,0 +1,80 @@
+"""Tests de l'echiquier affiche, sans fenetre."""
+import os
+import random
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import chess  # noqa: E402
+import pygame  # noqa: E402
+
+import ti103_chess.board as board  # noqa: E402
+
+
+def verifie(partie):
+    """
+    Verifie que l'index des cases et les pieces affichees correspondent a l'echiquier du moteur.
+    """
+    for case in chess.SQUARES:
+        piece, attendue = partie.cases[case], partie.moteur.piece_at(case)
+        if attendue is None:
+            assert piece is None, chess.square_name(case)
+        else:
+            assert (piece.nom, piece.couleur) == (board.noms_pieces[attendue.piece_type],
+                                                  "Blanc" if attendue.color else "Noir"), chess.square_name(case)
+            assert piece.case() == chess.square_name(case)
+            assert piece.image is partie.images[(piece.nom, piece.couleur)]
+
+
+def test_bd01():
+    """
+    Cas de test Board 01
+
+    Valider l'index des pieces par case sur des parties aleatoires.
+
+    On rejoue mille parties aleatoires legales, avec des prises, des roques, des prises en passant et des
+    promotions, sur l'echiquier affiche et sur un chess.Board.
+    On verifie a la fin de chaque partie que le moteur et l'index des cases correspondent a l'echiquier de reference.
+    """
+    generateur = random.Random(103)
+    partie = board.nouvelle_partie('test')
+    speciaux = {'roque': 0, 'en passant': 0, 'promotion': 0}
+    for _ in range(1000):
+        partie.synchronise(chess.STARTING_FEN)
+        reference = chess.Board()
+        while len(reference.move_stack) < 100:
+            legaux = list(reference.legal_moves)
+            if not legaux:
+                break
+            mouvement = generateur.choice(legaux)
+            speciaux['roque'] += reference.is_castling(mouvement)
+            speciaux['en passant'] += reference.is_en_passant(mouvement)
+            speciaux['promotion'] += mouvement.promotion is not None
+            partie.deplace(mouvement.uci())
+            reference.push(mouvement)
+        assert partie.moteur.fen() == partie.position.fen() == reference.fen()
+        verifie(partie)
+        partie.sales = []
+    assert all(speciaux.values()), speciaux
+
+
+def test_bd02():
+    """
+    Cas de test Board 02
+
+    Valider le cache des images de l'echiquier et des pieces.
+
+    On cree deux parties, puis un echiquier a partir de l'image des pieces chargee a part.
+    On verifie que les deux parties partagent leurs images, et que celles-ci sont identiques a celles decoupees a part.
+    """
+    partie, autre = board.nouvelle_partie('test'), board.nouvelle_partie('autre')
+    assert partie.echiquier is autre.echiquier
+    assert all(partie.images[cle] is autre.images[cle] for cle in partie.images)
+    assert partie.cases[chess.E1].image is autre.cases[chess.E1].image is board.sprite('Roi', 'Blanc')
+
+    chemin = os.path.join(os.path.dirname(board.__file__), 'ressources', 'img.png')
+    separe = board.Echiquier(partie.ecran, None, pygame.image.load(chemin).convert())
+    for cle, image in separe.images.items():
+        assert image is not partie.images[cle]
+        assert pygame.image.tostring(image, 'RGB') == pygame.image.tostring(partie.images[cle], 'RGB')
+    assert board.sprite('Pion', 'Noir', 40).get_size() == (40, 40)
+    assert board.fond(40).get_size() == (320, 320)
@@ -0,0 +1,191 @@
+"""Tests de la boucle du client, sans fenetre."""
+import os
+import threading
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+
+import ti103_chess.arbitre as arbitre  # noqa: E402
+import ti103_chess.board as board  # noqa: E402
+import ti103_chess.boucle as boucle  # noqa: E402
+
+
+def clic(depart, arrivee):
+    """
+    Depose dans la file de pygame le glisser-deposer d'une piece, d'une case a une autre.
+    """
+    for genre, case in ((pygame.MOUSEBUTTONDOWN, depart), (pygame.MOUSEBUTTONUP, arrivee)):
+        x, y = board.coordonnees(case)
+        pygame.event.post(pygame.event.Event(genre, button=1, pos=(x + 42, y + 42)))
+
+
+def test_bo01():
+    """
+    Cas de test Boucle 01
+
+    Valider les messages du serveur, deposes depuis un autre fil.
+
+    On depose un mouvement depuis un autre fil, puis un lot qui le contient deja, un mouvement apres un trou, et des
+    positions avec et sans les mouvements de la partie.
+    On verifie que rien n'est joue avant l'image suivante, qu'un mouvement deja connu n'est pas rejoue, que les
+    mouvements manques sont demandes au serveur, et que le demi-coup est garde quand les mouvements sont donnes.
+    """
+    partie = board.nouvelle_partie('test')
+    demandes = []
+    execution = boucle.Boucle(partie, 'Noir', lambda ply, mouvement: None, resynchronise=demandes.append)
+
+    fil = threading.Thread(target=execution.recoit_coup, args=(1, 'e2e4'))
+    fil.start()
+    fil.join()
+    assert partie.moteur.move_stack == []
+    execution.etape()
+    assert execution.ply == 1
+
+    execution.recoit_lot(1, ['e2e4', 'e7e5', 'g1f3'])
+    execution.recoit_coup(5, 'f1c4')   # Un mouvement manque avant : il est ignore, et demande au serveur
+    execution.etape()
+    assert [m.uci() for m in partie.moteur.move_stack] == ['e2e4', 'e7e5', 'g1f3'] and demandes == [3]
+
+    coups = ['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1c4']
+    execution.recoit_position('r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3', coups)
+    execution.etape()
+    assert execution.ply == 5 and [m.uci() for m in partie.moteur.move_stack] == coups
+    assert partie.position.fen() == partie.moteur.fen()
+
+    execution.recoit_position('8/8/8/4k3/8/8/8/4K3 w - - 0 1')
+    execution.etape()
+    assert execution.ply == 0 and len(partie.pieces) == 2
+
+
+def test_bo02():
+    """
+    Cas de test Boucle 02
+
+    Valider l'envoi des mouvements du joueur.
+
+    On deplace une piece noire puis une piece blanche a la souris, avec les Blancs, et on fait une image.
+    On verifie que seul le mouvement legal du joueur est joue et envoye, avec son demi-coup, dans la meme image.
+    """
+    partie = board.nouvelle_partie('test')
+    envois = []
+    execution = boucle.Boucle(partie, 'Blanc', lambda ply, mouvement: envois.append((ply, mouvement)))
+    pygame.event.clear()
+    clic('e7', 'e5')
+    clic('g1', 'f3')
+    assert execution.etape()
+    assert envois == [(1, 'g1f3')]
+    assert partie.moteur.move_stack[-1].uci() == 'g1f3'
+
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+    assert not execution.etape()
+
+
+def test_bo03():
+    """
+    Cas de test Boucle 03
+
+    Valider le rendu des seules cases modifiees.
+
+    On affiche un echiquier, puis on fait des images sans changement, et une image apres un mouvement.
+    On verifie que les images sans changement ne dessinent rien, et que la piece est dessinee sur sa case d'arrivee.
+    """
+    partie = board.nouvelle_partie('test')
+    assert partie.update_screen()
+    assert not partie.update_screen()
+
+    cavalier = partie.ecran.get_at((85 * 6 + 42, 85 * 7 + 42))
+    partie.deplace('g1f3')
+    assert len(partie.sales) == 2
+    assert partie.update_screen() and not partie.update_screen()
+    assert partie.ecran.get_at((85 * 5 + 42, 85 * 5 + 42)) == cavalier
+    assert partie.ecran.get_at((85 * 6 + 42, 85 * 7 + 42)) == partie.echiquier.get_at((85 * 6 + 42, 85 * 7 + 42))
+
+
+def test_bo04():
+    """
+    Cas de test Boucle 04
+
+    Valider l'ordinateur qui joue a la place du joueur.
+
+    Les Blancs sont joues par l'ordinateur : on fait des images jusqu'a ce qu'il ait joue.
+    On verifie que son mouvement est joue et envoye, et qu'il ne joue pas quand ce n'est pas a lui.
+    """
+    partie = board.nouvelle_partie('test')
+    envois = []
+    execution = boucle.Boucle(partie, 'Blanc', lambda ply, mouvement: envois.append((ply, mouvement)),
+                              ordinateur=lambda position: 'e2e4')
+    for _ in range(100):
+        execution.etape()
+        if envois:
+            break
+        time.sleep(0.01)
+    assert envois == [(1, 'e2e4')] and execution.ply == 1
+    for _ in range(5):
+        execution.etape()
+    assert envois == [(1, 'e2e4')]
+
+
+def test_bo05():
+    """
+    Cas de test Boucle 05
+
+    Valider la resynchronisation d'un client apres un mouvement refuse par l'arbitre du serveur.
+
+    Le client a manque un mouvement de l'adversaire : son mouvement suivant est refuse. Il recoit la position de
+    reference avec les mouvements de la partie, comme dans le refus du serveur, puis rejoue.
+    On verifie que son mouvement suivant porte le bon demi-coup et qu'il est accepte.
+    """
+    juge = arbitre.Arbitre()
+    juge.nouvelle('1')
+    for ply, mouvement in enumerate(('e2e4', 'e7e5', 'g1f3', 'b8c6'), 1):
+        juge.joue('1', mouvement, ply=ply)
+
+    partie = board.nouvelle_partie('test')
+    envois = []
+    execution = boucle.Boucle(partie, 'Blanc', lambda ply, mouvement: envois.append((ply, mouvement)),
+                              ordinateur=lambda position: 'f1c4')
+    execution.recoit_lot(1, ['e2e4', 'e7e5', 'g1f3'])   # Le client n'a pas recu 'b8c6'
+    execution.etape()
+    with pytest.raises(arbitre.Desynchronisation):
+        juge.joue('1', 'd2d4', 'Blanc', ply=4)
+
+    execution.recoit_position(juge.fen('1'), juge.coups('1'))
+    for _ in range(100):
+        execution.etape()
+        if envois:
+            break
+        time.sleep(0.01)
+    assert envois == [(5, 'f1c4')]
+    assert juge.joue('1', 'f1c4', 'Blanc', ply=5) == 5
+
+
+def test_bo06():
+    """
+    Cas de test Boucle 06
+
+    Valider la resynchronisation d'un client dont l'echiquier ne suit plus la partie du serveur.
+
+    L'echiquier du client a joue d'autres mouvements que ceux de la partie du serveur, puis recoit un mouvement qui y
+    est illegal, et enfin toute la partie du serveur.
+    On verifie que le mouvement illegal n'est pas joue mais leve une erreur, que toute la partie est alors demandee au
+    serveur, et qu'elle remplace celle de l'echiquier.
+    """
+    partie = board.nouvelle_partie('test')
+    with pytest.raises(ValueError):
+        partie.deplace('e2e5')
+
+    demandes = []
+    execution = boucle.Boucle(partie, 'Noir', lambda ply, mouvement: None, resynchronise=demandes.append)
+    execution.recoit_lot(1, ['e2e4', 'e7e5'])
+    execution.recoit_coup(3, 'd4e5')   # La partie du serveur est d2d4 e7e5 d4e5
+    execution.etape()
+    assert [m.uci() for m in partie.moteur.move_stack] == ['e2e4', 'e7e5'] and demandes == [0]
+
+    execution.recoit_lot(1, ['d2d4', 'e7e5', 'd4e5'])
+    execution.recoit_coup(1, 'd2d4')   # Deja connu : il ne change rien
+    execution.etape()
+    assert execution.ply == 3 and [m.uci() for m in partie.moteur.move_stack] == ['d2d4', 'e7e5', 'd4e5']
+    assert partie.position.fen() == partie.moteur.fen()
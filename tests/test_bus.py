@@ -0,0 +1,103 @@
+"""Tests du bus de messages entre processus."""
+import multiprocessing
+import threading
+import time
+from multiprocessing.connection import Client
+
+import pytest
+
+import ti103_chess.bus as bus
+
+
+def attend(evenement):
+    assert evenement.wait(5), "Message non recu"
+
+
+def test_bu01():
+    """
+    Cas de test Bus 01
+
+    Valider le choix du processus proprietaire d'une partie.
+
+    On repartit des parties entre quatre processus.
+    On verifie que le choix est stable et que chaque processus recoit des parties.
+    """
+    rangs = [bus.proprietaire(str(k), 4) for k in range(1000)]
+    assert rangs == [bus.proprietaire(str(k), 4) for k in range(1000)]
+    assert all(150 < rangs.count(rang) < 350 for rang in range(4))
+    assert bus.proprietaire('partie', 1) == 0
+
+
+def test_bu02():
+    """
+    Cas de test Bus 02
+
+    Valider la publication et l'abonnement, dans un processus et par un courtier.
+
+    On abonne des fonctions a des canaux, puis on publie.
+    On verifie que seuls les abonnes du canal recoivent le message, et plus apres leur desabonnement.
+    """
+    local = bus.BusLocal()
+    recus = []
+    local.abonne('salle/1', recus.append)
+    local.publie('salle/1', b'a')
+    local.publie('salle/2', b'b')
+    local.desabonne('salle/1')
+    local.publie('salle/1', b'c')
+    assert recus == [b'a']
+
+    courtier = bus.Courtier(('127.0.0.1', 0))
+    un = bus.ouvre('tcp://%s:%d' % courtier.adresse, courtier.authkey)
+    deux = bus.ouvre('tcp://%s:%d' % courtier.adresse, courtier.authkey)
+    recus = []
+    recu = threading.Event()
+
+    def rappel(message):
+        recus.append(message)
+        recu.set()
+
+    deux.abonne('salle/1', rappel)
+    un.abonne('salle/2', rappel)
+    un.publie('salle/1', b'x')
+    attend(recu)
+    assert recus == [b'x']
+    for b in (un, deux):
+        b.ferme()
+    courtier.ferme()
+
+
+def test_bu03():
+    """
+    Cas de test Bus 03
+
+    Valider l'authentification du courtier et le retrait des abonnes deconnectes.
+
+    On se connecte au courtier avec une mauvaise cle, puis un abonne se deconnecte sans se desabonner, et on publie
+    sur son canal.
+    On verifie que la connexion sans la cle est refusee, que deux courtiers n'ont pas la meme cle, que l'abonne
+    deconnecte est retire et que le processus qui publie reste connecte.
+    """
+    courtier = bus.Courtier(('127.0.0.1', 0))
+    assert courtier.authkey != bus.Courtier(('127.0.0.1', 0)).authkey
+    with pytest.raises(multiprocessing.AuthenticationError):
+        Client(courtier.adresse, authkey=b'ti103')
+    with pytest.raises(ValueError):
+        bus.ouvre('tcp://%s:%d' % courtier.adresse)
+
+    editeur = bus.ouvre('tcp://%s:%d' % courtier.adresse, courtier.authkey)
+    mort = Client(courtier.adresse, authkey=courtier.authkey)
+    mort.send(('abonne', 'salle/1'))
+    assert mort.recv() == (None, 'salle/1')
+    mort.close()
+
+    fidele = bus.ouvre('tcp://%s:%d' % courtier.adresse, courtier.authkey)
+    recu = threading.Event()
+    fidele.abonne('salle/1', lambda message: recu.set())
+    for _ in range(3):
+        editeur.publie('salle/1', b'x')
+        time.sleep(0.05)
+    attend(recu)
+    assert len(courtier._abonnes['salle/1']) == 1 and len(courtier._verrous) == 2
+    for b in (editeur, fidele):
+        b.ferme()
+    courtier.ferme()
@@ -0,0 +1,82 @@
+"""Tests de l'explorateur d'ouvertures."""
+import asyncio
+import json
+
+import ti103_chess.explorateur as explorateur
+import ti103_chess.protocole as protocole
+import ti103_chess.server_asgi as server_asgi
+
+
+PARTIES = [
+    (['e2e4', 'e7e5', 'g1f3', 'b8c6'], '1-0'),
+    (['e2e4', 'e7e5', 'g1f3', 'b8c6'], '1/2-1/2'),
+    (['e2e4', 'e7e5', 'g1f3'], '0-1'),          # Se termine au milieu de l'arete des deux premieres
+    (['e2e4', 'c7c5'], '0-1'),
+    (['d2d4', 'd7d5', 'c2c4'], '*'),
+]
+
+
+def test_ex01():
+    """
+    Cas de test Explorateur 01
+
+    Valider les reponses de l'explorateur d'ouvertures.
+
+    On enregistre quelques parties avec leur resultat, dont une qui s'arrete au milieu d'une autre.
+    On verifie les statistiques de la position de depart, d'une position au milieu d'une arete, les mouvements
+    suivants du plus joue au moins joue, la limite, et la reponse pour une suite qu'aucune partie n'a jouee.
+    """
+    ouvertures = explorateur.Explorateur()
+    for mouvements, resultat in PARTIES:
+        ouvertures.ajoute(mouvements, resultat)
+
+    reponse = ouvertures.reponse([])
+    assert (reponse["parties"], reponse["blancs"], reponse["nulles"], reponse["noirs"], reponse["inconnues"]) == \
+        (5, 1, 1, 2, 1)
+    assert [(s["mouvement"], s["parties"]) for s in reponse["suivants"]] == [('e2e4', 4), ('d2d4', 1)]
+
+    reponse = ouvertures.reponse(['e2e4', 'e7e5', 'g1f3'])
+    assert reponse["parties"] == 3 and reponse["noirs"] == 1
+    assert reponse["suivants"] == [{"mouvement": 'b8c6', "parties": 2, "blancs": 1, "nulles": 1, "noirs": 0,
+                                    "inconnues": 0}]
+
+    assert [m for m, _ in ouvertures.suivants(['e2e4'])] == ['e7e5', 'c7c5']
+    assert len(ouvertures.reponse(['e2e4'], limite=1)["suivants"]) == 1
+    assert ouvertures.reponse(['h2h4']) == {"coups": ['h2h4'], "parties": 0, "blancs": 0, "nulles": 0, "noirs": 0,
+                                            "inconnues": 0, "suivants": []}
+
+
+def test_ex02():
+    """
+    Cas de test Explorateur 02
+
+    Valider l'evenement 'explore' du serveur.
+
+    On cree le serveur asyncio avec un explorateur, puis on appelle le gestionnaire de l'evenement, sans reseau,
+    pour une suite de mouvements donnee, pour une FEN et pour la partie de la salle du client.
+    On verifie que les reponses JSON sont celles de l'explorateur, et l'erreur pour une FEN invalide.
+    """
+    ouvertures = explorateur.Explorateur()
+    for mouvements, resultat in PARTIES:
+        ouvertures.ajoute(mouvements, resultat)
+    application = server_asgi.cree_application(ouvertures=ouvertures)
+    gestionnaires = application.sio.handlers['/']
+
+    async def scenario():
+        reponse = await gestionnaires['explore']('a', json.dumps({"coups": ['e2e4'], "limite": 1}))
+        assert json.loads(reponse) == ouvertures.reponse(['e2e4'], limite=1)
+        fen = 'rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2'
+        reponse = await gestionnaires['explore']('a', json.dumps({"fen": fen}))
+        assert json.loads(reponse) == ouvertures.reponse_position(fen) and json.loads(reponse)["noirs"] == 1
+        reponse = await gestionnaires['explore']('a', json.dumps({"fen": 'e2e4'}))
+        assert "erreur" in json.loads(reponse)
+
+        # Sans suite de mouvements, ceux de la partie de la salle du client. Le client n'est pas vraiment connecte :
+        # il n'entre pas dans la room socket.io de sa salle.
+        application.sio.enter_room = lambda *args: asyncio.sleep(0)
+        await gestionnaires['create']('a', json.dumps({"salle": "1"}))
+        await gestionnaires['connected']('a', protocole.encode("1", 1, 'e2e4'))
+        reponse = await gestionnaires['explore']('a', '')
+        assert json.loads(reponse) == ouvertures.reponse(['e2e4'])
+
+    asyncio.run(scenario())
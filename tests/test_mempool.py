@@ -0,0 +1,98 @@
+"""Tests de la mempool."""
+import threading
+
+import pytest
+
+import ti103_chess.blockchain as bc
+import ti103_chess.mempool as mp
+
+
+def test_mp01():
+    """
+    Cas de test Mempool 01
+
+    Valider le scellage d'un bloc quand le lot est plein.
+
+    On depose exactement taille_max parties, avec leur resultat.
+    On verifie qu'un bloc a ete scelle avec ces parties et leurs resultats, sans attendre le delai.
+    """
+    chaine = bc.BlockChain()
+    mempool = mp.Mempool(chaine, taille_max=3, delai_max=60)
+    for partie, resultat in ((['e2e4', 'e7e5'], '1-0'), (['d2d4'], '*'), (['e2e4', 'c7c5'], '0-1')):
+        mempool.soumet(partie, resultat)
+
+    assert mempool.attend(5)
+    assert mempool.metriques()['scellees'] == 3
+    assert len(chaine.chain) == 2
+    scelle = chaine.chain[0].transactions
+    assert scelle.get('e2e4').get('e7e5') is not None and 'c7c5' in scelle.get('e2e4') and 'd2d4' in scelle
+    assert scelle.get('e2e4').statistiques() == (1, 0, 1, 0) and scelle.statistiques().parties == 3
+    mempool.ferme()
+
+
+def test_mp02():
+    """
+    Cas de test Mempool 02
+
+    Valider le scellage au bout du delai et les depots concurrents.
+
+    On depose des parties depuis plusieurs fils.
+    On verifie que toutes sont scellees, par lots, et que la derniere l'est par le delai.
+    """
+    chaine = bc.BlockChain()
+    mempool = mp.Mempool(chaine, taille_max=50, delai_max=0.05)
+
+    def joue(n):
+        for i in range(30):
+            mempool.soumet(['e2e4', f'{"abcdefgh"[n]}7{"abcdefgh"[n]}{6 - i % 2}'])
+
+    fils = [threading.Thread(target=joue, args=(n,)) for n in range(8)]
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+
+    assert mempool.attend(5)
+    metriques = mempool.metriques()
+    assert metriques['scellees'] == 240 and metriques['en_attente'] == 0
+    assert metriques['blocs'] == len(chaine.chain) - 1 >= 5
+    mempool.ferme()
+    assert chaine.verify(processus=1) is None
+
+
+def test_mp03(tmp_path):
+    """
+    Cas de test Mempool 03
+
+    Valider les parties refusees au depot et un bloc qui ne peut pas etre scelle.
+
+    On depose une partie dont un mouvement n'est pas en UCI et une partie au resultat inconnu, puis une partie valide
+    dans une chaine dont le journal refuse d'ecrire, et une autre une fois le journal retabli.
+    On verifie que les deux premieres sont refusees a l'appelant, que l'erreur de scellage est comptee, et que la
+    partie reportee est scellee avec la suivante.
+    """
+    chaine = bc.BlockChain.ouvre(tmp_path, intervalle_fsync=60)
+    mempool = mp.Mempool(chaine, taille_max=1, delai_max=60)
+    with pytest.raises(ValueError):
+        mempool.soumet(['e4', 'e5'], '1-0')
+    with pytest.raises(ValueError):
+        mempool.soumet(['e2e4'], 'gagne')
+    assert mempool.metriques()['recues'] == 0
+
+    chaine.journal.lecture_seule = True
+    mempool.soumet(['e2e4', 'e7e5'], '1-0')
+    assert mempool.attend(5)
+    metriques = mempool.metriques()
+    assert metriques['erreurs'] == 1 and metriques['reportees'] == 1 and len(chaine.chain) == 1
+    assert isinstance(metriques['derniere_erreur'], ValueError)
+
+    chaine.journal.lecture_seule = False
+    mempool.soumet(['d2d4'], '0-1')
+    assert mempool.attend(5)
+    metriques = mempool.metriques()
+    assert metriques['scellees'] == 2 and metriques['reportees'] == 0 and metriques['blocs'] == 1
+    scelle = chaine.chain[0].transactions
+    assert scelle.get('e2e4').get('e7e5') is not None and 'd2d4' in scelle and len(chaine.journal) == 1
+    assert chaine.verify(processus=1) is None
+    mempool.ferme()
+    chaine.journal.ferme()
@@ -1,3 +1,6 @@
+import collections
+import random
+
 import ti103_chess.patricia_trie as pm
 
 
@@ -78,3 +81,125 @@ def test_pm03(capsys):
     racine.dump()
     out, _ = capsys.readouterr()
     assert out == "e5\n"
+
+
+def test_pm04(capsys):
+    """
+    Cas de test Patricia Merkle 04
+
+    Valider que les longues parties ne depassent pas la limite de recursion de Python.
+
+    On enregistre une partie bien plus longue que la limite de recursion.
+    On verifie que dump affiche une seule ligne contenant tous les mouvements.
+    On verifie que la signature se calcule.
+    """
+    racine = pm.PatriciaMerkleTrie('')
+    noeud = racine
+    for i in range(5000):
+        noeud = noeud.add(str(i % 10))
+    racine.dump()
+    out, _ = capsys.readouterr()
+    assert out == "0123456789" * 500 + "\n"
+    assert len(racine.hash()) == 32
+
+
+def test_pm05():
+    """
+    Cas de test Patricia Merkle 05
+
+    Valider que la signature en cache est bien invalidee lors d'un ajout.
+
+    On calcule la signature d'un arbre.
+    On ajoute un mouvement en profondeur.
+    On verifie que la signature a change et qu'elle est identique a celle d'un arbre construit d'un seul coup, dans
+    un autre ordre.
+    """
+    racine = pm.PatriciaMerkleTrie('')
+    feuille = racine.add('e4').add('e5')
+    racine.add('d4')
+    avant = racine.hash()
+
+    feuille.add('Nf3')
+    apres = racine.hash()
+    assert apres != avant
+
+    autre = pm.PatriciaMerkleTrie('')
+    autre.add('e4').add('e5').add('Nf3')
+    autre.add('d4')
+    assert autre.hash() == apres
+
+    inverse = pm.PatriciaMerkleTrie('')
+    inverse.add('d4')
+    inverse.add('e4').add('e5').add('Nf3')
+    assert inverse.hash() == apres
+
+
+def test_pm06(capsys):
+    """
+    Cas de test Patricia Merkle 06
+
+    Valider la compression des suites de mouvements sans embranchement.
+
+    On enregistre une partie, stockee dans une seule arete.
+    On garde une reference vers un mouvement au milieu de la partie.
+    On ajoute une partie qui s'ecarte au milieu : l'arete est coupee.
+    On verifie que les deux parties apparaissent et que la reference est toujours utilisable.
+    """
+    racine = pm.PatriciaMerkleTrie('')
+    e4 = racine.add('e4')
+    nf3 = e4.add('e5').add('Nf3')
+    nf3.add('Nc6')
+    racine.dump()
+    out, _ = capsys.readouterr()
+    assert out == "e4e5Nf3Nc6\n"
+
+    e4.add('c5')
+    racine.dump()
+    out, _ = capsys.readouterr()
+    assert out == "e4e5Nf3Nc6\ne4c5\n"
+
+    assert nf3 == 'Nf3'
+    assert 'Nc6' in nf3
+    nf3.add('d6')
+    racine.dump()
+    out, _ = capsys.readouterr()
+    assert out == "e4e5Nf3Nc6\ne4e5Nf3d6\ne4c5\n"
+    assert len(racine.get('e4')) == 2
+
+
+def test_pm07():
+    """
+    Cas de test Patricia Merkle 07
+
+    Valider les statistiques des resultats tenues dans les noeuds.
+
+    On enregistre des parties aleatoires avec leur resultat, dont certaines sont le debut d'autres parties : les
+    aretes sont coupees et prolongees.
+    On verifie les statistiques de chaque position et de ses mouvements suivants en comptant les parties une a une,
+    et que les signatures n'en dependent pas.
+    """
+    generateur = random.Random(103)
+    mouvements = ['e4', 'd4', 'c4', 'Nf3', 'e5', 'c5', 'e6', 'd5']
+    for _ in range(100):
+        parties = [([generateur.choice(mouvements[:generateur.randint(1, 8)]) for _ in range(generateur.randint(0, 8))],
+                    generateur.choice(pm.RESULTATS)) for _ in range(generateur.randint(1, 30))]
+        parties += [(generateur.choice(parties)[0][:generateur.randint(0, 8)], generateur.choice(pm.RESULTATS))
+                    for _ in range(10)]
+        racine, temoin = pm.PatriciaMerkleTrie(''), pm.PatriciaMerkleTrie('')
+        for partie, resultat in parties:
+            racine.extend(partie, resultat)
+            temoin.extend(partie)
+        assert racine.hash() == temoin.hash()
+
+        def attendues(debut):
+            comptes = collections.Counter(r for p, r in parties if p[:len(debut)] == debut)
+            return tuple(comptes[r] for r in pm.RESULTATS)
+
+        for debut in {tuple(p[:k]) for p, _ in parties for k in range(len(p) + 1)}:
+            position = racine
+            for mouvement in debut:
+                position = position.get(mouvement)
+            assert position.statistiques() == attendues(list(debut))
+            suivants = position.explore()
+            assert {m: s for m, s in suivants} == {m: attendues(list(debut) + [m]) for m in position.children}
+            assert [s.parties for _, s in suivants] == sorted((s.parties for _, s in suivants), reverse=True)
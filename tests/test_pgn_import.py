@@ -0,0 +1,90 @@
+"""Tests de l'importation de fichiers PGN."""
+import gzip
+
+import ti103_chess.pgn_import as pi
+
+
+PGN = """[Event "Partie 1"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 {Un commentaire} Nc6 (2... d6 3. d4) 3. Bb5 1-0
+
+[Event "Partie 2"]
+[Result "0-1"]
+
+1. e4 c5 2. Nf3 0-1
+
+[Event "Partie illegale"]
+[Result "*"]
+
+1. e4 e4 *
+
+[Event "Partie 3"]
+[Result "1/2-1/2"]
+
+1. d4 d5 1/2-1/2
+"""
+
+
+def test_pgn01(tmp_path):
+    """
+    Cas de test PGN 01
+
+    Valider la lecture des parties d'un fichier PGN compresse.
+
+    On verifie que les mouvements sont convertis en UCI, que les variantes sont ignorees et que la partie illegale
+    est ecartee.
+    """
+    chemin = tmp_path / 'parties.pgn.gz'
+    with gzip.open(chemin, 'wt') as f:
+        f.write(PGN)
+
+    assert list(pi.parties(chemin)) == [
+        (['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1b5'], '1-0'),
+        (['e2e4', 'c7c5', 'g1f3'], '0-1'),
+        (['d2d4', 'd7d5'], '1/2-1/2'),
+    ]
+
+
+def test_pgn02(tmp_path, capsys):
+    """
+    Cas de test PGN 02
+
+    Valider que l'importation sur plusieurs processus donne le meme arbre qu'avec un seul, avec les memes
+    statistiques des resultats.
+    """
+    chemin = tmp_path / 'parties.pgn'
+    chemin.write_text(PGN * 5)
+
+    racine, rapport = pi.importe(chemin)
+    assert (rapport.parties, rapport.rejetees, rapport.coups) == (15, 5, 50)
+    racine.dump()
+    attendu, _ = capsys.readouterr()
+    assert attendu == "e2e4e7e5g1f3b8c6f1b5\ne2e4c7c5g1f3\nd2d4d7d5\n"
+
+    parallele, rapport = pi.importe(chemin, processus=2, taille_lot=3)
+    assert (rapport.parties, rapport.rejetees, rapport.coups) == (15, 5, 50)
+    parallele.dump()
+    out, _ = capsys.readouterr()
+    assert out == attendu
+    assert parallele.hash() == racine.hash()
+    for mouvements, statistiques in ([], (5, 5, 5, 0)), (['e2e4'], (5, 0, 5, 0)), (['e2e4', 'c7c5'], (0, 0, 5, 0)):
+        assert racine.extend(mouvements).statistiques() == parallele.extend(mouvements).statistiques() == statistiques
+
+
+def test_pgn03(tmp_path):
+    """
+    Cas de test PGN 03
+
+    Valider le rejet des parties qui ne partent pas de la position initiale.
+
+    On importe une partie jouee depuis une position donnee par ses en-tetes SetUp et FEN, puis une partie normale.
+    On verifie que la premiere est rejetee et que seuls les mouvements de la seconde sont dans l'arbre.
+    """
+    chemin = tmp_path / 'parties.pgn'
+    chemin.write_text('[Event "Finale"]\n[Result "1-0"]\n[SetUp "1"]\n[FEN "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1"]\n\n'
+                      '1. e4 Kd7 1-0\n\n' + PGN.split('\n\n[Event "Partie 2"]')[0] + '\n')
+
+    racine, rapport = pi.importe(chemin)
+    assert (rapport.parties, rapport.rejetees, rapport.coups) == (1, 1, 5)
+    assert racine.statistiques().parties == 1 and 'e8d7' not in racine.get('e2e4')
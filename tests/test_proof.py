@@ -0,0 +1,60 @@
+"""Tests des preuves d'inclusion d'une partie dans un bloc."""
+import pytest
+
+import ti103_chess.blockchain as bc
+import ti103_chess.proof as proof
+
+
+PARTIES = [
+    ['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1b5'],
+    ['e2e4', 'e7e5', 'g1f3', 'g8f6'],
+    ['e2e4', 'c7c5'],
+    ['d2d4', 'd7d5', 'c2c4'],
+    ['e2e4', 'e7e5'],
+]
+
+
+def test_pr01(tmp_path):
+    """
+    Cas de test Preuve 01
+
+    Valider les preuves d'inclusion, sur un bloc en memoire puis relu depuis un journal.
+
+    On enregistre des parties dans un bloc, dont une qui s'arrete au milieu d'une autre, et on le scelle.
+    On verifie que la preuve de chaque partie, encodee puis decodee, est acceptee pour la signature du bloc.
+    """
+    chaine = bc.BlockChain.ouvre(tmp_path, intervalle_fsync=0)
+    for partie in PARTIES:
+        chaine.head().transactions.extend(partie)
+    chaine.new()
+    bloc = chaine.chain[0]
+    relu = bc.BlockChain.ouvre(tmp_path).chain[0]
+
+    for partie in PARTIES + [['e2e4'], ['e2e4', 'e7e5', 'g1f3']]:
+        for source in (bloc, relu):
+            preuve = proof.Preuve.depuis_octets(proof.prouve(source, partie).octets())
+            assert proof.verifie(preuve, bloc.hash())
+            assert preuve.mouvements == partie
+
+
+def test_pr02():
+    """
+    Cas de test Preuve 02
+
+    Valider qu'une preuve alteree ou une partie absente est rejetee.
+    """
+    chaine = bc.BlockChain()
+    for partie in PARTIES:
+        chaine.head().transactions.extend(partie)
+    bloc = chaine.head()
+
+    preuve = proof.prouve(bloc, PARTIES[0])
+    preuve.mouvements[-1] = 'f1c4'
+    assert not proof.verifie(preuve, bloc.hash())
+
+    preuve = proof.prouve(bloc, PARTIES[3])
+    preuve.index += 1
+    assert not proof.verifie(preuve, bloc.hash())
+
+    with pytest.raises(KeyError):
+        proof.prouve(bloc, ['e2e4', 'e7e6'])
@@ -0,0 +1,65 @@
+"""Tests du protocole des mouvements."""
+import json
+
+import pytest
+
+import ti103_chess.protocole as protocole
+
+
+def test_pt01():
+    """
+    Cas de test Protocole 01
+
+    Valider l'aller-retour d'un mouvement en trame binaire.
+
+    On encode des mouvements, dont une promotion, puis on les decode.
+    On verifie la partie, le demi-coup et le mouvement, et la taille de la trame.
+    """
+    for salle, ply, mouvement in (('1', 1, 'e2e4'), ('partie-103', 65535, 'e7e8q'), ('', 42, 'g1f3')):
+        trame = protocole.encode(salle, ply, mouvement)
+        assert isinstance(trame, bytes) and len(trame) == 6 + len(salle)
+        assert protocole.decode(trame) == protocole.Coup(salle, ply, mouvement)
+
+    with pytest.raises(ValueError):
+        protocole.decode(b'\x02' + protocole.encode('1', 1, 'e2e4')[1:])
+    with pytest.raises(ValueError):
+        protocole.decode(protocole.encode('12', 1, 'e2e4')[:-1])
+
+
+def test_pt02():
+    """
+    Cas de test Protocole 02
+
+    Valider le repli sur JSON.
+
+    On decode un message de l'ancien format, avec les coordonnees de la piece, et un message de encode_json.
+    On verifie que les coordonnees sont retirees et que les messages illisibles sont refuses.
+    """
+    ancien = json.dumps({"sid": "abc", "move": "e2e4" + "340340"})
+    assert protocole.decode(ancien) == protocole.Coup(None, None, 'e2e4', 'abc')
+
+    assert protocole.decode(protocole.encode_json('abc', 3, 'e7e8q', '1')) == protocole.Coup('1', 3, 'e7e8q', 'abc')
+
+    for message in ('pas du json', json.dumps({"sid": "abc"}), json.dumps({"move": "z9z9"}),
+                    json.dumps({"move": 5}), json.dumps({"move": None})):
+        with pytest.raises(ValueError):
+            protocole.decode(message)
+
+
+def test_pt03():
+    """
+    Cas de test Protocole 03
+
+    Valider les trames de lot, pour le rattrapage d'un client qui se reconnecte.
+
+    On encode des lots de mouvements, dont un lot vide, puis on les decode.
+    On verifie le premier demi-coup, les mouvements, et la taille de deux octets par mouvement.
+    """
+    mouvements = ['e2e4', 'e7e5', 'g1f3', 'b8c6', 'e7e8q']
+    trame = protocole.encode_lot('7', 12, mouvements)
+    assert len(trame) == 6 + 1 + 2 * len(mouvements)
+    assert protocole.decode_lot(trame) == protocole.Coup('7', 12, mouvements)
+    assert protocole.decode_lot(protocole.encode_lot('7', 1, [])) == protocole.Coup('7', 1, [])
+
+    with pytest.raises(ValueError):
+        protocole.decode_lot(trame[:-1])
@@ -0,0 +1,138 @@
+"""Tests du moteur de recherche de l'ordinateur."""
+import random
+
+import chess
+import pytest
+
+import ti103_chess.recherche as recherche
+
+
+def test_rc01():
+    """
+    Cas de test Recherche 01
+
+    Valider les cles de Zobrist tenues a jour a chaque mouvement.
+
+    On joue des parties aleatoires, avec des prises, des roques, des prises en passant et des promotions.
+    On verifie apres chaque mouvement que la cle tenue a jour est celle de la position, et que les codes des
+    mouvements sont reversibles.
+    """
+    generateur = random.Random(103)
+    for _ in range(100):
+        board = chess.Board()
+        h = recherche.cle(board)
+        while not board.is_game_over() and len(board.move_stack) < 200:
+            move = generateur.choice(list(board.legal_moves))
+            assert recherche.mouvement(recherche.code(move)) == move
+            h = recherche.joue(board, move, h)
+            assert h == recherche.cle(board)
+
+    # La meme position, atteinte dans un autre ordre, a la meme cle
+    a, b = chess.Board(), chess.Board()
+    for uci in ('g1f3', 'g8f6', 'b1c3'):
+        a.push_uci(uci)
+    for uci in ('b1c3', 'g8f6', 'g1f3'):
+        b.push_uci(uci)
+    assert recherche.cle(a) == recherche.cle(b)
+
+
+def test_rc02():
+    """
+    Cas de test Recherche 02
+
+    Valider les mouvements trouves par la recherche, et ses limites.
+
+    On cherche dans des positions de mat en un et en trois, et une position ou la dame adverse est en prise.
+    On verifie le mouvement et le score, puis qu'une recherche limitee en noeuds ou en duree s'arrete a temps.
+    """
+    moteur = recherche.Recherche()
+    resultat = moteur.cherche(chess.Board('6k1/5ppp/8/8/8/8/1Q3PPP/1R4K1 w - - 0 1'), profondeur=4)
+    assert resultat.mouvement == 'b2b8' and resultat.score == recherche.MAT - 1
+
+    resultat = moteur.cherche(chess.Board('r1b1kb1r/pppp1ppp/5q2/4n3/3KP3/2N3PN/PPP4P/R1BQ1B1R b kq - 0 1'),
+                              profondeur=6)
+    assert resultat.mouvement == 'f8c5' and resultat.score == recherche.MAT - 5
+
+    resultat = moteur.cherche(chess.Board('rnb1kbnr/pppp1ppp/8/4p1q1/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3'),
+                              profondeur=3)
+    assert resultat.mouvement == 'f3g5' and resultat.score > 500
+
+    rapports = []
+    resultat = moteur.cherche(chess.Board(), noeuds=3000, rapport=rapports.append)
+    assert resultat.noeuds <= 3001 and resultat.mouvement is not None
+    assert [r.profondeur for r in rapports] == list(range(1, resultat.profondeur + 1))
+    assert moteur.cherche(chess.Board(), duree=0.2).duree < 0.5
+
+
+def test_rc03():
+    """
+    Cas de test Recherche 03
+
+    Valider la table de transposition.
+
+    On ecrit des entrees dans une petite table, dont plusieurs a la meme place, et on corrompt une entree.
+    On verifie la lecture, le remplacement selon la profondeur et la generation, et qu'une entree corrompue est ignoree.
+    """
+    table = recherche.TableTransposition(octets=16 * 8)
+    assert table.taille == 8 and table.lit(3) is None
+    table.ecrit(3, 1234, 5, recherche.EXACTE, -250)
+    assert table.lit(3) == (1234, 5, recherche.EXACTE, -250)
+
+    table.ecrit(11, 99, 2, recherche.INFERIEURE, 10)        # Meme place, moins profonde, meme recherche : ignoree
+    assert table.lit(11) is None and table.lit(3) is not None
+    table.ecrit(3, 0, 7, recherche.SUPERIEURE, 40)          # Meme position, plus profonde : le mouvement est garde
+    assert table.lit(3) == (1234, 7, recherche.SUPERIEURE, 40)
+    table.nouvelle_recherche()
+    table.ecrit(11, 99, 2, recherche.INFERIEURE, 10)        # Entree d'une recherche precedente : remplacee
+    assert table.lit(11) == (99, 2, recherche.INFERIEURE, 10) and table.lit(3) is None
+
+    table._mots[2 * 3 + 1] ^= 1 << 40                       # Une entree ecrite a moitie
+    assert table.lit(11) is None
+
+
+def test_rc04():
+    """
+    Cas de test Recherche 04
+
+    Valider la recherche repartie sur plusieurs processus, avec une table de transposition partagee.
+
+    On cherche un mat, puis la position de depart, avec un processus principal et deux processus auxiliaires.
+    On verifie le mouvement trouve, et que les auxiliaires ont cherche eux aussi.
+    On verifie qu'une recherche interrompue par une exception laisse la recherche suivante se faire.
+    """
+    parallele = recherche.RechercheParallele(processus=3, octets=1 << 20)
+    try:
+        resultat = parallele.cherche(chess.Board('6k1/5ppp/8/8/8/8/1Q3PPP/1R4K1 w - - 0 1'), profondeur=4)
+        assert resultat.mouvement == 'b2b8' and resultat.score == recherche.MAT - 1
+
+        def interrompt(resultat):
+            raise ValueError("Recherche interrompue")
+
+        with pytest.raises(ValueError):
+            parallele.cherche(chess.Board(), profondeur=4, rapport=interrompt)
+        assert not parallele._arret.is_set()
+
+        resultat = parallele.cherche(chess.Board(), profondeur=4)
+        assert chess.Move.from_uci(resultat.mouvement) in chess.Board().legal_moves
+        assert resultat.profondeur == 4 and resultat.noeuds > parallele._moteur.noeuds
+        assert parallele.table.lit(recherche.cle(chess.Board())) is not None
+    finally:
+        parallele.ferme()
+
+
+def test_rc05():
+    """
+    Cas de test Recherche 05
+
+    Valider la fermeture de l'ordinateur.
+
+    On cree l'ordinateur sur un puis sur deux processus, et on lui fait choisir un mouvement.
+    On verifie que le mouvement est legal, et que ferme() libere ses ressources une seule fois.
+    """
+    for processus in (1, 2):
+        choisit = recherche.joueur(noeuds=500, octets=1 << 20, processus=processus)
+        assert chess.Move.from_uci(choisit(chess.Board())) in chess.Board().legal_moves
+        assert choisit.ferme.alive
+        choisit.ferme()
+        assert not choisit.ferme.alive
+        choisit.ferme()
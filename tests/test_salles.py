@@ -0,0 +1,77 @@
+"""Tests du registre des salles de jeu."""
+import pytest
+
+import ti103_chess.salles as salles
+
+
+def test_sa01():
+    """
+    Cas de test Salles 01
+
+    Valider la creation d'une salle et l'attribution des roles.
+
+    Un premier client cree une salle, deux autres la rejoignent.
+    On verifie que le createur a les Blancs, le suivant les Noirs et le dernier est spectateur.
+    """
+    registre = salles.Registre()
+    identifiant = registre.cree('a')
+    assert registre.rejoint('b', identifiant) == 'Noir'
+    assert registre.rejoint('c', identifiant) == salles.SPECTATEUR
+    assert registre.role('a') == 'Blanc'
+    assert registre.salle_de('c') == identifiant
+
+    assert registre.cree('d', 'partie') == 'partie'
+    with pytest.raises(ValueError):
+        registre.cree('e', 'partie')
+    with pytest.raises(KeyError):
+        registre.rejoint('e', 'inconnue')
+
+
+def test_sa02():
+    """
+    Cas de test Salles 02
+
+    Valider que les mouvements ne sont envoyes qu'aux membres de la salle.
+
+    On ouvre deux salles avec leurs joueurs et un spectateur, puis un joueur quitte la sienne.
+    On verifie les destinataires d'un mouvement, la liberation de la couleur et la suppression des salles vides.
+    """
+    registre = salles.Registre()
+    un = registre.cree('a')
+    deux = registre.cree('x')
+    registre.rejoint('b', un)
+    registre.rejoint('s', un, spectateur=True)
+    registre.rejoint('y', deux)
+
+    assert sorted(registre.destinataires('a')) == ['b', 's']
+    assert registre.destinataires('y') == ['x']
+    assert registre.destinataires('inconnu') == []
+
+    assert registre.quitte('b') == un
+    assert registre.rejoint('c', un) == 'Noir'
+
+    registre.quitte('x')
+    registre.quitte('y')
+    assert len(registre) == 1 and deux not in registre.salles
+
+
+def test_sa03():
+    """
+    Cas de test Salles 03
+
+    Valider le retour d'un joueur dans sa couleur.
+
+    Les Blancs quittent une salle, puis un spectateur et l'ancien joueur la rejoignent en demandant leur couleur.
+    On verifie que le joueur retrouve les Blancs, et qu'une salle peut etre creee avec les Noirs.
+    """
+    registre = salles.Registre()
+    identifiant = registre.cree('a')
+    registre.rejoint('b', identifiant)
+    registre.quitte('a')
+    assert registre.rejoint('a2', identifiant, couleur='Blanc') == 'Blanc'
+
+    registre.quitte('b')
+    assert registre.rejoint('c', identifiant, couleur='Blanc') == 'Noir'
+
+    registre.cree('n', 'autre', couleur='Noir')
+    assert registre.rejoint('m', 'autre') == 'Blanc'
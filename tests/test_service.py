@@ -0,0 +1,125 @@
+"""Tests de la logique commune des serveurs de jeu."""
+import asyncio
+import json
+
+import ti103_chess.bus as bus_
+import ti103_chess.protocole as protocole
+import ti103_chess.server_asgi as server_asgi
+import ti103_chess.service as service
+
+
+def test_sv01():
+    """
+    Cas de test Service 01
+
+    Valider les evenements des serveurs, sans transport.
+
+    Un client cree une salle en binaire, un autre la rejoint en JSON et un spectateur en binaire, puis les Blancs
+    jouent, les Noirs jouent hors de leur tour, et un client se reconnecte.
+    On verifie les rooms a quitter et rejoindre, les messages de chaque format, le refus avec les mouvements de la
+    partie, le lot de resynchronisation et la liberation de la partie quand sa salle se vide.
+    """
+    jeu = service.Service()
+    entree = jeu.cree('a', {"salle": "1", "binaire": True})
+    assert entree == service.Entree(json.dumps({"salle": "1", "role": "Blanc"}), None, "1")
+    assert json.loads(jeu.cree('x', {"salle": "1"}).reponse)["erreur"]
+    assert jeu.rejoint('b', {"salle": "1"}).rejoint == "1"
+    assert json.loads(jeu.rejoint('c', {"salle": "1", "binaire": True}).reponse)["role"] == "Spectateur"
+    assert jeu.rejoint('d', {"salle": "2"}).rejoint is None
+
+    relais = jeu.joue('a', protocole.encode("1", 1, 'e2e4'))
+    assert relais.refus is None and relais.trame == protocole.encode("1", 1, 'e2e4')
+    assert [(sorted(e.membres), e.tous) for e in relais.envois] == [(['c'], False), (['b'], False)]
+    assert relais.envois[1].message == protocole.encode_json('a', 1, 'e2e4')
+    assert jeu.joue('d', protocole.encode("1", 2, 'e7e5')) is None and jeu.joue('a', b'') is None
+
+    refus = json.loads(jeu.joue('a', protocole.encode("1", 2, 'd2d4')).refus)
+    assert refus["coups"] == ['e2e4'] and refus["fen"].startswith('rnbqkbnr/pppppppp/8/8/4P3')
+    assert protocole.decode_lot(jeu.resync('c', {"salle": "1", "ply": 0})).mouvement == ['e2e4']
+    assert json.loads(jeu.resync('b', {"salle": "1", "ply": 0}))["coups"] == ['e2e4']
+    for data_recv in ({"salle": "1"}, {"salle": "1", "ply": "0"}, {"salle": "1", "ply": -1}, {"salle": "1", "ply": 2}):
+        assert json.loads(jeu.resync('b', data_recv))["erreur"]
+    assert json.loads(jeu.explore('a', {}))["coups"] == ['e2e4']
+
+    # Le createur passe dans une nouvelle salle : il quitte la room de l'ancienne
+    assert jeu.cree('a', {"salle": "3"}).quitte == "1"
+    for sid in ('b', 'c'):
+        jeu.deconnecte(sid)
+    assert "1" not in jeu.registre.salles and "1" in jeu.arbitrage and not jeu.binaires - {'a'}
+    assert json.loads(jeu.rejoint('b', {"salle": "1", "couleur": "Noir"}).reponse)["role"] == "Noir"
+
+
+def test_sv02():
+    """
+    Cas de test Service 02
+
+    Valider le transport du serveur asyncio.
+
+    On cree le serveur asyncio, puis on appelle ses gestionnaires d'evenements, sans reseau, pour deux joueurs qui
+    echangent des mouvements, dont un refuse.
+    On verifie les rooms rejointes et les messages envoyes par le serveur.
+    """
+    application = server_asgi.cree_application()
+    sio, gestionnaires = application.sio, application.sio.handlers['/']
+    rooms, envoyes = [], []
+
+    async def enter_room(sid, salle):
+        rooms.append((sid, salle))
+
+    async def emit(evenement, message, **options):
+        envoyes.append((evenement, message, options))
+
+    sio.enter_room, sio.emit = enter_room, emit
+
+    async def scenario():
+        await gestionnaires['create']('a', json.dumps({"salle": "1", "binaire": True}))
+        await gestionnaires['join']('b', json.dumps({"salle": "1", "binaire": True}))
+        await gestionnaires['connected']('a', protocole.encode("1", 1, 'e2e4'))
+        await gestionnaires['connected']('b', protocole.encode("1", 3, 'e7e5'))
+
+    asyncio.run(scenario())
+    assert rooms == [('a', "1"), ('b', "1")]
+    assert envoyes[0] == ("server response", protocole.encode("1", 1, 'e2e4'), {"room": "1", "skip_sid": 'a'})
+    assert envoyes[1][0] == "move rejected" and envoyes[1][2] == {"to": 'b'}
+    assert json.loads(envoyes[1][1])["coups"] == ['e2e4'] and len(envoyes) == 2
+
+
+def test_sv03():
+    """
+    Cas de test Service 03
+
+    Valider le partage des parties entre deux processus.
+
+    On cree deux serveurs asyncio sur un meme bus, chacun cree une salle sans identifiant, puis le second refuse une
+    salle du premier, un spectateur du second suit la partie du premier et ses Blancs jouent.
+    On verifie que chaque salle revient a son createur, et que le mouvement est relaye a la room des spectateurs.
+    """
+    bus = bus_.BusLocal()
+    applications = [server_asgi.cree_application(bus, rang, 2) for rang in range(2)]
+    rooms, envoyes = [], []
+
+    async def enter_room(sid, room):
+        rooms.append((sid, room))
+
+    async def emit(evenement, message, **options):
+        envoyes.append((evenement, message, options))
+
+    for application in applications:
+        application.sio.enter_room, application.sio.emit = enter_room, emit
+    premier, second = (application.sio.handlers['/'] for application in applications)
+
+    async def scenario():
+        reponses = [await premier['create']('a', None), await second['create']('b', None)]
+        salles = [json.loads(reponse)["salle"] for reponse in reponses]
+        refus = await second['create']('c', json.dumps({"salle": salles[0]}))
+        await second['join']('s', json.dumps({"salle": salles[0]}))
+        await premier['connected']('a', protocole.encode_json(None, 1, 'e2e4'))
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return salles, refus
+
+    salles, refus = asyncio.run(scenario())
+    assert [bus_.proprietaire(salle, 2) for salle in salles] == [0, 1]
+    assert "erreur" in json.loads(refus)
+    assert rooms[-1] == ('s', f'observe/{salles[0]}')
+    assert envoyes[-1][2] == {"room": f'observe/{salles[0]}', "skip_sid": None}
@@ -0,0 +1,118 @@
+"""Tests de l'index des positions de l'arbre de Patricia Merkle."""
+import collections
+import random
+
+import chess
+import pytest
+
+import ti103_chess.bitboard as bitboard
+import ti103_chess.explorateur as explorateur
+import ti103_chess.patricia_trie as pm
+import ti103_chess.transpositions as transpositions
+
+
+# 1. d4 Cf6 2. c4 e6 par deux ordres de mouvements, un aller-retour des cavaliers, et un mouvement illegal
+PARTIES = [
+    (['d2d4', 'g8f6', 'c2c4', 'e7e6'], '1-0'),
+    (['c2c4', 'e7e6', 'd2d4', 'g8f6', 'b1c3'], '0-1'),
+    (['d2d4', 'g8f6', 'c2c4', 'e7e6', 'g1f3'], '1/2-1/2'),
+    (['g1f3', 'g8f6', 'f3g1', 'f6g8', 'e2e4'], '1/2-1/2'),
+    (['e2e4', 'e7e4', 'g1f3'], '*'),
+]
+
+NIMZO = 'rnbqkb1r/pppp1ppp/4pn2/8/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3'
+
+
+def test_tp01():
+    """
+    Cas de test Transpositions 01
+
+    Valider l'index des positions sur des parties choisies.
+
+    On enregistre des parties dont deux atteignent la meme position par des ordres differents, une qui revient a la
+    position de depart, et une avec un mouvement illegal, puis on reconstruit l'index en un parcours de l'arbre.
+    On verifie les ordres de mouvements, les statistiques, les mouvements suivants et les parties d'une position,
+    qu'une repetition n'est comptee qu'une fois, le rapport, et la reponse de l'explorateur pour une FEN.
+    On verifie enfin un index limite aux deux premiers demi-coups, construit en un parcours ou par ajoute.
+    """
+    ouvertures = explorateur.Explorateur()
+    ouvertures.indexe()
+    for mouvements, resultat in PARTIES:
+        ouvertures.ajoute(mouvements, resultat)
+    index = ouvertures.index
+
+    cle = bitboard.Position(NIMZO).cle()
+    assert sorted(p.chemin() for p in index.chemins(cle)) == [['c2c4', 'e7e6', 'd2d4', 'g8f6'],
+                                                              ['d2d4', 'g8f6', 'c2c4', 'e7e6']]
+    assert index.statistiques(cle) == (1, 1, 1, 0)
+    assert index.suivants(cle) == [('g1f3', (0, 1, 0, 0)), ('b1c3', (0, 0, 1, 0))]
+    assert sorted(m for m, _ in index.parties(cle)) == sorted(m for m, _ in PARTIES[:3])
+
+    # La position de depart est atteinte deux fois par la partie des cavaliers : la partie n'est comptee qu'une fois
+    depart = bitboard.Position().cle()
+    assert [p.chemin() for p in index.chemins(depart)] == [[], ['g1f3', 'g8f6', 'f3g1', 'f6g8']]
+    assert index.statistiques(depart) == index.racine.statistiques() == (1, 2, 1, 1)
+    assert [m for m, _ in index.suivants(depart)] == ['d2d4', 'c2c4', 'g1f3', 'e2e4']
+
+    # 'e7e4' est illegal : ni sa position ni celle de 'g1f3' ne sont indexees. Trois positions sont atteintes par
+    # deux ordres de mouvements : la position de depart, celle de 1. d4 Cf6 2. c4 e6, et celle de 1. e4.
+    rapport = index.rapport()
+    assert (rapport.positions, rapport.distinctes, rapport.transposees, rapport.ignorees) == (17, 14, 3, 2)
+    assert rapport.octets_sans_deduplication > rapport.octets
+
+    reconstruit = transpositions.IndexPositions(index.racine)
+    assert reconstruit.rapport()[:4] == rapport[:4] and set(reconstruit) == set(index)
+
+    reponse = ouvertures.reponse_position(NIMZO, limite=1)
+    assert (reponse["fen"], reponse["ordres"], reponse["parties"], reponse["noirs"]) == (NIMZO, 2, 3, 1)
+    assert reponse["suivants"] == [{"mouvement": 'g1f3', "parties": 1, "blancs": 0, "nulles": 1, "noirs": 0,
+                                    "inconnues": 0}]
+    assert ouvertures.reponse_position('8/8/8/8/8/8/8/8 w - - 0 1')["parties"] == 0
+    with pytest.raises(ValueError):
+        ouvertures.reponse_position('pas une FEN')
+
+    # La position de depart, quatre premiers mouvements et quatre reponses, dont 'e7e4' qui est illegal
+    ouverture = transpositions.IndexPositions(index.racine, profondeur=2)
+    assert ouverture.rapport()[:4] == (8, 8, 0, 1) and cle not in ouverture
+    assert ouverture.statistiques(depart) == (1, 2, 1, 1)
+    incrementale = transpositions.IndexPositions(pm.PatriciaMerkleTrie(''), profondeur=2)
+    for mouvements, resultat in PARTIES:
+        incrementale.ajoute(mouvements, resultat)
+    assert incrementale.rapport()[:4] == ouverture.rapport()[:4]
+    assert set(incrementale) == set(ouverture)
+
+
+def test_tp02():
+    """
+    Cas de test Transpositions 02
+
+    Valider l'index des positions sur des parties aleatoires.
+
+    On joue des parties aleatoires parmi peu de mouvements, pour qu'elles se croisent par transposition, et on les
+    enregistre dans l'arbre par l'index, puis on reconstruit l'index.
+    On verifie pour chaque position, par force brute, le nombre de parties qui y passent, leurs resultats et leurs
+    mouvements, et que l'index reconstruit est le meme.
+    """
+    generateur = random.Random(103)
+    racine = pm.PatriciaMerkleTrie('')
+    index = transpositions.IndexPositions(racine)
+    attendues = collections.defaultdict(list)   # Cle -> parties qui y passent
+    for _ in range(300):
+        board = chess.Board()
+        vues = {bitboard.Position().cle()}
+        for _ in range(generateur.randrange(1, 9)):
+            board.push(generateur.choice(sorted(board.legal_moves, key=chess.Move.uci)[:4]))
+            vues.add(bitboard.Position(board.fen()).cle())
+        partie = ([m.uci() for m in board.move_stack], generateur.choice(pm.RESULTATS))
+        index.ajoute(*partie)
+        for cle in vues:
+            attendues[cle].append(partie)
+
+    assert len(index) == len(attendues)
+    for cle, parties in attendues.items():
+        comptes = collections.Counter(resultat for _, resultat in parties)
+        assert index.statistiques(cle) == tuple(comptes[r] for r in pm.RESULTATS)
+        assert sorted(m for m, s in index.parties(cle) for _ in range(s.parties)) == sorted(m for m, _ in parties)
+
+    reconstruit = transpositions.IndexPositions(racine)
+    assert reconstruit.rapport()[:4] == index.rapport()[:4] and reconstruit.rapport().transposees > 10
@@ -0,0 +1,77 @@
+"""Tests de l'arbre de Patricia Merkle compact."""
+import ti103_chess.patricia_trie as pm
+import ti103_chess.trie_compact as tc
+
+
+def arbre():
+    """
+    Retourne un petit arbre de parties UCI dont une arete a ete coupee.
+    """
+    racine = pm.PatriciaMerkleTrie('')
+    racine.add('e2e4').add('e7e5').add('g1f3').add('b8c6')
+    racine.add('e2e4').add('c7c5')
+    racine.add('d2d4').add('d7d5').add('c2c4')
+    racine.get('e2e4').get('e7e5').get('g1f3').add('g8f6')
+    return racine
+
+
+def test_tc01(tmp_path, capsys):
+    """
+    Cas de test Trie Compact 01
+
+    Valider l'ecriture puis la relecture par mmap d'un arbre compact.
+
+    On convertit un arbre et on l'ecrit dans un fichier.
+    On rouvre le fichier.
+    On verifie que le contenu affiche et la signature sont ceux de l'arbre d'origine.
+    """
+    racine = arbre()
+    racine.dump()
+    attendu, _ = capsys.readouterr()
+
+    chemin = tmp_path / 'arbre.pmtc'
+    tc.TrieCompact.depuis_trie(racine).ecrire(chemin)
+    with tc.TrieCompact.ouvrir(chemin) as compact:
+        compact.dump()
+        out, _ = capsys.readouterr()
+        assert out == attendu
+        assert compact.hash() == racine.hash()
+        assert compact.recalcule() is None
+        assert compact.vers_trie().hash() == racine.hash()
+
+
+def test_tc02():
+    """
+    Cas de test Trie Compact 02
+
+    Valider la recherche d'une suite de mouvements, au milieu d'une arete et a un embranchement.
+    """
+    compact = tc.TrieCompact.depuis_trie(arbre())
+    assert ['e2e4', 'e7e5', 'g1f3'] in compact
+    assert ['e2e4', 'e7e5', 'g1f3', 'g8f6'] in compact
+    assert ['d2d4', 'd7d5'] in compact
+    assert ['d2d4', 'g8f6'] not in compact
+    assert ['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1b5'] not in compact
+
+    ligne, i = compact.cherche(['d2d4', 'd7d5'])
+    assert compact.arete(ligne)[i] == 'd7d5'
+    assert compact.signature(ligne, i) == arbre().get('d2d4').get('d7d5').hash()
+
+
+def test_tc03():
+    """
+    Cas de test Trie Compact 03
+
+    Valider que la verification detecte un mouvement altere.
+
+    On altere le dernier mouvement de l'arbre, puis le premier mouvement de la ligne 2.
+    On verifie que la verification designe la ligne du mouvement altere, et non la racine.
+    """
+    octets = bytes(tc.TrieCompact.depuis_trie(arbre()).octets())
+    compact = tc.TrieCompact.depuis_octets(bytearray(octets))
+    compact.coups[len(compact.coups) - 1] ^= 1
+    assert compact.recalcule() == len(compact) - 1
+
+    compact = tc.TrieCompact.depuis_octets(bytearray(octets))
+    compact.coups[compact.aretes[2]] ^= 1
+    assert compact.recalcule() == 2
@@ -0,0 +1,175 @@
+"""
+Ce module est l'arbitre du serveur : il garde l'echiquier de reference de chaque partie et valide les mouvements.
+
+Le serveur ne relaie plus n'importe quel mouvement : il le verifie d'abord sur son propre echiquier, une position du
+module bitboard. Seuls les mouvements de la piece jouee sont generes pour cette verification, et le mouvement est joue
+sur place, sans copier la position.
+
+Pour que la memoire du serveur reste bornee, seuls les echiquiers des parties les plus recemment jouees sont gardes
+(cache LRU). Quand une partie est evincee, on ne garde que sa position (FEN) et la liste de ses mouvements :
+l'echiquier est reconstruit depuis la FEN a son prochain mouvement, sans rejouer la partie. L'historique perdu ne sert
+qu'aux nulles par repetition, pas a la legalite des mouvements.
+"""
+import collections
+import threading
+import time
+
+try:
+    import ti103_chess.bitboard as bitboard
+    import ti103_chess.moves as moves
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import bitboard
+    import moves
+
+
+class MouvementIllegal(ValueError):
+    """
+    Le mouvement propose n'est pas legal dans la position de reference de la partie.
+    """
+
+
+class Desynchronisation(MouvementIllegal):
+    """
+    Le mouvement propose ne suit pas le dernier mouvement de la partie de reference : le client est desynchronise.
+    """
+
+
+class Arbitre:
+    """
+    Les echiquiers de reference des parties en cours, dans un cache d'au plus capacite echiquiers.
+    """
+    def __init__(self, capacite=1024, delai_abandon=300.0):
+        self.capacite = capacite
+        self.delai_abandon = delai_abandon             # En secondes
+        self._echiquiers = collections.OrderedDict()   # Partie -> bitboard.Position, la moins recemment jouee d'abord
+        self._fens = {}                                # Partie -> position de depart ou position a l'eviction
+        self._coups = {}                               # Partie -> mouvements joues depuis le debut, en UCI
+        self._abandons = collections.OrderedDict()     # Partie sans joueurs -> instant de l'abandon, dans l'ordre
+        self._verrou = threading.Lock()
+
+        # Metriques du cache
+        self.reconstructions = 0
+        self.evictions = 0
+
+    def nouvelle(self, partie, fen=bitboard.FEN_DEPART):
+        """
+        Commence une nouvelle partie, depuis la position de depart ou une position donnee.
+        """
+        with self._verrou:
+            self._echiquiers.pop(partie, None)
+            self._abandons.pop(partie, None)
+            self._fens[partie] = fen
+            self._coups[partie] = []
+
+    def __contains__(self, partie):
+        return partie in self._coups
+
+    def _echiquier(self, partie):
+        """
+        Retourne l'echiquier de reference d'une partie, en le reconstruisant depuis sa FEN s'il a ete evince.
+        """
+        echiquier = self._echiquiers.get(partie)
+        if echiquier is not None:
+            self._echiquiers.move_to_end(partie)
+            return echiquier
+
+        echiquier = self._echiquiers[partie] = bitboard.Position(self._fens[partie])
+        if self._coups[partie]:
+            self.reconstructions += 1
+        if len(self._echiquiers) > self.capacite:
+            evincee, ancien = self._echiquiers.popitem(last=False)
+            self._fens[evincee] = ancien.fen()
+            self.evictions += 1
+        return echiquier
+
+    def joue(self, partie, uci, couleur=None, ply=None):
+        """
+        Valide un mouvement et le joue sur l'echiquier de reference. Retourne le numero du demi-coup joue.
+
+        Si couleur est donnee, c'est aussi a elle de jouer (un spectateur ne joue jamais). Leve MouvementIllegal sinon,
+        et KeyError si la partie est inconnue. Si le numero du demi-coup ply est donne, leve Desynchronisation s'il
+        ne suit pas le dernier mouvement de la partie.
+        """
+        with self._verrou:
+            if ply is not None and ply != len(self._coups[partie]) + 1:
+                raise Desynchronisation(f"Le demi-coup {ply} ne suit pas le dernier de la partie {partie}")
+            echiquier = self._echiquier(partie)
+            if couleur is not None and couleur != ('Blanc' if echiquier.trait == bitboard.BLANC else 'Noir'):
+                raise MouvementIllegal(f"Ce n'est pas aux {couleur}s de jouer dans la partie {partie}")
+            try:
+                code = moves.encode(uci)
+            except ValueError:
+                code = None
+            if code is None or not echiquier.est_legal(code):
+                raise MouvementIllegal(f"Le mouvement {uci} est illegal dans la partie {partie}")
+
+            echiquier.joue(code)
+            self._coups[partie].append(uci)
+            return len(self._coups[partie])
+
+    def coups_depuis(self, partie, ply):
+        """
+        Retourne les mouvements joues apres le demi-coup ply, pour un client qui se reconnecte. Leve ValueError si ply
+        n'est pas le numero d'un demi-coup de la partie, de 0 (avant le premier) au dernier.
+        """
+        with self._verrou:
+            coups = self._coups[partie]
+            if not isinstance(ply, int) or isinstance(ply, bool) or not 0 <= ply <= len(coups):
+                raise ValueError(f"Le demi-coup {ply!r} n'est pas dans la partie {partie}")
+            return coups[ply:]
+
+    def abandonne(self, partie):
+        """
+        Signale qu'une partie n'a plus de joueurs connectes. Elle est gardee delai_abandon secondes, le temps que ses
+        joueurs se reconnectent, puis oubliee. Les parties abandonnees depuis plus longtemps sont oubliees ici.
+        """
+        with self._verrou:
+            maintenant = time.monotonic()
+            self._abandons.pop(partie, None)
+            self._abandons[partie] = maintenant
+            while self._abandons:
+                ancienne, instant = next(iter(self._abandons.items()))
+                if maintenant - instant < self.delai_abandon:
+                    break
+                del self._abandons[ancienne]
+                self._echiquiers.pop(ancienne, None)
+                self._fens.pop(ancienne, None)
+                self._coups.pop(ancienne, None)
+
+    def reprend(self, partie):
+        """
+        Signale qu'un joueur s'est reconnecte a une partie abandonnee : elle n'est plus oubliee.
+        """
+        with self._verrou:
+            self._abandons.pop(partie, None)
+
+    def fen(self, partie):
+        """
+        Retourne la position de reference d'une partie, par exemple pour resynchroniser un client.
+        """
+        with self._verrou:
+            echiquier = self._echiquiers.get(partie)
+            return self._fens[partie] if echiquier is None else echiquier.fen()
+
+    def coups(self, partie):
+        """
+        Retourne la liste des mouvements joues dans une partie depuis son debut.
+        """
+        with self._verrou:
+            return list(self._coups[partie])
+
+    def termine(self, partie):
+        """
+        Oublie une partie et retourne ses mouvements, ou None si elle est inconnue.
+        """
+        with self._verrou:
+            self._echiquiers.pop(partie, None)
+            self._fens.pop(partie, None)
+            self._abandons.pop(partie, None)
+            return self._coups.pop(partie, None)
+
+    def __len__(self):
+        """
+        Retourne le nombre de parties suivies, en cache ou non.
+        """
+        return len(self._coups)
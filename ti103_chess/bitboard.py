@@ -0,0 +1,544 @@
+"""
+Ce module est un generateur de mouvements rapide : une position representee par des bitboards, ou l'on joue et
+annule les mouvements sur place, sans jamais copier l'echiquier.
+
+Un bitboard est un entier de 64 bits, un bit par case, numerotees comme dans le module chess : a1 = 0, b1 = 1, ...,
+h8 = 63. La position garde un bitboard par couleur et par type de piece, les cases occupees par chaque couleur, et la
+piece de chaque case (pour trouver la piece prise sans parcourir les bitboards).
+
+Les attaques sont lues dans des tables calculees a l'import : pour les cavaliers, les rois et les pions, une par
+case. Pour les pieces qui glissent (fous, tours, dames), elles dependent aussi des pieces qui les bloquent : seule
+compte l'occupation des cases de leurs rayons, sans le bord de l'echiquier (le masque de la case). La table de chaque
+case est indexee par cette occupation masquee, comme le seraient des tables magiques, et remplie a la premiere
+lecture de chaque occupation.
+
+Les mouvements sont les codes sur 16 bits du module moves. Ils sont generes directement legaux, sans les jouer : les
+pieces qui mettent le roi en echec et celles qui sont clouees sur lui limitent les cases d'arrivee des autres (voir
+Position._legaux). Joue et annule ne touchent qu'aux bits des cases du mouvement ; ce qu'on ne peut pas deduire du
+mouvement (piece prise, roques, case en passant, compteur des 50 coups) est garde dans une pile.
+
+    position = Position()
+    position.est_legal(moves.encode('e2e4'))   # True
+    perft(position, 3)                         # 8902
+
+Position.cle retourne la cle de Zobrist de la position : deux positions identiques, atteintes par des ordres de
+mouvements differents, ont la meme cle (voir le module transpositions). La part des pieces est tenue a jour par joue et
+annule, et les nombres sont ceux du module zobrist : la cle est la meme que recherche.cle pour le meme chess.Board.
+"""
+try:
+    import ti103_chess.zobrist as zobrist
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import zobrist
+
+PION, CAVALIER, FOU, TOUR, DAME, ROI = range(1, 7)   # Meme numerotation que chess.PieceType
+NOIR, BLANC = 0, 1                                    # Meme numerotation que chess.Color
+
+FEN_DEPART = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+_TOUT = (1 << 64) - 1
+_COLONNE_A = 0x0101010101010101
+_COLONNE_H = _COLONNE_A << 7
+_RANGEE_3 = 0xFF << 16
+_RANGEE_6 = 0xFF << 40
+_RANGEES_PROMOTION = 0xFF | 0xFF << 56
+
+_DIAGONALES = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+_LIGNES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def _sauts(case, deplacements):
+    """
+    Retourne le bitboard des cases atteintes depuis une case par des deplacements (rangee, colonne) d'un seul saut.
+    """
+    rangee, colonne = divmod(case, 8)
+    bitboard = 0
+    for dr, dc in deplacements:
+        if 0 <= rangee + dr < 8 and 0 <= colonne + dc < 8:
+            bitboard |= 1 << (rangee + dr) * 8 + colonne + dc
+    return bitboard
+
+
+def _rayons(case, directions, occupation):
+    """
+    Retourne le bitboard des cases atteintes depuis une case en glissant dans des directions, jusqu'a la premiere case
+    occupee comprise.
+    """
+    rangee, colonne = divmod(case, 8)
+    bitboard = 0
+    for dr, dc in directions:
+        r, c = rangee + dr, colonne + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            bitboard |= 1 << r * 8 + c
+            if occupation >> r * 8 + c & 1:
+                break
+            r, c = r + dr, c + dc
+    return bitboard
+
+
+def _masque(case, directions):
+    """
+    Retourne le bitboard des cases dont l'occupation change les attaques d'une piece qui glisse : ses rayons, sans la
+    derniere case de chacun, qui est attaquee qu'elle soit occupee ou non.
+    """
+    rangee, colonne = divmod(case, 8)
+    bitboard = 0
+    for dr, dc in directions:
+        r, c = rangee + dr, colonne + dc
+        while 0 <= r + dr < 8 and 0 <= c + dc < 8:
+            bitboard |= 1 << r * 8 + c
+            r, c = r + dr, c + dc
+    return bitboard
+
+
+_CAVALIER = [_sauts(c, ((1, 2), (2, 1), (-1, 2), (-2, 1), (1, -2), (2, -1), (-1, -2), (-2, -1))) for c in range(64)]
+_ROI = [_sauts(c, _DIAGONALES + _LIGNES) for c in range(64)]
+_PION = [[_sauts(c, ((-1, -1), (-1, 1))) for c in range(64)],   # Cases attaquees par un pion noir sur la case
+         [_sauts(c, ((1, -1), (1, 1))) for c in range(64)]]     # Et par un pion blanc
+
+_MASQUES_FOU = [_masque(c, _DIAGONALES) for c in range(64)]
+_MASQUES_TOUR = [_masque(c, _LIGNES) for c in range(64)]
+_FOU = [{} for _ in range(64)]    # Case -> occupation masquee -> attaques
+_TOUR = [{} for _ in range(64)]
+
+
+def _alignements():
+    """
+    Calcule, pour chaque couple de cases alignees sur une rangee, une colonne ou une diagonale, les cases strictement
+    entre elles et toute la ligne qui les traverse. Les cases qui ne sont pas alignees donnent 0.
+    """
+    entre = [[0] * 64 for _ in range(64)]
+    ligne = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        for direction in _DIAGONALES + _LIGNES:
+            complete = _rayons(a, (direction,), 0) | _rayons(a, ((-direction[0], -direction[1]),), 0) | 1 << a
+            rangee, colonne = divmod(a, 8)
+            chemin = 0
+            r, c = rangee + direction[0], colonne + direction[1]
+            while 0 <= r < 8 and 0 <= c < 8:
+                entre[a][r * 8 + c] = chemin
+                ligne[a][r * 8 + c] = complete
+                chemin |= 1 << r * 8 + c
+                r, c = r + direction[0], c + direction[1]
+    return entre, ligne
+
+
+_ENTRE, _LIGNE = _alignements()
+
+
+def attaques_fou(case, occupation):
+    """
+    Retourne le bitboard des cases attaquees par un fou sur une case, avec les cases occupees donnees.
+    """
+    cle = occupation & _MASQUES_FOU[case]
+    try:
+        return _FOU[case][cle]
+    except KeyError:
+        attaques = _FOU[case][cle] = _rayons(case, _DIAGONALES, cle)
+        return attaques
+
+
+def attaques_tour(case, occupation):
+    """
+    Retourne le bitboard des cases attaquees par une tour sur une case, avec les cases occupees donnees.
+    """
+    cle = occupation & _MASQUES_TOUR[case]
+    try:
+        return _TOUR[case][cle]
+    except KeyError:
+        attaques = _TOUR[case][cle] = _rayons(case, _LIGNES, cle)
+        return attaques
+
+
+# Les droits de roque, un bit chacun, et ce qu'il faut pour roquer : le roi, la tour, les cases entre eux qui doivent
+# etre vides, et la case que le roi traverse, qui ne doit pas etre attaquee.
+_K, _Q, _k, _q = 1, 2, 4, 8
+_ROQUES = {BLANC: ((_K, 4, 6, 7, 0x60, 5), (_Q, 4, 2, 0, 0x0E, 3)),
+           NOIR: ((_k, 60, 62, 63, 0x60 << 56, 61), (_q, 60, 58, 56, 0x0E << 56, 59))}
+_TOURS_ROQUE = {6: (7, 5), 2: (0, 3), 62: (63, 61), 58: (56, 59)}   # Arrivee du roi -> depart et arrivee de la tour
+_GARDE_ROQUES = [15] * 64                                           # Droits gardes quand une case est touchee
+for _droit, _roi, _arrivee, _tour, _entre, _traverse in _ROQUES[BLANC] + _ROQUES[NOIR]:
+    _GARDE_ROQUES[_roi] &= ~_droit
+    _GARDE_ROQUES[_tour] &= ~_droit
+
+# Les nombres des cles de Zobrist (voir le module zobrist), indexes par piece comme dans cases, et par combinaison de
+# droits de roque : chaque droit a le nombre de la case de depart de sa tour
+_ZOBRIST = [zobrist.PIECES[piece >> 3][piece & 7] if 0 < piece & 7 < 7 else [0] * 64 for piece in range(16)]
+_ZOBRIST_ROQUES = [0] * 16
+for _droits in range(16):
+    for _droit, _roi, _arrivee, _tour, _entre, _traverse in _ROQUES[BLANC] + _ROQUES[NOIR]:
+        if _droits & _droit:
+            _ZOBRIST_ROQUES[_droits] ^= zobrist.ROQUES[_tour]
+
+_LETTRES = {t | couleur << 3: (lettre.upper() if couleur else lettre)
+            for t, lettre in enumerate('pnbrqk', 1) for couleur in (NOIR, BLANC)}
+_PIECES = {lettre: piece for piece, lettre in _LETTRES.items()}
+
+
+def code(mouvement):
+    """
+    Retourne le code sur 16 bits d'un chess.Move.
+    """
+    return mouvement.from_square | mouvement.to_square << 6 | (mouvement.promotion or 1) - 1 << 12
+
+
+def _case(nom):
+    return ord(nom[0]) - 97 + (int(nom[1]) - 1) * 8
+
+
+def _nom(case):
+    return chr(97 + case % 8) + str(case // 8 + 1)
+
+
+class Position:
+    """
+    Une position d'echecs en bitboards, depuis une FEN. Les mouvements sont des codes du module moves.
+    """
+    __slots__ = ['pieces', 'couleurs', 'cases', 'trait', 'roques', 'en_passant', 'demi_coups', 'coups', '_pile',
+                 '_cle_pieces']
+
+    def __init__(self, fen=FEN_DEPART):
+        self.pieces = [[0] * 7, [0] * 7]   # Couleur -> type de piece -> bitboard
+        self.couleurs = [0, 0]             # Couleur -> bitboard des cases occupees
+        self.cases = [0] * 64              # Case -> type de piece | couleur << 3, ou 0 si elle est vide
+        self._pile = []                    # Ce qu'il faut pour annuler chaque mouvement joue
+        self._cle_pieces = 0               # La part des pieces de la cle de Zobrist
+
+        placement, trait, roques, en_passant, *compteurs = fen.split()
+        for r, rangee in enumerate(placement.split('/')):
+            case = (7 - r) * 8
+            for lettre in rangee:
+                if lettre.isdigit():
+                    case += int(lettre)
+                    continue
+                piece = _PIECES[lettre]
+                self.cases[case] = piece
+                self.pieces[piece >> 3][piece & 7] |= 1 << case
+                self.couleurs[piece >> 3] |= 1 << case
+                self._cle_pieces ^= _ZOBRIST[piece][case]
+                case += 1
+        self.trait = BLANC if trait == 'w' else NOIR
+        # Seuls les droits dont le roi et la tour sont a leur place sont gardes, comme dans chess.Board
+        self.roques = 0
+        for couleur, droits in _ROQUES.items():
+            for (droit, roi, _, tour, _, _), lettre in zip(droits, ('KQ' if couleur else 'kq')):
+                if lettre in roques and self.cases[roi] == ROI | couleur << 3 and \
+                        self.cases[tour] == TOUR | couleur << 3:
+                    self.roques |= droit
+        self.en_passant = -1 if en_passant == '-' else _case(en_passant)
+        self.demi_coups, self.coups = map(int, compteurs or (0, 1))
+
+    def fen(self):
+        """
+        Retourne la FEN de la position. La case en passant n'y est que si une prise en passant est legale, comme dans
+        chess.Board.fen().
+        """
+        rangees = []
+        for r in range(7, -1, -1):
+            rangee, vides = '', 0
+            for piece in self.cases[r * 8:r * 8 + 8]:
+                if piece:
+                    rangee += (str(vides) if vides else '') + _LETTRES[piece]
+                    vides = 0
+                else:
+                    vides += 1
+            rangees.append(rangee + (str(vides) if vides else ''))
+        roques = ''.join(lettre for droit, lettre in zip((_K, _Q, _k, _q), 'KQkq') if self.roques & droit) or '-'
+        en_passant = self._en_passant()
+        en_passant = '-' if en_passant < 0 else _nom(en_passant)
+        return f"{'/'.join(rangees)} {'w' if self.trait else 'b'} {roques} {en_passant} {self.demi_coups} {self.coups}"
+
+    def cle(self):
+        """
+        Retourne la cle de Zobrist de la position, sur 64 bits : les pieces, le trait, les droits de roque et la case
+        en passant si une prise en passant est legale, sans les compteurs. C'est l'identite d'une position pour la
+        regle de la repetition. La part des pieces est tenue a jour a chaque mouvement : seule la case en passant
+        demande de verifier une prise.
+        """
+        h = self._cle_pieces ^ _ZOBRIST_ROQUES[self.roques] ^ (0 if self.trait else zobrist.TRAIT)
+        if self.en_passant >= 0:
+            en_passant = self._en_passant()
+            if en_passant >= 0:
+                h ^= zobrist.EN_PASSANT[en_passant & 7]
+        return h
+
+    def _en_passant(self):
+        """
+        Retourne la case en passant si une prise en passant est legale, sinon -1.
+        """
+        if self.en_passant >= 0:
+            preneurs = _PION[self.trait ^ 1][self.en_passant] & self.pieces[self.trait][PION]
+            while preneurs:
+                bit = preneurs & -preneurs
+                preneurs ^= bit
+                if self.est_legal(bit.bit_length() - 1 | self.en_passant << 6):
+                    return self.en_passant
+        return -1
+
+    def attaquee(self, case, par):
+        """
+        Retourne True si la case est attaquee par une piece de la couleur par.
+        """
+        leurs = self.pieces[par]
+        if _CAVALIER[case] & leurs[CAVALIER] or _ROI[case] & leurs[ROI] or _PION[par ^ 1][case] & leurs[PION]:
+            return True
+        occupation = self.couleurs[0] | self.couleurs[1]
+        return bool(attaques_fou(case, occupation) & (leurs[FOU] | leurs[DAME]) or
+                    attaques_tour(case, occupation) & (leurs[TOUR] | leurs[DAME]))
+
+    def echec(self):
+        """
+        Retourne True si le roi du joueur qui a le trait est en echec.
+        """
+        return self.attaquee(self.pieces[self.trait][ROI].bit_length() - 1, self.trait ^ 1)
+
+    def _attaquants(self, case, par, occupation):
+        """
+        Retourne le bitboard des pieces de la couleur par qui attaquent la case, avec les cases occupees donnees.
+        """
+        leurs = self.pieces[par]
+        return (_CAVALIER[case] & leurs[CAVALIER] | _ROI[case] & leurs[ROI] | _PION[par ^ 1][case] & leurs[PION] |
+                attaques_fou(case, occupation) & (leurs[FOU] | leurs[DAME]) |
+                attaques_tour(case, occupation) & (leurs[TOUR] | leurs[DAME]))
+
+    def _legaux(self, departs=_TOUT):
+        """
+        Retourne les mouvements legaux des pieces du joueur qui a le trait sur les cases departs.
+
+        Les mouvements sont generes pseudo-legaux, mais seulement vers les cases qui parent un echec, et les pieces
+        clouees sur leur roi ne quittent pas la ligne du clouage. Le roi ne va que sur des cases non attaquees. Seules
+        les prises en passant, qui retirent deux pieces d'une rangee, sont jouees pour etre verifiees.
+        """
+        nous = self.trait
+        eux = nous ^ 1
+        nos, leurs = self.pieces[nous], self.pieces[eux]
+        amis = self.couleurs[nous]
+        occupation = amis | self.couleurs[eux]
+        libres = ~occupation & _TOUT
+        roi = nos[ROI].bit_length() - 1
+        codes = []
+        ajoute = codes.append
+
+        # Les cases ou une piece autre que le roi peut aller : toutes, celles qui parent l'echec, ou aucune
+        echecs = self._attaquants(roi, eux, occupation)
+        if not echecs:
+            parades = _TOUT
+        elif echecs & echecs - 1:
+            parades = 0
+        else:
+            parades = echecs | _ENTRE[roi][echecs.bit_length() - 1]
+        # Les pieces clouees : seules entre le roi et une piece adverse qui glisse vers lui
+        cloues = 0
+        tireurs = (attaques_fou(roi, 0) & (leurs[FOU] | leurs[DAME]) |
+                   attaques_tour(roi, 0) & (leurs[TOUR] | leurs[DAME]))
+        while tireurs:
+            bit = tireurs & -tireurs
+            tireurs ^= bit
+            entre = _ENTRE[roi][bit.bit_length() - 1] & occupation
+            if entre and not entre & entre - 1 and entre & amis:
+                cloues |= entre
+
+        pions = nos[PION] & departs
+        if pions and parades:
+            prenables = self.couleurs[eux] & parades
+            # Les cases d'arrivee de tous les pions a la fois, avec l'ecart entre l'arrivee et le depart
+            if nous:
+                simples = pions << 8 & libres
+                cibles = ((simples & parades, 8), ((simples & _RANGEE_3) << 8 & libres & parades, 16),
+                          ((pions & ~_COLONNE_A) << 7 & prenables, 7), ((pions & ~_COLONNE_H) << 9 & prenables, 9))
+            else:
+                simples = pions >> 8 & libres
+                cibles = ((simples & parades, -8), ((simples & _RANGEE_6) >> 8 & libres & parades, -16),
+                          ((pions & ~_COLONNE_A) >> 9 & prenables, -9), ((pions & ~_COLONNE_H) >> 7 & prenables, -7))
+            for arrivees, ecart in cibles:
+                while arrivees:
+                    bit = arrivees & -arrivees
+                    arrivees ^= bit
+                    arrivee = bit.bit_length() - 1
+                    depart = arrivee - ecart
+                    if 1 << depart & cloues and not _LIGNE[roi][depart] & bit:
+                        continue
+                    code = depart | arrivee << 6
+                    if bit & _RANGEES_PROMOTION:
+                        ajoute(code | 4 << 12)
+                        ajoute(code | 3 << 12)
+                        ajoute(code | 2 << 12)
+                        ajoute(code | 1 << 12)
+                    else:
+                        ajoute(code)
+            if self.en_passant >= 0:
+                preneurs = _PION[eux][self.en_passant] & pions
+                while preneurs:
+                    bit = preneurs & -preneurs
+                    preneurs ^= bit
+                    code = bit.bit_length() - 1 | self.en_passant << 6
+                    self.joue(code)
+                    if not self._expose():
+                        ajoute(code)
+                    self.annule()
+
+        if parades:
+            cibles = ~amis & parades
+            for pieces, attaques in ((nos[CAVALIER] & departs & ~cloues, _CAVALIER.__getitem__),
+                                     ((nos[FOU] | nos[DAME]) & departs, lambda case: attaques_fou(case, occupation)),
+                                     ((nos[TOUR] | nos[DAME]) & departs, lambda case: attaques_tour(case, occupation))):
+                while pieces:
+                    bit = pieces & -pieces
+                    pieces ^= bit
+                    depart = bit.bit_length() - 1
+                    arrivees = attaques(depart) & cibles
+                    if bit & cloues:
+                        arrivees &= _LIGNE[roi][depart]
+                    while arrivees:
+                        bit = arrivees & -arrivees
+                        arrivees ^= bit
+                        ajoute(depart | (bit.bit_length() - 1) << 6)
+
+        if nos[ROI] & departs:
+            # Le roi ne compte pas dans l'occupation : il ne peut pas reculer sur le rayon d'une piece qui l'attaque
+            sans_roi = occupation ^ 1 << roi
+            arrivees = _ROI[roi] & ~amis
+            while arrivees:
+                bit = arrivees & -arrivees
+                arrivees ^= bit
+                arrivee = bit.bit_length() - 1
+                if not self._attaquants(arrivee, eux, sans_roi):
+                    ajoute(roi | arrivee << 6)
+            if self.roques and not echecs:
+                for droit, _, arrivee, _, entre, traverse in _ROQUES[nous]:
+                    if self.roques & droit and not occupation & entre and \
+                            not self._attaquants(traverse, eux, occupation) and \
+                            not self._attaquants(arrivee, eux, occupation):
+                        ajoute(roi | arrivee << 6)
+        return codes
+
+    def _expose(self):
+        """
+        Retourne True si le dernier mouvement joue a laisse le roi de celui qui l'a joue en echec.
+        """
+        return self.attaquee(self.pieces[self.trait ^ 1][ROI].bit_length() - 1, self.trait)
+
+    def mouvements(self):
+        """
+        Retourne les mouvements legaux du joueur qui a le trait.
+        """
+        return self._legaux()
+
+    def est_legal(self, code):
+        """
+        Retourne True si le mouvement est legal. Seuls les mouvements de la piece de sa case de depart sont generes.
+        """
+        depart = code & 63
+        return bool(self.couleurs[self.trait] >> depart & 1) and code in self._legaux(1 << depart)
+
+    def joue(self, code):
+        """
+        Joue un mouvement pseudo-legal, sans le verifier.
+        """
+        depart, arrivee, promotion = code & 63, code >> 6 & 63, code >> 12
+        cases, couleurs = self.cases, self.couleurs
+        nous = self.trait
+        eux = nous ^ 1
+        nos, leurs = self.pieces[nous], self.pieces[eux]
+        piece = cases[depart]
+        type_ = piece & 7
+        prise = cases[arrivee]
+        en_passant = self.en_passant
+        cle = self._cle_pieces
+        self._pile.append((code, prise, self.roques, en_passant, self.demi_coups, cle))
+
+        bits = 1 << depart | 1 << arrivee
+        if prise:
+            leurs[prise & 7] ^= 1 << arrivee
+            couleurs[eux] ^= 1 << arrivee
+            cle ^= _ZOBRIST[prise][arrivee]
+        couleurs[nous] ^= bits
+        cases[depart] = 0
+        if promotion:
+            nos[PION] ^= 1 << depart
+            nos[promotion + 1] |= 1 << arrivee
+            cases[arrivee] = promotion + 1 | nous << 3
+            cle ^= _ZOBRIST[piece][depart] ^ _ZOBRIST[promotion + 1 | nous << 3][arrivee]
+        else:
+            nos[type_] ^= bits
+            cases[arrivee] = piece
+            cle ^= _ZOBRIST[piece][depart] ^ _ZOBRIST[piece][arrivee]
+
+        self.en_passant = -1
+        if type_ == PION:
+            self.demi_coups = 0
+            if arrivee == en_passant:
+                case = arrivee - 8 if nous else arrivee + 8
+                leurs[PION] ^= 1 << case
+                couleurs[eux] ^= 1 << case
+                cases[case] = 0
+                cle ^= _ZOBRIST[PION | eux << 3][case]
+            elif arrivee - depart in (16, -16):
+                self.en_passant = (depart + arrivee) >> 1
+        else:
+            self.demi_coups = 0 if prise else self.demi_coups + 1
+            if type_ == ROI and arrivee - depart in (2, -2):
+                tour, case = _TOURS_ROQUE[arrivee]
+                nos[TOUR] ^= 1 << tour | 1 << case
+                couleurs[nous] ^= 1 << tour | 1 << case
+                cases[case], cases[tour] = cases[tour], 0
+                cle ^= _ZOBRIST[TOUR | nous << 3][tour] ^ _ZOBRIST[TOUR | nous << 3][case]
+        self._cle_pieces = cle
+        self.roques &= _GARDE_ROQUES[depart] & _GARDE_ROQUES[arrivee]
+        self.coups += eux   # Apres un mouvement des noirs
+        self.trait = eux
+
+    def annule(self):
+        """
+        Annule le dernier mouvement joue.
+        """
+        code, prise, self.roques, en_passant, self.demi_coups, self._cle_pieces = self._pile.pop()
+        self.en_passant = en_passant
+        depart, arrivee, promotion = code & 63, code >> 6 & 63, code >> 12
+        cases, couleurs = self.cases, self.couleurs
+        eux = self.trait
+        nous = eux ^ 1
+        self.trait = nous
+        self.coups -= eux
+        nos, leurs = self.pieces[nous], self.pieces[eux]
+        piece = cases[arrivee]
+        type_ = piece & 7
+
+        bits = 1 << depart | 1 << arrivee
+        couleurs[nous] ^= bits
+        if promotion:
+            nos[type_] ^= 1 << arrivee
+            nos[PION] |= 1 << depart
+            cases[depart] = PION | nous << 3
+        else:
+            nos[type_] ^= bits
+            cases[depart] = piece
+        cases[arrivee] = prise
+        if prise:
+            leurs[prise & 7] |= 1 << arrivee
+            couleurs[eux] |= 1 << arrivee
+        elif type_ == PION and arrivee == en_passant:
+            case = arrivee - 8 if nous else arrivee + 8
+            leurs[PION] |= 1 << case
+            couleurs[eux] |= 1 << case
+            cases[case] = PION | eux << 3
+        elif type_ == ROI and arrivee - depart in (2, -2):
+            tour, case = _TOURS_ROQUE[arrivee]
+            nos[TOUR] ^= 1 << tour | 1 << case
+            couleurs[nous] ^= 1 << tour | 1 << case
+            cases[tour], cases[case] = cases[case], 0
+
+
+def perft(position, profondeur):
+    """
+    Retourne le nombre de suites de mouvements legaux de la profondeur donnee depuis la position, qui est rendue dans
+    son etat de depart.
+    """
+    mouvements = position.mouvements()
+    if profondeur <= 1:
+        return len(mouvements) if profondeur == 1 else 1
+    total = 0
+    for code in mouvements:
+        position.joue(code)
+        total += perft(position, profondeur - 1)
+        position.annule()
+    return total
@@ -1,9 +1,26 @@
 """
 Ce module definit une simple blockchain.
+
+Les signatures sont calculees par le module digest : elles sont identiques d'un processus a l'autre, ce qui permet a
+deux noeuds du reseau de verifier la meme chaine.
+
+Une chaine peut etre enregistree sur le disque par un journal (voir storage) : chaque bloc y est ajoute lorsqu'il est
+scelle, et la chaine est rechargee a partir du journal au demarrage.
 """
-import random
+import concurrent.futures
+import os
 import time
-import patricia_trie as pm
+
+try:
+    import ti103_chess.digest as digest
+    import ti103_chess.patricia_trie as pm
+    import ti103_chess.storage as storage
+    import ti103_chess.trie_compact as tc
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import digest
+    import patricia_trie as pm
+    import storage
+    import trie_compact as tc
 
 
 class Block:
@@ -12,26 +29,66 @@ class Block:
 
     Un bloc est definit par un index, une serie de transaction (ici des parties d'echec), un horodatage et retient
     aussi le hachage du bloc precedent pour le proteger
+
+    Un bloc relu depuis un journal a pour transactions un arbre compact, en lecture seule : il est deja scelle.
     """
-    def __init__(self, index, previous_hash):
+    def __init__(self, index, previous_hash, transactions=None, horodatage=None):
         self.index = index
-        self.transactions = pm.PatriciaMerkleTrie('')
-        self.time = time.time()    # Enregistre le temps de creation du bloc
+        self.transactions = transactions if transactions is not None else pm.PatriciaMerkleTrie('')
+        self.time = horodatage if horodatage is not None else time.time()  # Enregistre le temps de creation du bloc
         self.previous_hash = previous_hash
 
     def hash(self):
         """
         Retourne la signature de ce bloc.
 
-        La signature du bloc ici est le hachage de la somme des hachages de ses elements.
-        1. Le hachage de l'index
+        La signature du bloc ici est le hachage de l'encodage canonique de ses elements (voir digest.empreinte_bloc).
+        1. L'index
         2. La signature du noeud racine de l'arbre de Patricia Merkle, qui est deja un hachage ! On decouvre la
            complementarite des deux structures.
-        3. Le hachage de l'horodatage, pour introduire de l'imprevisibilite, et esperer empecher un cassage trop facile
-           de notre systeme.
-        4. Le hachage du bloc precedent.
+        3. L'horodatage, pour introduire de l'imprevisibilite, et esperer empecher un cassage trop facile de notre
+           systeme.
+        4. La signature du bloc precedent.
         """
-        return hash(hash(self.index) + self.transactions.hash() + hash(self.time) + self.previous_hash)
+        return digest.empreinte_bloc(self.index, self.time, self.transactions.hash(), self.previous_hash)
+
+
+class _ChaineJournal:
+    """
+    La liste des blocs d'une chaine enregistree dans un journal.
+
+    Les blocs deja scelles a l'ouverture ne sont relus dans le journal que lorsqu'on les consulte : ouvrir une chaine
+    de plusieurs centaines de milliers de blocs ne coute presque rien. Les blocs ajoutes ensuite restent en memoire.
+    """
+    def __init__(self, journal):
+        self.journal = journal
+        self.scelles = len(journal)
+        self.nouveaux = []
+
+    def __len__(self):
+        return self.scelles + len(self.nouveaux)
+
+    def __getitem__(self, rang):
+        if isinstance(rang, slice):
+            return [self[k] for k in range(*rang.indices(len(self)))]
+
+        if rang < 0:
+            rang += len(self)
+        if not 0 <= rang < len(self):
+            raise IndexError(f"Aucun bloc de rang {rang} dans la chaine")
+
+        if rang >= self.scelles:
+            return self.nouveaux[rang - self.scelles]
+
+        index, horodatage, precedent, _, transactions = self.journal.lit(rang)
+        return Block(index, precedent, transactions, horodatage)
+
+    def __iter__(self):
+        for rang in range(len(self)):
+            yield self[rang]
+
+    def append(self, bloc):
+        self.nouveaux.append(bloc)
 
 
 class BlockChain:
@@ -39,10 +96,27 @@ class BlockChain:
     Cette classe definit une blockchain.
 
     Elle demeure extremement simplissime. Donc a utiliser a vos risques et perils.
+
+    Avec un journal, les blocs deja scelles sont relus depuis le disque, a la demande, et un nouveau bloc ouvert leur
+    est ajoute.
     """
-    def __init__(self):
-        self.index = 1
-        self.chain = [Block(self.index, random.random())]
+    def __init__(self, journal=None):
+        self.journal = journal
+        self.chain = [] if journal is None else _ChaineJournal(journal)
+        if len(self.chain) == 0:
+            self.index = 1
+            self.chain.append(Block(self.index, os.urandom(digest.TAILLE)))  # Le premier bloc n'a pas de precedent
+
+        else:
+            self.index = self.head().index + 1
+            self.chain.append(Block(self.index, self.head().hash()))
+
+    @classmethod
+    def ouvre(cls, dossier, **options):
+        """
+        Ouvre, ou cree, une chaine enregistree dans un dossier. Les options sont celles de storage.Journal.
+        """
+        return cls(storage.Journal(dossier, **options))
 
     def head(self):
         """
@@ -53,17 +127,124 @@ class BlockChain:
     def new(self):
         """
         Ajoute un nouveau bloc a la chaine et scelle le precedent en lui definissant un hash.
+
+        Le journal n'enregistre que des arbres de mouvements UCI (voir trie_compact) : si le bloc en contient d'autres,
+        comme 'e4', leve ValueError et la chaine reste telle quelle.
         """
+        if self.journal is not None:
+            try:
+                self.journal.ajoute(self.head())
+            except ValueError as erreur:
+                raise ValueError(f"Le bloc {self.index} ne peut pas etre enregistre dans le journal, qui n'accepte "
+                                 f"que des mouvements UCI : {erreur}") from None
         self.index += 1   # self.index = self.index + 1
         self.chain.append(Block(self.index, self.head().hash()))
 
+    def verify(self, processus=None, plages_par_processus=4):
+        """
+        Verifie l'integrite de la chaine et retourne le rang (dans chain) du premier bloc corrompu, ou None si la
+        chaine est intacte.
+
+        Pour chaque bloc scelle, on recalcule les signatures de son arbre a partir des mouvements, puis la signature
+        du bloc, que l'on compare a celle enregistree dans le journal et a celle retenue par le bloc suivant.
+
+        La chaine est decoupee en plages verifiees en parallele par un groupe de processus. Chaque processus relit ses
+        blocs directement dans le journal ; sans journal, les blocs lui sont envoyes au format compact. Seuls les
+        liens entre deux plages sont verifies ici. Une chaine en memoire dont les arbres ne sont pas tous en UCI n'a
+        pas de format compact : elle est verifiee dans ce processus, par les liens entre ses blocs.
+        """
+        processus = processus or os.cpu_count() or 1
+        scelles = len(self.chain) - 1
+        taille = max(1, -(-scelles // (processus * plages_par_processus)))
+        plages = [(debut, min(debut + taille, scelles)) for debut in range(0, scelles, taille)]
+
+        if self.journal is not None:
+            self.journal.synchronise()
+            taches = [(digest.algorithme(), debut, fin, self.journal.dossier, None) for debut, fin in plages]
+        else:
+            try:
+                enregistrements = [_enregistrement(bloc) for bloc in self.chain[:scelles]]
+            except ValueError:
+                return self._verifie_liens()
+            taches = [(digest.algorithme(), debut, fin, None, enregistrements[debut:fin]) for debut, fin in plages]
+
+        if processus == 1:
+            resultats = [_verifie_plage(*tache) for tache in taches]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(processus) as executeur:
+                resultats = list(executeur.map(_verifie_plage, *zip(*taches)))
+
+        signature = None
+        for (debut, _), (corrompu, precedent, derniere) in zip(plages, resultats):
+            if debut > 0 and precedent != signature:
+                return debut
+            if corrompu is not None:
+                return corrompu
+            signature = derniere
+
+        if scelles and self.head().previous_hash != signature:
+            return scelles
+        return None
+
+    def _verifie_liens(self):
+        """
+        Verifie en memoire que chaque bloc retient la signature du precedent, et retourne le rang du premier bloc dont
+        le lien est rompu, ou None.
+        """
+        for rang in range(1, len(self.chain)):
+            if self.chain[rang].previous_hash != self.chain[rang - 1].hash():
+                return rang
+        return None
+
+
+def _enregistrement(bloc):
+    """
+    Retourne un bloc sous la forme lue dans un journal, sans signature enregistree, l'arbre etant au format compact.
+    """
+    transactions = bloc.transactions
+    if isinstance(transactions, pm.PatriciaMerkleTrie):
+        transactions = tc.TrieCompact.depuis_trie(transactions)
+    return bloc.index, bloc.time, bloc.previous_hash, None, transactions.octets()
+
+
+def _verifie_plage(algorithme, debut, fin, dossier, blocs):
+    """
+    Verifie les blocs de rang debut a fin exclu, lus dans le journal d'un dossier ou passes dans blocs.
+
+    Retourne le rang du premier bloc corrompu (ou None), la signature du bloc precedent retenue par le premier bloc
+    de la plage, et la signature recalculee du dernier.
+    """
+    digest.utilise(algorithme)
+    if dossier is not None:
+        journal = storage.Journal(dossier, lecture_seule=True)
+        blocs = (journal.lit(rang) for rang in range(debut, fin))
+
+    premier = signature = None
+    for rang, (index, horodatage, precedent, enregistree, arbre) in enumerate(blocs, debut):
+        if not isinstance(arbre, tc.TrieCompact):
+            arbre = tc.TrieCompact.depuis_octets(arbre)
+
+        if rang == debut:
+            premier = precedent
+        elif precedent != signature:
+            return rang, premier, None
+
+        if arbre.recalcule() is not None:
+            return rang, premier, None
+
+        signature = digest.empreinte_bloc(index, horodatage, arbre.hash(), precedent)
+        if enregistree is not None and enregistree != signature:
+            return rang, premier, None
+
+    return None, premier, signature
+
 
 if __name__ == "__main__":
     b = BlockChain()
-    print("Signature du premier bloc :                    ", b.head().hash())
+    print("Signature du premier bloc :                    ", b.head().hash().hex())
     b.new()
-    print("Signature du deuxieme bloc :                   ", b.head().hash())
-    print("Signature du bloc precedent le deuxieme bloc : ", b.head().previous_hash)
+    print("Signature du deuxieme bloc :                   ", b.head().hash().hex())
+    print("Signature du bloc precedent le deuxieme bloc : ", b.head().previous_hash.hex())
     b.chain[0].transactions.add("e4")
 
-    print("Nouvelle signature du premier bloc :           ", b.chain[0].hash())
+    print("Nouvelle signature du premier bloc :           ", b.chain[0].hash().hex())
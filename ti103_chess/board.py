@@ -22,9 +22,15 @@ Les pions ne peuvent pas reculer lors des captures ou des mouvements. En atteign
 dans n'importe quelle autre pièce, sauf pour un roi. De plus, les pions peuvent effectuer un mouvement spécial nommé En Passant.
 """
 import chess
+import os
 import pygame
 import sys
 
+try:
+    import ti103_chess.bitboard as bitboard
+except ImportError:   # Lancé comme un script depuis le dossier du package, comme client.py
+    import bitboard
+
 
 # Nous codons le dictionnaire qui représente les pièces d'échecs. Les initiales sont utilisées pour décrire la pièce lorsqu'elle est
 #en mouvement. Par exemple 'e5' représente le mouvement d'un pion vers la case e5, tandis que Nb3 représente le mouvement
@@ -38,6 +44,34 @@ piece_initiale = {
     'Pion': ''
 }
 
+# Le nom de chaque type de pièce du moteur chess
+noms_pieces = {
+    chess.KING: 'Roi',
+    chess.QUEEN: 'Dame',
+    chess.BISHOP: 'Fou',
+    chess.KNIGHT: 'Cavalier',
+    chess.ROOK: 'Tour',
+    chess.PAWN: 'Pion'
+}
+
+
+# La position des images de chaque type de pièce (colonne) et de chaque couleur (rangée) dans ressources/img.png
+_COLONNES = {'Roi': 68, 'Dame': 234, 'Tour': 400, 'Fou': 566, 'Cavalier': 736, 'Pion': 902}
+_RANGEES = {'Noir': 70, 'Blanc': 214}
+
+# Les caches du processus : l'image des pièces, chargée au premier besoin, les images de chaque pièce par (nom,
+# couleur, taille) et la surface de l'échiquier vide par taille de case
+_atlas = None
+_sprites = {}
+_fonds = {}
+
+
+def coordonnees(case):
+    """
+    Renvoie les coordonnées à l'écran du coin supérieur gauche d'une case, par exemple 'e4'.
+    """
+    return (ord(case[0]) - 97) * 85, 680 - int(case[1]) * 85
+
 
 class Piece:
     """
@@ -85,141 +119,218 @@ class Echiquier:
     """
     Représente un échiquier.
     """
-    def __init__(self, ecran, echiquier, image):
+    def __init__(self, ecran, echiquier=None, image=None):
         self.make_move = False
         self.move_coord = ""
         self.last_move = ""
-        self.moteur = chess.Board()  # Le moteur validera si les mouvements sont valides.
+        self.curr_pos = None         # Case de la pièce saisie par le joueur, jusqu'à ce qu'il la relâche
+        self.complet = True          # Tout l'écran est à redessiner, par exemple au premier affichage
+        self.sales = []              # Sinon, les cases à redessiner à la prochaine image
+        self.moteur = chess.Board()  # Le moteur garde la partie jouée.
+        self.position = bitboard.Position()  # La même position en bitboards validera si les mouvements sont valides.
         self.ecran = ecran
-        self.echiquier = echiquier
-        self.pieces = [Piece("Roi",      "Noir",  85 * 4, 0,      85, self._image(image, (68, 70, 85, 85)),   ecran),
-                       Piece("Dame",     "Noir",  85 * 3, 0,      85, self._image(image, (234, 70, 85, 85)),  ecran),
-                       Piece("Tour",     "Noir",  85 * 0, 0,      85, self._image(image, (400, 70, 85, 85)),  ecran),
-                       Piece("Tour",     "Noir",  85 * 7, 0,      85, self._image(image, (400, 70, 85, 85)),  ecran),
-                       Piece("Fou",      "Noir",  85 * 2, 0,      85, self._image(image, (566, 70, 85, 85)),  ecran),
-                       Piece("Fou",      "Noir",  85 * 5, 0,      85, self._image(image, (566, 70, 85, 85)),  ecran),
-                       Piece("Cavalier", "Noir",  85 * 1, 0,      85, self._image(image, (736, 70, 85, 85)),  ecran),
-                       Piece("Cavalier", "Noir",  85 * 6, 0,      85, self._image(image, (736, 70, 85, 85)),  ecran),
-                       Piece("Pion",     "Noir",  85 * 0, 85,     85, self._image(image, (902, 70, 85, 85)),  ecran),
-                       Piece("Pion",     "Noir",  85 * 1, 85,     85, self._image(image, (902, 70, 85, 85)),  ecran),
-                       Piece("Pion",     "Noir",  85 * 2, 85,     85, self._image(image, (902, 70, 85, 85)),  ecran),
-                       Piece("Pion",     "Noir",  85 * 3, 85,     85, self._image(image, (902, 70, 85, 85)),  ecran),
-                       Piece("Pion",     "Noir",  85 * 4, 85,     85, self._image(image, (902, 70, 85, 85)),  ecran),
-                       Piece("Pion",     "Noir",  85 * 5, 85,     85, self._image(image, (902, 70, 85, 85)),  ecran),
-                       Piece("Pion",     "Noir",  85 * 6, 85,     85, self._image(image, (902, 70, 85, 85)),  ecran),
-                       Piece("Pion",     "Noir",  85 * 7, 85,     85, self._image(image, (902, 70, 85, 85)),  ecran),
-                       Piece("Roi",      "Blanc", 85 * 4, 85 * 7, 85, self._image(image, (68, 214, 85, 85)),  ecran),
-                       Piece("Dame",     "Blanc", 85 * 3, 85 * 7, 85, self._image(image, (234, 214, 85, 85)), ecran),
-                       Piece("Tour",     "Blanc", 85 * 0, 85 * 7, 85, self._image(image, (400, 214, 85, 85)), ecran),
-                       Piece("Tour",     "Blanc", 85 * 7, 85 * 7, 85, self._image(image, (400, 214, 85, 85)), ecran),
-                       Piece("Fou",      "Blanc", 85 * 2, 85 * 7, 85, self._image(image, (566, 214, 85, 85)), ecran),
-                       Piece("Fou",      "Blanc", 85 * 5, 85 * 7, 85, self._image(image, (566, 214, 85, 85)), ecran),
-                       Piece("Cavalier", "Blanc", 85 * 1, 85 * 7, 85, self._image(image, (736, 214, 85, 85)), ecran),
-                       Piece("Cavalier", "Blanc", 85 * 6, 85 * 7, 85, self._image(image, (736, 214, 85, 85)), ecran),
-                       Piece("Pion",     "Blanc", 85 * 0, 85 * 6, 85, self._image(image, (902, 214, 85, 85)), ecran),
-                       Piece("Pion",     "Blanc", 85 * 1, 85 * 6, 85, self._image(image, (902, 214, 85, 85)), ecran),
-                       Piece("Pion",     "Blanc", 85 * 2, 85 * 6, 85, self._image(image, (902, 214, 85, 85)), ecran),
-                       Piece("Pion",     "Blanc", 85 * 3, 85 * 6, 85, self._image(image, (902, 214, 85, 85)), ecran),
-                       Piece("Pion",     "Blanc", 85 * 4, 85 * 6, 85, self._image(image, (902, 214, 85, 85)), ecran),
-                       Piece("Pion",     "Blanc", 85 * 5, 85 * 6, 85, self._image(image, (902, 214, 85, 85)), ecran),
-                       Piece("Pion",     "Blanc", 85 * 6, 85 * 6, 85, self._image(image, (902, 214, 85, 85)), ecran),
-                       Piece("Pion",     "Blanc", 85 * 7, 85 * 6, 85, self._image(image, (902, 214, 85, 85)), ecran)]
+        self.echiquier = fond() if echiquier is None else echiquier
+        # Une image par type de pièce et par couleur. Sans image des pièces donnée, les sprites sont ceux du cache
+        # partagé par tous les échiquiers du processus.
+        self.images = {(nom, couleur): sprite(nom, couleur) if image is None else
+                       self._image(image, (_COLONNES[nom], _RANGEES[couleur], 85, 85))
+                       for nom in _COLONNES for couleur in _RANGEES}
+        # L'index des pièces par case (les cases du moteur chess, de a1 = 0 à h8 = 63), tenu à jour à chaque mouvement
+        self._place()
+
+    @property
+    def pieces(self):
+        """
+        Les pièces encore sur l'échiquier, dans l'ordre des cases.
+        """
+        return [p for p in self.cases if p is not None]
 
     def jouer(self,colour):
         """
-        C'est là que se trouve la boucle de jeu, dans laquelle l'image de l'échiquier est rafraîchie.
+        C'est là que se trouve la boucle de jeu, dans laquelle l'image de l'échiquier est rafraîchie. Elle se termine
+        quand le joueur a fait un mouvement valide. Les clients utilisent plutôt la boucle non bloquante du module
+        boucle, qui reçoit aussi les mouvements du serveur.
         """
         play = True
         while play:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     sys.exit(0)
-
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    # Mouse click or press
-                    if event.button == 1:
-                        x, y = event.pos
-                        print(x, y)
-                        print("self.moteur = ", self.moteur)
-                        print("From position: ", chr(97 + (x // 85)) + str(((680 - y) // 85) + 1))
-                        curr_pos = chr(97 + (x // 85)) + str(((680 - y) // 85) + 1)
-
-
-                elif event.type == pygame.MOUSEBUTTONUP:
-                    # Mouse release
-                    if event.button == 1:
-                        x, y = event.pos
-                        print(x, y)
-                        # Calcul de la position finale en divisant par 85 (longueur du côté du carré)
-                        # l'entier le plus proche juste en dessous de la valeur doit être comme type: int ()
-                        x_new = int(x / 85) * 85
-                        y_new = int(y / 85) * 85
-                        # print("To position: ", chr(97 + (x // 85)) + str(((680 - y) // 85) + 1))
-                        final_pos = chr(97 + (x // 85)) + str(((680 - y) // 85) + 1)
-                        check_move = curr_pos + final_pos
-                        # print("check move", check_move)
-                        new_pos = 0
-                        for p in self.pieces:
-                            # Obtenir la pièce dans la position donnée calculée comme curr_pos
-                            print("p.get_colour()",p.get_colour())
-                            print("get_colour()",colour)
-
-                            if p.case() == curr_pos and p.get_colour()==colour:
-                                valid_moves = self.moteur.generate_legal_moves()
-                                move_made = chess.Move.from_uci(check_move)
-                                self.make_move = False
-                                for k in valid_moves:
-                                    print("k =", k)
-                                    if k == move_made:
-                                        self.make_move = True
-                                if self.make_move:
-                                    p.x = x_new
-                                    p.y = y_new
-                                    self.moteur.push(move_made)
-                                    self.pieces[new_pos] = p
-                                    self.last_move = check_move
-                                    # Si la valeur x n'est pas de 3 chiffres, faites-en 3 en mettant un 0 avant la valeur
-                                    # First the x and y values are converted to strings
-                                    x_new_str = str(x_new)
-                                    y_new_str = str(y_new)
-                                    # Mettre 0 jusqu'à ce que la longueur soit de 3
-                                    while len(x_new_str)<3:
-                                        x_new_str = "0" + x_new_str
-                                    while len(y_new_str) < 3:
-                                         y_new_str = "0" + x_new_str
-                                    # C'est la chaîne qui est passée au serveur
-                                    self.move_coord = str(x_new_str) + str(y_new_str)
-
-                                    play = False
-                            new_pos += 1
+                if self.traite(event, colour):
+                    play = False
             self.update_screen()
 
-    def make_auto_move(self, data):
-        print("data =",data)
-        curr_pos = data[0:2]
-        print("curr_pos new",curr_pos)
-        check_move = data[0:4]
-        x_new = int(data[4:7])
-        y_new = int(data[7:10])
-        new_pos = 0
-        for p in self.pieces:
+    def traite(self, event, colour):
+        """
+        Traite un événement de la souris, sans attendre le suivant. Renvoie True si le joueur vient de faire un
+        mouvement valide : il est alors joué sur le moteur, et gardé dans last_move.
+        """
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            # La fenêtre a été recouverte : tout est à redessiner
+            self.complet = True
+
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            # Mouse click or press
+            x, y = event.pos
+            self.curr_pos = chr(97 + (x // 85)) + str(((680 - y) // 85) + 1)
+
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.curr_pos is not None:
+            # Mouse release
+            x, y = event.pos
+            # Calcul de la position finale en divisant par 85 (longueur du côté du carré)
+            # l'entier le plus proche juste en dessous de la valeur doit être comme type: int ()
+            x_new = int(x / 85) * 85
+            y_new = int(y / 85) * 85
+            final_pos = chr(97 + (x // 85)) + str(((680 - y) // 85) + 1)
+            check_move = self.curr_pos + final_pos
+            self.curr_pos = None
+            self.make_move = False
             # Obtenir la pièce dans la position donnée calculée comme curr_pos
-            if p.case() == curr_pos:
-                move_made = chess.Move.from_uci(check_move)
-                p.x = x_new
-                p.y = y_new
-                self.moteur.push(move_made)
-                self.pieces[new_pos] = p
-                self.last_move = check_move
-            new_pos += 1
+            depart, arrivee = chess.parse_square(check_move[:2]), chess.parse_square(check_move[2:4])
+            p = self.cases[depart]
+            if p is None or p.get_colour() != colour or depart == arrivee:
+                return False
+            move_made = chess.Move(depart, arrivee)
+            if p.nom == 'Pion' and chess.square_rank(arrivee) in (0, 7):
+                move_made.promotion = chess.QUEEN   # Le pion est promu en dame
+            if self.position.est_legal(bitboard.code(move_made)):
+                self.make_move = True
+                self._joue(move_made)
+                # C'est la chaîne de l'ancien format, avec les coordonnées de la pièce sur 3 chiffres chacune
+                self.move_coord = str(x_new).zfill(3) + str(y_new).zfill(3)
+            return self.make_move
+        return False
+
+    def make_auto_move(self, data):
+        """
+        Joue le mouvement UCI reçu de l'autre joueur et rafraîchit l'écran.
+        """
+        self.deplace(data)
+        self.update_screen()
+
+    def rattrape(self, mouvements):
+        """
+        Joue d'un coup les mouvements manqués pendant une déconnexion, puis rafraîchit l'écran une seule fois.
+        """
+        for mouvement in mouvements:
+            self.deplace(mouvement)
+        self.update_screen()
+
+    def deplace(self, data):
+        """
+        Joue un mouvement UCI sur le moteur et déplace la pièce, sans rafraîchir l'écran. Les coordonnées de la pièce
+        à l'écran sont déduites de sa case d'arrivée ; celles de l'ancien format (6 chiffres après le mouvement) sont
+        ignorées. Lève ValueError si le mouvement est illégal : l'échiquier ne suit plus celui du serveur.
+        """
+        check_move = data[:-6] if len(data) > 6 and data[-6:].isdigit() else data
+        move_made = chess.Move.from_uci(check_move)
+        if not self.position.est_legal(bitboard.code(move_made)):
+            raise ValueError(f"Mouvement illégal dans la position de l'échiquier : {check_move}")
+        self._joue(move_made)
+
+    def _joue(self, move):
+        """
+        Joue un mouvement légal sur le moteur et tient l'index des cases à jour : la pièce prise est retirée, y compris
+        en passant, la tour suit le roi qui roque et le pion promu change de pièce. Les cases touchées sont marquées.
+        """
+        piece = self.cases[move.from_square]
+        if self.moteur.is_en_passant(move):
+            prise = chess.square(chess.square_file(move.to_square), chess.square_rank(move.from_square))
+            self.cases[prise] = None
+            self.marque(prise)
+        self._pose(move.from_square, move.to_square)
+        if self.moteur.is_castling(move):
+            rangee = chess.square_rank(move.from_square)
+            if chess.square_file(move.to_square) > chess.square_file(move.from_square):
+                self._pose(chess.square(7, rangee), chess.square(5, rangee))
+            else:
+                self._pose(chess.square(0, rangee), chess.square(3, rangee))
+        if move.promotion:
+            piece.nom = noms_pieces[move.promotion]
+            piece.image = self.images[(piece.nom, piece.couleur)]
+        self.moteur.push(move)
+        self.position.joue(bitboard.code(move))
+        self.last_move = move.uci()
+
+    def _pose(self, depart, arrivee):
+        """
+        Déplace la pièce d'une case à une autre dans l'index et à l'écran. Une pièce sur la case d'arrivée est prise.
+        """
+        piece = self.cases[arrivee] = self.cases[depart]
+        self.cases[depart] = None
+        piece.x = chess.square_file(arrivee) * 85
+        piece.y = (7 - chess.square_rank(arrivee)) * 85
+        self.marque(depart, arrivee)
+
+    def synchronise(self, fen, coups=None):
+        """
+        Replace toutes les pièces selon la position de référence du serveur, par exemple après un mouvement refusé.
+
+        Si les mouvements de la partie sont donnés, ils sont rejoués depuis la position de départ : le moteur garde
+        ainsi le numéro du dernier demi-coup, que le serveur attend avec chaque mouvement. Une FEN seule ne le donne
+        pas ; elle ne sert que si les mouvements ne mènent pas à la position de référence. Sans FEN, la position de
+        référence est celle où mènent les mouvements, et ValueError est levée si l'un d'eux est illégal.
+        """
+        self.moteur = chess.Board()
+        try:
+            for mouvement in coups if coups is not None else ():
+                self.moteur.push_uci(mouvement)
+        except ValueError:
+            if fen is None:
+                raise
+            coups = None
+        if fen is not None and (coups is None or self.moteur.fen() != fen):
+            self.moteur = chess.Board(fen)
+        self.position = bitboard.Position(self.moteur.fen())
+        self._place()
+        self.make_move = False
+        self.complet = True
         self.update_screen()
 
+    def _place(self):
+        """
+        Place les pièces selon la position du moteur, dans l'index des cases.
+        """
+        self.cases = [None] * 64
+        for case, piece in self.moteur.piece_map().items():
+            nom = noms_pieces[piece.piece_type]
+            couleur = "Blanc" if piece.color else "Noir"
+            x = chess.square_file(case) * 85
+            y = (7 - chess.square_rank(case)) * 85
+            self.cases[case] = Piece(nom, couleur, x, y, 85, self.images[(nom, couleur)], self.ecran)
+
+    def marque(self, *cases):
+        """
+        Marque des cases du moteur, par exemple chess.E2 et chess.E4, comme à redessiner à la prochaine image.
+        """
+        self.sales.extend(cases)
+
     def update_screen(self):
+        """
+        Redessine ce qui a changé depuis la dernière image : seules les cases marquées sont redessinées puis passées
+        à pygame.display.update, et rien n'est fait si rien n'a changé. Renvoie True si quelque chose a été dessiné.
+        """
+        if self.complet:
             self.ecran.fill((255, 255, 255))
             self.ecran.blit(self.echiquier, self.echiquier.get_rect())
 
             [p.affiche() for p in self.pieces]
             pygame.display.update()
+        elif self.sales:
+            rects = []
+            for case in set(self.sales):
+                # Le fond de la case, puis la pièce qui s'y trouve
+                r = pygame.Rect(chess.square_file(case) * 85, (7 - chess.square_rank(case)) * 85, 85, 85)
+                self.ecran.blit(self.echiquier, r, r)
+                if self.cases[case] is not None:
+                    self.cases[case].affiche()
+                rects.append(r)
+            pygame.display.update(rects)
+        else:
+            return False
+        self.complet = False
+        self.sales = []
+        return True
 
     def _image(self, image, pos):
         """
@@ -231,30 +342,60 @@ class Echiquier:
         return obj
 
 
-def nouvelle_partie(sid):
+def sprite(nom, couleur, taille=85):
     """
-    C'est là que nous créons un nouveau jeu.
-    La fonction renvoie un échiquier et ses pièces disposées pour démarrer une partie.
+    Renvoie l'image d'une pièce, par exemple ('Cavalier', 'Blanc'), de taille pixels de côté.
+    Les images sont découpées une seule fois dans l'image des pièces, chargée au premier besoin, puis partagées par
+    tous les échiquiers du processus : elles ne sont jamais modifiées, seulement affichées.
     """
-    pygame.init()                                # Initialisation du moteur de jeu pygame
-    ecran = pygame.display.set_mode((680, 680))  # On cree une fenetre de 680 pixel par 680 pixels
-    pygame.display.set_caption("Echecs : " + sid)         # Le titre de la fenetre s'appelle Echecs
+    global _atlas
+    cle = (nom, couleur, taille)
+    image = _sprites.get(cle)
+    if image is None:
+        if _atlas is None:
+            _atlas = pygame.image.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ressources",
+                                                    "img.png")).convert()
+        image = pygame.Surface((85, 85)).convert()
+        image.blit(_atlas, (0, 0), (_COLONNES[nom], _RANGEES[couleur], 85, 85))
+        if taille != 85:
+            image = pygame.transform.smoothscale(image, (taille, taille))
+        image = _sprites[cle] = image
+    return image
 
-    echiquier = pygame.Surface((680, 680))       # On definit une surface a l'ecran pour representer l'echiquier
-    echiquier.fill((175, 141, 120))              # Que l'on peint en marron (uni) voici le RGB(175, 141, 120)
 
-    # Les lignes suivantes vous permettent de peindre les cases de l'échiquier dans un marron légèrement différent
-    # précédemment défini
-    for x in range(0, 8, 2):
-        for y in range(0, 8, 2):
-            pygame.draw.rect(echiquier, (250, 240, 230), (x * 85, y * 85, 85, 85))
+def fond(taille=85):
+    """
+    Renvoie la surface de l'échiquier vide, dont les cases ont taille pixels de côté. Elle est peinte une seule fois,
+    puis partagée comme les images des pièces.
+    """
+    echiquier = _fonds.get(taille)
+    if echiquier is None:
+        echiquier = pygame.Surface((8 * taille, 8 * taille))   # On definit une surface pour representer l'echiquier
+        echiquier.fill((175, 141, 120))                         # Que l'on peint en marron (uni) RGB(175, 141, 120)
 
-    for x in range(1, 9, 2):
-        for y in range(1, 9, 2):
-            pygame.draw.rect(echiquier, (250, 240, 230), (x * 85, y * 85, 85, 85))
+        # Les lignes suivantes vous permettent de peindre les cases de l'échiquier dans un marron légèrement différent
+        # précédemment défini
+        for x in range(8):
+            for y in range(x % 2, 8, 2):
+                pygame.draw.rect(echiquier, (250, 240, 230), (x * taille, y * taille, taille, taille))
+        _fonds[taille] = echiquier
+    return echiquier
+
+
+def nouvelle_partie(sid):
+    """
+    C'est là que nous créons un nouveau jeu.
+    La fonction renvoie un échiquier et ses pièces disposées pour démarrer une partie. La fenêtre n'est créée qu'à la
+    première partie, et les images de l'échiquier et des pièces viennent du cache du processus.
+    """
+    ecran = pygame.display.get_surface()
+    if ecran is None or ecran.get_size() != (680, 680):
+        pygame.init()                                # Initialisation du moteur de jeu pygame
+        ecran = pygame.display.set_mode((680, 680))  # On cree une fenetre de 680 pixel par 680 pixels
+    pygame.display.set_caption("Echecs : " + sid)         # Le titre de la fenetre s'appelle Echecs
 
     #Ici, nous créons enfin le jeu d'échecs ainsi que les nouvelles pièces à afficher
-    return Echiquier(ecran, echiquier, pygame.image.load("ressources/img.png").convert())
+    return Echiquier(ecran)
 
 
 if __name__ == '__main__':
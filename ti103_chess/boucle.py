@@ -0,0 +1,139 @@
+"""
+Ce module est la boucle du client de jeu : une seule boucle, a cadence fixe, qui lit la souris, joue les mouvements
+recus du serveur et rafraichit l'ecran.
+
+Avant, Echiquier.jouer attendait le mouvement du joueur dans sa propre boucle, pendant que les fonctions de socketio
+jouaient les mouvements de l'adversaire et rafraichissaient l'ecran depuis le fil du client reseau, en meme temps.
+Desormais, le fil reseau ne touche plus a l'echiquier : il depose ses messages dans une file (queue.Queue), que la
+boucle vide au debut de chaque image. Seule la boucle modifie l'echiquier et dessine, et elle n'attend jamais le
+reseau : chaque mouvement du joueur est remis a la fonction envoie, qui doit seulement le mettre dans la file d'envoi
+du client socketio (comme sio.emit).
+
+Les mouvements recus portent leur numero de demi-coup : ceux que l'echiquier connait deja, par exemple rattrapes a
+une reconnexion puis recus de nouveau, sont ignores. S'il en manque avant un mouvement recu, la boucle demande les
+mouvements manques au serveur, par la fonction resynchronise. Si un mouvement recu est illegal sur l'echiquier, celui-ci
+ne suit plus la partie du serveur : la boucle lui redemande toute la partie, qui remplace celle de l'echiquier.
+
+L'ordinateur peut jouer a la place du joueur (voir le module recherche) : quand c'est a lui, il cherche son mouvement
+dans un autre fil, sur une copie de l'echiquier, et le depose dans la file comme un message du reseau. La boucle ne
+l'attend pas.
+"""
+import queue
+import threading
+
+import pygame
+
+
+class Boucle:
+    """
+    La boucle d'un client : l'echiquier partie, ou le joueur a la couleur donnee, affiche a fps images par seconde.
+    Si ordinateur est donne, c'est lui qui joue : une fonction qui retourne le mouvement UCI a jouer dans une position
+    chess.Board, comme recherche.joueur(). resynchronise est appelee avec le dernier demi-coup connu quand des
+    mouvements recus manquent : elle doit seulement lancer la demande au serveur, comme envoie.
+    """
+    def __init__(self, partie, couleur, envoie, fps=60, ordinateur=None, resynchronise=None):
+        self.partie = partie
+        self.couleur = couleur
+        self.envoie = envoie          # Appelee avec le demi-coup et le mouvement UCI de chaque mouvement du joueur
+        self.fps = fps
+        self.messages = queue.Queue()
+        self.ply = len(partie.moteur.move_stack)   # Dernier demi-coup joue, lisible depuis les autres fils
+        self.actif = True
+        self.ordinateur = ordinateur
+        self.resynchronise = resynchronise
+        self._reflexion = None        # Le demi-coup pour lequel l'ordinateur cherche un mouvement
+        self._horloge = pygame.time.Clock()
+
+    # Les methodes recoit_* sont appelees depuis le fil reseau : elles ne font que deposer un message.
+
+    def recoit_coup(self, ply, mouvement):
+        """
+        Depose un mouvement recu du serveur, joue au demi-coup ply (None s'il est inconnu).
+        """
+        self.messages.put(('lot', ply, [mouvement]))
+
+    def recoit_lot(self, ply, mouvements):
+        """
+        Depose une suite de mouvements rattrapes a une reconnexion, le premier etant joue au demi-coup ply.
+        """
+        self.messages.put(('lot', ply, mouvements))
+
+    def recoit_position(self, fen, coups=None):
+        """
+        Depose la position de reference du serveur, par exemple apres un mouvement refuse, avec les mouvements de la
+        partie : ils donnent le numero du dernier demi-coup (voir Echiquier.synchronise).
+        """
+        self.messages.put(('position', None, (fen, coups)))
+
+    def _reflechit(self, position, ply):
+        # Dans le fil de l'ordinateur
+        self.messages.put(('ordinateur', ply, self.ordinateur(position)))
+
+    def _applique(self, genre, ply, donnee):
+        if genre == 'ordinateur':
+            self._reflexion = None
+            # La position a pu changer pendant la recherche, par exemple a une resynchronisation
+            if donnee is not None and ply == len(self.partie.moteur.move_stack) + 1:
+                self.partie.deplace(donnee)
+                self.envoie(ply, donnee)
+            return
+        if genre == 'position':
+            self.partie.synchronise(*donnee)
+            return
+
+        connus = len(self.partie.moteur.move_stack)
+        if ply is None:
+            ply = connus + 1
+        if ply > connus + 1:
+            print(f"Mouvements manquants avant le demi-coup {ply} : on les demande au serveur")
+            if self.resynchronise is not None:
+                self.resynchronise(connus)
+            return
+        if ply == 1 and [m.uci() for m in self.partie.moteur.move_stack[:len(donnee)]] != donnee[:connus]:
+            # Toute la partie du serveur, que l'echiquier ne suit plus : elle est rejouee depuis le debut
+            self.partie.synchronise(None, donnee)
+            return
+        for mouvement in donnee[connus + 1 - ply:]:
+            try:
+                self.partie.deplace(mouvement)
+            except ValueError:
+                if self.resynchronise is None:
+                    raise
+                print(f"Mouvement {mouvement} illegal sur l'echiquier : on redemande la partie au serveur")
+                self.resynchronise(0)
+                return
+
+    def etape(self):
+        """
+        Fait une image, sans jamais attendre : joue les messages recus, traite les evenements du joueur et envoie son
+        mouvement, puis rafraichit l'ecran. Retourne False quand le joueur a ferme la fenetre.
+        """
+        while True:
+            try:
+                genre, ply, donnee = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            self._applique(genre, ply, donnee)
+
+        moteur = self.partie.moteur
+        if self.ordinateur is not None and self._reflexion is None and \
+                moteur.turn == (self.couleur == 'Blanc') and not moteur.is_game_over():
+            self._reflexion = len(moteur.move_stack) + 1
+            threading.Thread(target=self._reflechit, args=(moteur.copy(), self._reflexion), daemon=True).start()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.actif = False
+            elif self.ordinateur is None and self.partie.traite(event, self.couleur):
+                self.envoie(len(self.partie.moteur.move_stack), self.partie.last_move)
+
+        self.ply = len(self.partie.moteur.move_stack)
+        self.partie.update_screen()
+        return self.actif
+
+    def tourne(self):
+        """
+        Fait des images a cadence fixe, jusqu'a ce que le joueur ferme la fenetre.
+        """
+        while self.etape():
+            self._horloge.tick(self.fps)
@@ -0,0 +1,256 @@
+"""
+Ce module relie les processus du serveur de jeu par un bus de messages (publication et abonnement).
+
+Chaque partie a un processus proprietaire, choisi par un hachage stable de son identifiant (voir proprietaire()) : ses
+joueurs s'y connectent, et c'est lui qui garde sa salle et son echiquier de reference. Les spectateurs peuvent etre
+connectes a n'importe quel processus : le proprietaire publie chaque mouvement valide sur le canal de la partie, et les
+processus ou des spectateurs suivent la partie y sont abonnes.
+
+Trois bus ont la meme interface (publie, abonne, desabonne, ferme) :
+
+- BusLocal, dans un seul processus ;
+- BusCourtier, relie a un Courtier de la bibliotheque standard (multiprocessing.connection), sans autre dependance ;
+- BusRedis, relie a un serveur Redis (il faut alors le package redis).
+
+Les messages sont des octets. Les fonctions abonnees sont appelees dans le fil du bus : c'est a elles de repasser dans
+leur propre boucle si besoin.
+
+multiprocessing.connection transmet des objets pickle : quiconque peut parler au courtier peut executer du code dans
+son processus. Le courtier n'accepte donc que les connexions qui connaissent sa cle d'authentification, tiree au
+hasard a sa creation et donnee aux processus du serveur, et il n'ecoute par defaut que sur la machine locale.
+"""
+import collections
+import os
+import threading
+import zlib
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+
+def proprietaire(salle, nombre):
+    """
+    Retourne le rang du processus proprietaire d'une partie, parmi nombre processus.
+
+    Le hachage est le meme dans tous les processus et d'une execution a l'autre, contrairement a hash() : une partie a
+    toujours le meme proprietaire.
+    """
+    return zlib.crc32(salle.encode()) % nombre
+
+
+class BusLocal:
+    """
+    Un bus dans un seul processus : publier appelle directement les fonctions abonnees.
+    """
+    def __init__(self):
+        self._abonnes = collections.defaultdict(list)   # Canal -> fonctions abonnees
+        self._verrou = threading.Lock()
+
+    def publie(self, canal, message):
+        with self._verrou:
+            rappels = list(self._abonnes.get(canal, ()))
+        for rappel in rappels:
+            rappel(message)
+
+    def abonne(self, canal, rappel):
+        with self._verrou:
+            self._abonnes[canal].append(rappel)
+
+    def desabonne(self, canal):
+        with self._verrou:
+            self._abonnes.pop(canal, None)
+
+    def ferme(self):
+        pass
+
+
+class Courtier:
+    """
+    Le courtier des BusCourtier : il recoit les publications de tous les processus et les transmet aux abonnes.
+
+    Il ecoute a une adresse de multiprocessing.connection, par defaut ('127.0.0.1', 6103), avec un fil par
+    connexion. Sans cle d'authentification donnee, il en tire une au hasard : les BusCourtier la recoivent de son
+    attribut authkey.
+    """
+    def __init__(self, adresse=('127.0.0.1', 6103), authkey=None):
+        self.authkey = authkey if authkey is not None else os.urandom(32)
+        self._ecoute = Listener(adresse, authkey=self.authkey)
+        self.adresse = self._ecoute.address
+        self._abonnes = collections.defaultdict(set)   # Canal -> connexions abonnees
+        self._verrous = {}                              # Connexion -> verrou d'ecriture
+        self._verrou = threading.Lock()
+        self._fil = threading.Thread(target=self._accepte, name='courtier', daemon=True)
+        self._fil.start()
+
+    def _accepte(self):
+        while True:
+            try:
+                connexion = self._ecoute.accept()
+            except (AuthenticationError, EOFError):
+                continue   # Un client sans la cle, ou deconnecte pendant l'authentification
+            except OSError:
+                return     # Le courtier est ferme
+            with self._verrou:
+                self._verrous[connexion] = threading.Lock()
+            threading.Thread(target=self._sert, args=(connexion,), daemon=True).start()
+
+    def _sert(self, connexion):
+        """
+        Traite les demandes d'une connexion : ('abonne', canal), ('desabonne', canal) ou ('publie', canal, message).
+        """
+        try:
+            while True:
+                demande = connexion.recv()
+                with self._verrou:
+                    if demande[0] == 'abonne':
+                        self._abonnes[demande[1]].add(connexion)
+                        destinataires = [connexion]   # L'abonnement est confirme a l'abonne
+                    elif demande[0] == 'desabonne':
+                        self._abonnes[demande[1]].discard(connexion)
+                    else:
+                        destinataires = list(self._abonnes.get(demande[1], ()))
+                if demande[0] != 'desabonne':
+                    message = (None, demande[1]) if demande[0] == 'abonne' else (demande[1], demande[2])
+                    for destinataire in destinataires:
+                        self._envoie(destinataire, message)
+
+        except (EOFError, OSError):
+            self._retire(connexion)
+
+    def _envoie(self, destinataire, message):
+        """
+        Envoie un message a un abonne. Un abonne deconnecte est retire, sans toucher a la connexion qui publie.
+        """
+        verrou = self._verrous.get(destinataire)
+        if verrou is None:
+            return   # Retire entre-temps par un autre fil
+        try:
+            with verrou:
+                destinataire.send(message)
+        except (EOFError, OSError):
+            self._retire(destinataire)
+
+    def _retire(self, connexion):
+        """
+        Retire une connexion de tous les canaux et la ferme.
+        """
+        with self._verrou:
+            for abonnes in self._abonnes.values():
+                abonnes.discard(connexion)
+            self._verrous.pop(connexion, None)
+        connexion.close()
+
+    def ferme(self):
+        self._ecoute.close()
+
+
+class BusCourtier:
+    """
+    Un bus relie a un Courtier, eventuellement dans un autre processus ou sur une autre machine.
+
+    abonne() attend que le courtier confirme l'abonnement : les messages publies ensuite, par n'importe quel
+    processus, sont recus. authkey est la cle d'authentification du courtier.
+    """
+    def __init__(self, adresse, authkey):
+        self._connexion = Client(adresse, authkey=authkey)
+        self._abonnes = collections.defaultdict(list)
+        self._confirmations = collections.deque()   # Un evenement par abonnement en attente de confirmation
+        self._verrou = threading.Lock()
+        self._fil = threading.Thread(target=self._recoit, name='bus', daemon=True)
+        self._fil.start()
+
+    def _recoit(self):
+        try:
+            while True:
+                canal, message = self._connexion.recv()
+                if canal is None:
+                    self._confirmations.popleft().set()
+                    continue
+                with self._verrou:
+                    rappels = list(self._abonnes.get(canal, ()))
+                for rappel in rappels:
+                    rappel(message)
+        except (EOFError, OSError):
+            return
+
+    def publie(self, canal, message):
+        with self._verrou:
+            self._connexion.send(('publie', canal, message))
+
+    def abonne(self, canal, rappel):
+        confirmation = None
+        with self._verrou:
+            if canal not in self._abonnes:
+                confirmation = threading.Event()
+                self._confirmations.append(confirmation)
+                self._connexion.send(('abonne', canal))
+            self._abonnes[canal].append(rappel)
+        if confirmation is not None:
+            confirmation.wait()
+
+    def desabonne(self, canal):
+        with self._verrou:
+            if self._abonnes.pop(canal, None) is not None:
+                self._connexion.send(('desabonne', canal))
+
+    def ferme(self):
+        self._connexion.close()
+
+
+class BusRedis:
+    """
+    Un bus relie a un serveur Redis, par ses canaux de publication.
+    """
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("Le package redis est necessaire pour un bus Redis") from None
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._abonnes = collections.defaultdict(list)
+        self._verrou = threading.Lock()
+        self._fil = None
+
+    def _distribue(self, message):
+        canal = message['channel'].decode()
+        with self._verrou:
+            rappels = list(self._abonnes.get(canal, ()))
+        for rappel in rappels:
+            rappel(message['data'])
+
+    def publie(self, canal, message):
+        self._client.publish(canal, message)
+
+    def abonne(self, canal, rappel):
+        with self._verrou:
+            self._abonnes[canal].append(rappel)
+        self._pubsub.subscribe(**{canal: self._distribue})
+        if self._fil is None:
+            self._fil = self._pubsub.run_in_thread(sleep_time=0.01, daemon=True)
+
+    def desabonne(self, canal):
+        with self._verrou:
+            self._abonnes.pop(canal, None)
+        self._pubsub.unsubscribe(canal)
+
+    def ferme(self):
+        if self._fil is not None:
+            self._fil.stop()
+        self._pubsub.close()
+
+
+def ouvre(url, authkey=None):
+    """
+    Ouvre un bus d'apres son adresse : 'local', 'tcp://hote:port' pour un Courtier, dont il faut alors la cle
+    d'authentification, ou 'redis://...'.
+    """
+    if url == 'local':
+        return BusLocal()
+    if url.startswith('tcp://'):
+        if authkey is None:
+            raise ValueError("Il faut la cle d'authentification du courtier pour un bus tcp://")
+        hote, port = url[len('tcp://'):].rsplit(':', 1)
+        return BusCourtier((hote, int(port)), authkey)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return BusRedis(url)
+    raise ValueError(f"Adresse de bus inconnue : {url}")
@@ -1,7 +1,12 @@
 import json
+import sys
 
 import socketio
 import board
+import boucle
+import bus
+import protocole
+import recherche
 sio = socketio.Client(engineio_logger=True)
 start_timer = None
 #Pour transmettre l'ID client
@@ -9,32 +14,69 @@ partie = board.nouvelle_partie("1")
 
 @sio.on('server response')
 def handle_json(data):
-    print('received data from broadcast: ' + data)
+    print('received data from broadcast: ', data)
     print("TYPE OF RECEIVED DATA = ", type(data))
-    update_move = json.loads(data)
+    # Le mouvement arrive en trame binaire (voir protocole), ou en JSON si le serveur ne la connait pas
+    update_move = protocole.decode(data)
 
     #Si l'autre client a envoyé les données, mettre à jour l'écran de déplacement et d'actualisation
     # sid ne sera pas égal si l'autre client l'a envoyé
     print("sio.sid",sio.sid)
-    print("update_move[sid]", update_move["sid"])
+    print("update_move.sid", update_move.sid)
     #Mettre à jour le déplacement -> si l'autre client l'a envoyé. c'est-à-dire que le sid ne sera pas égal
-    if update_move["sid"] != sio.sid:
-       partie.make_auto_move(update_move["move"])
+    if update_move.sid != sio.sid:
+       execution.recoit_coup(update_move.ply, update_move.mouvement)
 
-if __name__ == '__main__':
-    sio.connect('http://127.0.0.1:3000')
-    print(sio.sid,"connected to server")
-    while True:
-        partie.jouer("Blanc")
-        print("played ")
-        if partie.make_move:
-            print("move made !!! ")
-            data = partie.last_move + partie.move_coord
-            sid_client = sio.sid
-            print("SENDING SID ", sid_client)
-            x = {"sid": sid_client, "move": str(data)}
-            x_json = json.dumps(x)
-            sio.emit('connected', x_json)
+@sio.on('move rejected')
+def handle_rejected(data):
+    # Le serveur a refuse notre mouvement : on se replace sur sa position de reference
+    refus = json.loads(data)
+    print("move rejected:", refus["erreur"])
+    execution.recoit_position(refus["fen"], refus.get("coups"))
+
+
+# Vrai apres la premiere connexion : les suivantes sont des reconnexions
+reconnexion = False
+salle = None
+
+@sio.event
+def connect():
+    global reconnexion
+    if reconnexion:
+        # Les appels au serveur ne peuvent pas se faire depuis le fil qui recoit ses messages
+        sio.start_background_task(resynchronise, execution.ply)
+    reconnexion = True
 
+def resynchronise(ply):
+    # On reprend sa place dans la salle, puis on rattrape d'un coup les mouvements manques depuis le dernier connu
+    sio.call('join', json.dumps({"salle": salle, "binaire": True, "couleur": "Blanc"}))
+    lot = protocole.decode_lot(sio.call('resync', json.dumps({"salle": salle, "ply": ply})))
+    execution.recoit_lot(lot.ply, lot.mouvement)
 
+def envoie(ply, mouvement):
+    # Appelee par la boucle : le mouvement part en trame binaire, avec son numero de demi-coup (le serveur detecte
+    # ainsi une desynchronisation). emit ne fait que le mettre dans la file d'envoi du client.
+    try:
+        sio.emit('connected', protocole.encode(salle, ply, mouvement))
+    except socketio.exceptions.SocketIOError:
+        print("move not sent, disconnected:", mouvement)
 
+# La boucle du client : elle seule joue les mouvements et dessine, a cadence fixe
+execution = boucle.Boucle(partie, "Blanc", envoie,
+                          resynchronise=lambda ply: sio.start_background_task(resynchronise, ply))
+
+
+if __name__ == '__main__':
+    # La partie se joue dans une salle : seuls ses membres recoivent nos mouvements. Si le serveur a plusieurs
+    # processus (server_asgi --workers), on se connecte a celui qui garde la partie.
+    salle = sys.argv[1] if len(sys.argv) > 1 else "1"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    if len(sys.argv) > 3:
+        # L'ordinateur joue a notre place, avec au plus ce nombre de secondes par mouvement
+        execution.ordinateur = recherche.joueur(float(sys.argv[3]))
+    sio.connect('http://127.0.0.1:%d' % (3000 + bus.proprietaire(salle, workers)))
+    print(sio.sid,"connected to server")
+    reponse = json.loads(sio.call('create', json.dumps({"salle": salle, "binaire": True})))
+    print("salle", reponse)
+    execution.tourne()
+    sio.disconnect()
@@ -0,0 +1,86 @@
+"""
+Ce module definit la couche de hachage cryptographique de l'arbre de Patricia Merkle et de la blockchain.
+
+La fonction hash() de Python ne convient pas pour signer : le hachage d'une chaine change d'un processus a l'autre
+(PYTHONHASHSEED) et les entiers peuvent entrer en collision. Ici on hache un encodage canonique en octets avec un
+algorithme de hashlib, de sorte que deux processus, ou deux machines, calculent toujours la meme signature.
+
+L'algorithme se choisit une fois pour toutes au demarrage avec utilise() : les signatures deja en cache dans un arbre
+ne sont pas recalculees si l'on change d'algorithme en cours de route.
+"""
+import hashlib
+import struct
+
+
+TAILLE = 32   # Taille en octets de toutes les signatures, quel que soit l'algorithme
+
+# Algorithmes disponibles. Tous produisent des signatures de TAILLE octets.
+ALGORITHMES = {
+    'blake2b': lambda: hashlib.blake2b(digest_size=TAILLE),
+    'blake2s': hashlib.blake2s,
+    'sha256': hashlib.sha256,
+    'sha3_256': hashlib.sha3_256,
+}
+
+# Prefixes qui separent les domaines : une signature de noeud ne peut pas etre confondue avec celle d'un bloc.
+NOEUD = b'N'
+BLOC = b'B'
+
+_BLOC = struct.Struct('>Qd')   # Index du bloc et horodatage, en gros-boutiste pour etre independant de la machine
+
+_nouveau = ALGORITHMES['blake2b']
+_nom = 'blake2b'
+
+
+def utilise(nom):
+    """
+    Choisit l'algorithme de hachage utilise par la suite.
+    """
+    global _nouveau, _nom
+    if nom not in ALGORITHMES:
+        raise ValueError(f"Algorithme de hachage inconnu : {nom}. Choix possibles : {', '.join(ALGORITHMES)}")
+
+    _nouveau = ALGORITHMES[nom]
+    _nom = nom
+
+
+def algorithme():
+    """
+    Retourne le nom de l'algorithme de hachage en cours d'utilisation.
+    """
+    return _nom
+
+
+def empreinte(donnees):
+    """
+    Retourne la signature d'une suite d'octets.
+    """
+    h = _nouveau()
+    h.update(donnees)
+    return h.digest()
+
+
+def empreinte_noeud(mouvement, enfants):
+    """
+    Retourne la signature d'un mouvement de l'arbre, a partir des signatures de ses mouvements suivants.
+
+    L'encodage canonique est : le prefixe NOEUD, la longueur du mouvement sur 2 octets, le mouvement en UTF-8, le
+    nombre d'enfants sur 4 octets, puis les signatures des enfants triees et mises bout a bout. Le tri rend la signature
+    independante de l'ordre d'insertion des enfants : deux arbres qui contiennent les memes parties ont la meme
+    signature, quel que soit l'ordre dans lequel elles ont ete enregistrees.
+    """
+    m = mouvement.encode()
+    h = _nouveau()
+    h.update(NOEUD + struct.pack('>HI', len(m), len(enfants)) + m)
+    h.update(b''.join(sorted(enfants)))
+    return h.digest()
+
+
+def empreinte_bloc(index, horodatage, transactions, precedent):
+    """
+    Retourne la signature d'un bloc a partir de son index, de son horodatage, de la signature de son arbre de
+    transactions et de la signature du bloc precedent.
+    """
+    h = _nouveau()
+    h.update(BLOC + _BLOC.pack(index, horodatage) + transactions + precedent)
+    return h.digest()
@@ -0,0 +1,111 @@
+"""
+Ce module est l'explorateur d'ouvertures du serveur : pour une suite de mouvements, il retourne les mouvements joues
+ensuite dans les parties enregistrees, avec leurs resultats.
+
+Les parties sont enregistrees dans un arbre de Patricia Merkle avec leur resultat : les statistiques de chaque
+position y sont tenues a jour des l'enregistrement (voir patricia_trie). Une requete suit les mouvements depuis la
+racine, un acces a un dictionnaire par embranchement, puis lit les comptes des enfants de la position : son cout ne
+depend que de la longueur de la suite et du nombre de mouvements suivants, pas du nombre de parties.
+
+Une position peut aussi etre demandee par sa FEN, quel que soit l'ordre des mouvements qui y menent : l'explorateur
+l'y cherche dans un index des positions de l'arbre (voir transpositions), construit par indexe.
+
+Les serveurs repondent a l'evenement 'explore' : le client envoie {"coups": [...], "limite": n}, {"fen": ...} ou {}
+pour les mouvements de la partie de sa salle, et recoit la reponse de Explorateur.reponse ou reponse_position en JSON.
+"""
+try:
+    import ti103_chess.bitboard as bitboard
+    import ti103_chess.patricia_trie as pm
+    import ti103_chess.transpositions as transpositions
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import bitboard
+    import patricia_trie as pm
+    import transpositions
+
+
+class Explorateur:
+    """
+    Un explorateur d'ouvertures sur les parties d'un arbre de Patricia Merkle, vide par defaut.
+    """
+    def __init__(self, racine=None):
+        self.racine = racine if racine is not None else pm.PatriciaMerkleTrie('')
+        self.index = None   # Index des positions, construit par indexe
+
+    def indexe(self, profondeur=None):
+        """
+        Construit l'index des positions de l'arbre, jusqu'au demi-coup profondeur s'il est donne, tenu a jour ensuite
+        par ajoute, et retourne son rapport.
+        """
+        self.index = transpositions.IndexPositions(self.racine, profondeur)
+        return self.index.rapport()
+
+    def ajoute(self, mouvements, resultat='*'):
+        """
+        Enregistre une partie terminee, sous forme de liste de mouvements UCI, avec son resultat.
+        """
+        if self.index is None:
+            self.racine.extend(mouvements, resultat)
+        else:
+            self.index.ajoute(mouvements, resultat)
+
+    def position(self, mouvements):
+        """
+        Retourne la position de l'arbre atteinte par une suite de mouvements UCI, ou None si aucune partie enregistree
+        ne l'a jouee.
+        """
+        position = self.racine
+        for mouvement in mouvements:
+            position = position.get(mouvement)
+            if position is None:
+                return None
+        return position
+
+    def suivants(self, mouvements, limite=None):
+        """
+        Retourne les limite mouvements les plus joues apres une suite de mouvements, sous forme de couples
+        (mouvement, Statistiques).
+        """
+        position = self.position(mouvements)
+        return [] if position is None else position.explore()[:limite]
+
+    def reponse(self, mouvements, limite=20):
+        """
+        Retourne la reponse a une requete du client, prete pour json.dumps : les statistiques de la position et celles
+        de ses limite mouvements suivants les plus joues.
+        """
+        position = self.position(mouvements)
+        statistiques = pm.Statistiques(0, 0, 0, 0) if position is None else position.statistiques()
+        suivants = [] if position is None else position.explore()[:limite]
+        return {"coups": list(mouvements), "parties": statistiques.parties, **statistiques._asdict(),
+                "suivants": [{"mouvement": m, "parties": s.parties, **s._asdict()} for m, s in suivants]}
+
+    def reponse_position(self, fen, limite=20):
+        """
+        Retourne la reponse a une requete du client pour une position donnee par sa FEN, par tous les ordres de
+        mouvements qui y menent : comme reponse, avec le nombre d'ordres de mouvements. L'index est construit a la
+        premiere requete s'il ne l'a pas ete. Leve ValueError si la FEN est invalide.
+        """
+        if self.index is None:
+            self.indexe()
+        try:
+            cle = bitboard.Position(fen).cle()
+        except (AttributeError, KeyError, IndexError, ValueError):
+            raise ValueError(f"FEN invalide : {fen!r}") from None
+        statistiques = self.index.statistiques(cle)
+        return {"fen": fen, "ordres": len(self.index.chemins(cle)), "parties": statistiques.parties,
+                **statistiques._asdict(),
+                "suivants": [{"mouvement": m, "parties": s.parties, **s._asdict()}
+                             for m, s in self.index.suivants(cle)[:limite]]}
+
+
+def charge(chemin, processus=1):
+    """
+    Retourne un explorateur des parties d'un fichier PGN, et le rapport de son importation (voir pgn_import).
+    """
+    try:
+        import ti103_chess.pgn_import as pgn_import
+    except ImportError:
+        import pgn_import
+
+    racine, rapport = pgn_import.importe(chemin, processus=processus)
+    return Explorateur(racine), rapport
@@ -0,0 +1,180 @@
+"""
+Ce module definit la mempool de la blockchain : la salle d'attente des parties terminees.
+
+Les sessions de jeu y deposent leurs parties terminees, depuis n'importe quel fil d'execution, sans attendre : le
+depot est un simple ajout a une liste. Un fil dedie scelle un bloc des que le nombre de parties en attente atteint
+taille_max, ou que la plus ancienne attend depuis delai_max secondes. L'arbre du bloc est construit en une passe pour
+tout le lot, et le scellage ne se fait plus une fois par partie sur le chemin critique du serveur. Chaque partie y est
+comptee avec son resultat, pour l'explorateur d'ouvertures (voir PatriciaMerkleTrie.explore).
+
+Une partie est validee des son depot : un mouvement qui n'est pas en UCI ou un resultat inconnu leve ValueError chez
+l'appelant, et la partie n'entre pas dans un lot. Si un bloc ne peut pas etre scelle (par exemple une erreur d'ecriture
+du journal de la chaine), l'erreur est comptee dans les metriques et le fil scelleur continue : les parties du lot
+restent dans le bloc en cours, et sont scellees avec le lot suivant.
+"""
+import threading
+import time
+
+try:
+    import ti103_chess.moves as moves
+    import ti103_chess.patricia_trie as pm
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import moves
+    import patricia_trie as pm
+
+
+class Mempool:
+    """
+    Une mempool qui scelle les parties terminees par lots dans une blockchain.
+    """
+    def __init__(self, chaine, taille_max=1000, delai_max=5.0):
+        self.chaine = chaine
+        self.taille_max = taille_max
+        self.delai_max = delai_max   # En secondes
+
+        verrou = threading.RLock()
+        self._condition = threading.Condition(verrou)   # Reveille le scelleur
+        self._traite = threading.Condition(verrou)      # Reveille ceux qui attendent que les lots soient traites
+        self._en_attente = []        # Triplets (mouvements, resultat, instant de depot)
+        self._en_cours = 0           # Nombre de parties du lot en cours de scellage
+        self._actif = True
+
+        # Metriques
+        self._debut = time.monotonic()
+        self._recues = 0
+        self._scellees = 0
+        self._blocs = 0
+        self._latence = 0.0          # Somme des attentes entre depot et scellage
+        self._duree_scellage = 0.0
+        self._erreurs = 0            # Scellages qui ont echoue
+        self._derniere_erreur = None
+        self._reportees = []         # Parties des lots non scelles, restees dans le bloc en cours
+
+        self._scelleur = threading.Thread(target=self._boucle, name='mempool', daemon=True)
+        self._scelleur.start()
+
+    def soumet(self, mouvements, resultat='*'):
+        """
+        Depose une partie terminee, sous forme de liste de mouvements UCI avec son resultat ('1-0', '1/2-1/2', '0-1' ou
+        '*'), en attente d'etre scellee. Leve ValueError si un mouvement n'est pas en UCI ou si le resultat est inconnu.
+        """
+        for mouvement in mouvements:
+            moves.encode(mouvement)
+        if resultat not in pm.RESULTATS:
+            raise ValueError(f"Resultat inconnu : {resultat!r}")
+
+        with self._condition:
+            if not self._actif:
+                raise ValueError("La mempool est fermee")
+
+            self._en_attente.append((mouvements, resultat, time.monotonic()))
+            self._recues += 1
+            # Le scelleur est reveille pour la premiere partie (il arme alors son delai) ou quand le lot est plein
+            if len(self._en_attente) == 1 or len(self._en_attente) >= self.taille_max:
+                self._condition.notify()
+
+    def _boucle(self):
+        """
+        Boucle du fil scelleur : attend qu'un lot soit pret, puis le scelle.
+        """
+        while True:
+            with self._condition:
+                while self._actif:
+                    if len(self._en_attente) >= self.taille_max:
+                        break
+
+                    if self._en_attente:
+                        restant = self._en_attente[0][2] + self.delai_max - time.monotonic()
+                        if restant <= 0:
+                            break
+                        self._condition.wait(restant)
+
+                    else:
+                        self._condition.wait()
+
+                lot = self._en_attente[:self.taille_max]
+                del self._en_attente[:self.taille_max]
+                self._en_cours = len(lot)
+                termine = not self._actif and not self._en_attente
+
+            if lot:
+                try:
+                    self._scelle(lot)
+                except Exception as erreur:
+                    with self._condition:
+                        self._erreurs += 1
+                        self._derniere_erreur = erreur
+                        self._reportees += lot
+            with self._condition:
+                self._en_cours = 0
+                self._traite.notify_all()
+            if termine:
+                return
+
+    def _scelle(self, lot):
+        """
+        Enregistre un lot de parties dans le bloc en cours et le scelle.
+
+        Les parties sont triees : chacune partage alors le plus long debut possible avec la precedente, et l'on
+        repart de la position deja atteinte au lieu de la racine. Chaque mouvement du lot n'est parcouru qu'une fois.
+        """
+        debut = time.monotonic()
+        parties = sorted((mouvements, resultat) for mouvements, resultat, _ in lot)
+
+        chemin = [self.chaine.head().transactions]   # chemin[k] : position apres les k premiers mouvements
+        precedente = []
+        for partie, resultat in parties:
+            commun = 0
+            while commun < min(len(partie), len(precedente)) and partie[commun] == precedente[commun]:
+                commun += 1
+            del chemin[commun + 1:]
+            for mouvement in partie[commun:]:
+                chemin.append(chemin[-1].add(mouvement))
+            chemin[-1].termine(resultat)
+            precedente = partie
+
+        self.chaine.new()
+        fin = time.monotonic()
+
+        with self._condition:
+            lot, self._reportees = self._reportees + lot, []
+            self._scellees += len(lot)
+            self._blocs += 1
+            self._latence += sum(fin - instant for _, _, instant in lot)
+            self._duree_scellage += fin - debut
+
+    def attend(self, delai=None):
+        """
+        Attend que toutes les parties deposees soient traitees, scellees ou reportees, au plus delai secondes. Retourne
+        False si le delai est ecoule avant.
+        """
+        with self._condition:
+            return self._traite.wait_for(lambda: not self._en_attente and not self._en_cours, delai)
+
+    def ferme(self):
+        """
+        Scelle les parties encore en attente et arrete le fil scelleur.
+        """
+        with self._condition:
+            self._actif = False
+            self._condition.notify()
+        self._scelleur.join()
+
+    def metriques(self):
+        """
+        Retourne les metriques de debit de la mempool.
+        """
+        with self._condition:
+            duree = time.monotonic() - self._debut
+            return {
+                'recues': self._recues,
+                'en_attente': len(self._en_attente),
+                'scellees': self._scellees,
+                'blocs': self._blocs,
+                'parties_par_seconde': self._scellees / duree if duree else 0.0,
+                'latence_moyenne': self._latence / self._scellees if self._scellees else 0.0,
+                'duree_scellage_moyenne': self._duree_scellage / self._blocs if self._blocs else 0.0,
+                'erreurs': self._erreurs,
+                'derniere_erreur': self._derniere_erreur,
+                'reportees': len(self._reportees),
+            }
@@ -0,0 +1,56 @@
+"""
+Ce module encode les mouvements UCI sur 16 bits.
+
+Un mouvement UCI comme 'e2e4' ou 'e7e8q' est represente par un entier : la case de depart sur 6 bits, la case
+d'arrivee sur 6 bits, puis la piece de promotion sur 3 bits. Les cases sont numerotees comme dans le module chess :
+a1 = 0, b1 = 1, ..., h8 = 63.
+
+    bit  15   14 13 12   11 ... 6   5 ... 0
+         0    promotion  arrivee    depart
+
+Le code 0 (a1a1, qui n'est jamais un mouvement valide) represente le mouvement vide de la racine d'un arbre.
+"""
+import itertools
+
+
+CASES = [c + r for r in "12345678" for c in "abcdefgh"]   # Meme numerotation que chess.SQUARES
+PROMOTIONS = ['', 'n', 'b', 'r', 'q']                     # Meme numerotation que chess.PieceType, moins un
+
+
+def _tables():
+    """
+    Calcule les tables d'encodage et de decodage de tous les mouvements UCI possibles.
+    """
+    codes = {'': 0}
+    uci = {0: ''}
+    for (depart, a), (arrivee, b), (promotion, p) in itertools.product(enumerate(CASES), enumerate(CASES),
+                                                                       enumerate(PROMOTIONS)):
+        if depart != arrivee:
+            code = depart | arrivee << 6 | promotion << 12
+            codes[a + b + p] = code
+            uci[code] = a + b + p
+    return codes, uci
+
+
+# Les tables sont calculees une fois pour toutes a l'import : l'encodage et le decodage sont de simples lectures.
+_CODES, _UCI = _tables()
+
+
+def encode(uci):
+    """
+    Retourne le code sur 16 bits d'un mouvement UCI.
+    """
+    try:
+        return _CODES[uci]
+    except KeyError:
+        raise ValueError(f"Mouvement UCI invalide : {uci!r}") from None
+
+
+def decode(code):
+    """
+    Retourne le mouvement UCI correspondant a un code sur 16 bits.
+    """
+    try:
+        return _UCI[code]
+    except KeyError:
+        raise ValueError(f"Code de mouvement invalide : {code}") from None
@@ -4,7 +4,181 @@ Ce module represente un arbre de Patricia Merkle
 L'arbre de Patricia Merkle enregistre a chaque noeud un mouvement d'une partie du jeu d'echec. Cet arbre en outre
 retourne une signature (le hash, un hachage) de son contenu. La signature est publique, et le contenu peut etre garde
 secret.
+
+L'arbre est compresse a la maniere d'un arbre de Patricia (ou arbre radix) : une suite de mouvements sans
+embranchement, comme la fin d'une partie que personne d'autre n'a jouee, est enregistree dans un seul noeud interne
+(une arete). L'arete est coupee en deux lorsqu'une nouvelle partie s'en ecarte.
+
+Les signatures sont calculees par le module digest : ce sont des octets, identiques d'un processus a l'autre.
+
+L'arbre sert aussi d'explorateur d'ouvertures. Quand une partie est enregistree avec son resultat (voir extend et
+termine), chaque noeud de son chemin compte les parties qui y passent, par resultat : gagnees par les blancs, nulles,
+gagnees par les noirs, ou sans resultat connu. Les statistiques d'une position et de ses mouvements suivants sont
+alors lues directement dans les noeuds, sans parcourir les parties. Elles n'entrent pas dans les signatures.
+
+Dans une arete, les parties qui passent par un mouvement sont celles qui passent par le premier, moins celles qui se
+sont terminees avant. Chaque noeud garde donc le compte des parties qui passent par son premier mouvement, et celui
+des parties qui se terminent sur chacun de ses mouvements, sauf sur le dernier mouvement d'une feuille : toutes les
+parties qui y passent s'y terminent.
 """
+import collections
+
+try:
+    import ti103_chess.digest as digest
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import digest
+
+
+# Les resultats d'une partie. Les comptes des quatre resultats tiennent dans un seul entier, 32 bits chacun : ajouter
+# une partie a un compte, c'est ajouter l'entier UN[resultat].
+RESULTATS = ('1-0', '1/2-1/2', '0-1', '*')
+UN = {resultat: 1 << 32 * k for k, resultat in enumerate(RESULTATS)}
+_MASQUE = (1 << 32) - 1
+
+
+class Statistiques(collections.namedtuple('Statistiques', ['blancs', 'nulles', 'noirs', 'inconnues'])):
+    """
+    Les resultats des parties passees par une position : gagnees par les blancs, nulles, gagnees par les noirs et sans
+    resultat connu.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def depuis(cls, comptes):
+        """
+        Retourne les statistiques des comptes des quatre resultats tenus dans un entier.
+        """
+        return cls(comptes & _MASQUE, comptes >> 32 & _MASQUE, comptes >> 64 & _MASQUE, comptes >> 96)
+
+    @property
+    def parties(self):
+        return self.blancs + self.nulles + self.noirs + self.inconnues
+
+
+class _Noeud:
+    """
+    Un noeud interne de l'arbre, c'est-a-dire une arete portant une suite de mouvements sans embranchement.
+
+    Seul le dernier mouvement de l'arete peut avoir plusieurs mouvements suivants, ranges dans children.
+    """
+    __slots__ = ['mouvements', 'children', 'parent', 'debut', '_signature', 'resultats', 'fins']
+
+    def __init__(self, mouvements, parent, debut):
+        self.mouvements = mouvements  # Liste des mouvements de l'arete
+        self.children = None          # Premier mouvement -> noeud. Cree au premier enfant (les feuilles n'en ont pas)
+        self.parent = parent
+        self.debut = debut            # Profondeur du premier mouvement de l'arete, la racine etant a 0
+        self._signature = None        # Signature du premier mouvement en cache. None veut dire a recalculer ("sale").
+        self.resultats = 0            # Comptes des parties qui passent par le premier mouvement (voir Statistiques)
+        self.fins = None              # Indice d'un mouvement -> comptes des parties qui s'y terminent, au besoin
+
+    def enfants(self):
+        """
+        Retourne les noeuds enfants dans leur ordre d'insertion.
+        """
+        return () if self.children is None else self.children.values()
+
+    def ajoute_enfant(self, noeud):
+        """
+        Accroche un noeud enfant au dernier mouvement de cette arete.
+        """
+        if self.children is None:
+            self.children = {}
+        self.children[noeud.mouvements[0]] = noeud
+
+    def coupe(self, k):
+        """
+        Coupe l'arete avant son k-ieme mouvement et retourne le nouveau noeud portant les k premiers mouvements.
+
+        La fin de l'arete reste dans ce noeud-ci : ses enfants et les poignees qui le designent restent valides.
+        """
+        tete = _Noeud(self.mouvements[:k], self.parent, self.debut)
+        self.parent.children[self.mouvements[0]] = tete  # Meme cle, donc l'ordre des enfants du parent est garde
+        tete.resultats = self.resultats
+        if self.fins:
+            # Les parties terminees dans la tete ne passent plus par la fin de l'arete
+            tete.fins = {i: n for i, n in self.fins.items() if i < k}
+            self.fins = {i - k: n for i, n in self.fins.items() if i >= k} or None
+            self.resultats -= sum(tete.fins.values())
+        del self.mouvements[:k]
+        self.debut += k
+        self.parent = tete
+        self._signature = None
+        tete.ajoute_enfant(self)
+        tete.invalide()
+        return tete
+
+    def comptes(self, i):
+        """
+        Retourne les comptes des parties qui passent par le i-ieme mouvement de l'arete.
+        """
+        comptes = self.resultats
+        if self.fins:
+            comptes -= sum(n for j, n in self.fins.items() if j < i)
+        return comptes
+
+    def terminees(self):
+        """
+        Retourne les comptes des parties terminees sur chaque mouvement de l'arete, par indice.
+        """
+        fins = dict(self.fins or {})
+        if self.children is None:
+            fins[len(self.mouvements) - 1] = self.comptes(len(self.mouvements) - 1)
+        return {i: n for i, n in fins.items() if n}
+
+    def fige(self):
+        """
+        Avant de prolonger une feuille : les parties terminees sur son dernier mouvement sont comptees explicitement.
+        """
+        dernier = len(self.mouvements) - 1
+        comptes = self.comptes(dernier)
+        if comptes:
+            self.fins = self.fins or {}
+            self.fins[dernier] = comptes
+
+    def invalide(self):
+        """
+        Marque ce noeud et ses parents comme sales.
+
+        On remonte vers la racine et on s'arrete au premier parent deja sale : ses propres parents le sont forcement
+        aussi. Le cout est donc au plus la profondeur du noeud.
+        """
+        self._signature = None
+        noeud = self.parent
+        while noeud is not None and noeud._signature is not None:
+            noeud._signature = None
+            noeud = noeud.parent
+
+    def calcule(self):
+        """
+        Recalcule les signatures de tous les noeuds sales de ce sous-arbre, en ordre postfixe avec une pile.
+        """
+        pile = [(self, False)]
+        while pile:
+            noeud, enfants_calcules = pile.pop()
+            if noeud._signature is not None:
+                continue
+
+            if not enfants_calcules:
+                pile.append((noeud, True))
+                pile.extend((child, False) for child in noeud.enfants() if child._signature is None)
+
+            else:
+                noeud._signature = noeud.signature(0)
+
+    def signature(self, i):
+        """
+        Retourne la signature du i-ieme mouvement de l'arete, les signatures des enfants etant deja calculees.
+
+        C'est la meme signature que si chaque mouvement avait son propre noeud : le hachage du mouvement et des
+        signatures de ses mouvements suivants (voir digest.empreinte_noeud).
+        """
+        mouvements = self.mouvements
+        h = digest.empreinte_noeud(mouvements[-1], [c._signature for c in self.enfants()])
+        for k in range(len(mouvements) - 2, i - 1, -1):
+            h = digest.empreinte_noeud(mouvements[k], [h])
+        return h
+
 
 class PatriciaMerkleTrie:
     """
@@ -12,22 +186,67 @@ class PatriciaMerkleTrie:
 
     L'arbre enregistre une suite de mouvements tout en restant compact pour une efficacite de lecture ulterieure.
     L'arbre peut aussi retourner sa valeur de hachage.
+
+    Un objet PatriciaMerkleTrie est une position dans l'arbre : un noeud interne et la profondeur d'un mouvement de son
+    arete. Creer un PatriciaMerkleTrie cree la racine d'un nouvel arbre ; add et get retournent les positions
+    suivantes.
     """
-    __slots__ = ['mouvement', 'children']   # Reduit la consommation memoire de chaque mot
+    __slots__ = ['_noeud', '_profondeur']   # Reduit la consommation memoire de chaque mot
 
     def __init__(self, mouvement):
-        self.mouvement = mouvement
-        self.children = []
+        self._noeud = _Noeud([mouvement], None, 0)
+        self._profondeur = 0
+
+    @classmethod
+    def _position(cls, noeud, profondeur):
+        """
+        Retourne la position du mouvement a la profondeur donnee dans l'arete d'un noeud interne.
+        """
+        obj = cls.__new__(cls)
+        obj._noeud = noeud
+        obj._profondeur = profondeur
+        return obj
+
+    def _resout(self):
+        """
+        Retourne le noeud interne et l'indice du mouvement de cette position dans son arete.
+
+        Si l'arete a ete coupee depuis, le mouvement se trouve dans un des nouveaux noeuds parents.
+        """
+        noeud = self._noeud
+        while self._profondeur < noeud.debut:
+            noeud = noeud.parent
+        self._noeud = noeud
+        return noeud, self._profondeur - noeud.debut
+
+    @property
+    def mouvement(self):
+        """
+        Le mouvement enregistre a cette position.
+        """
+        noeud, i = self._resout()
+        return noeud.mouvements[i]
+
+    @property
+    def children(self):
+        """
+        Les positions suivantes, indexees par leur mouvement, dans leur ordre d'insertion.
+        """
+        noeud, i = self._resout()
+        if i + 1 < len(noeud.mouvements):
+            return {noeud.mouvements[i + 1]: self._position(noeud, self._profondeur + 1)}
+
+        return {m: self._position(c, self._profondeur + 1) for m, c in (noeud.children or {}).items()}
 
     def __contains__(self, item):
         """
         Verifie qu'un mouvement se trouve bien parmi la liste directe des mouvements suivants enregistres dans l'arbre.
         """
-        for c in self.children:
-            if c.mouvement == item:
-                return True
+        noeud, i = self._resout()
+        if i + 1 < len(noeud.mouvements):
+            return noeud.mouvements[i + 1] == item
 
-        return False
+        return noeud.children is not None and item in noeud.children
 
     def __eq__(self, other):
         """
@@ -39,7 +258,11 @@ class PatriciaMerkleTrie:
         """
         Retourne le nombre de mouvements suivant directement enregistres apres ce noeud.
         """
-        return len(self.children)
+        noeud, i = self._resout()
+        if i + 1 < len(noeud.mouvements):
+            return 1
+
+        return 0 if noeud.children is None else len(noeud.children)
 
     def __str__(self):
         """
@@ -51,67 +274,220 @@ class PatriciaMerkleTrie:
         """
         Ce noeud dans l'arbre est-il terminal ?
         """
-        if len(self.children) == 0:
-            return True
-
-        else:
-            return False
+        return len(self) == 0
 
     def add(self, mouvement):
         """
         On enregistre un nouveau mouvement dans la structure actuelle
         """
-        # Condition ou le mouvement existe deja. Par exemple une partie du passe possedait la meme ouverture.
-        # Dans ce cas, on ne cree pas de nouveau noeud, simplement on retourne celui existant.
-        for child in self.children:
-            if child.mouvement == mouvement:
-                return child
+        noeud, i = self._resout()
+        profondeur = self._profondeur + 1
+
+        if i + 1 < len(noeud.mouvements):
+            # Condition ou l'on se trouve au milieu d'une arete. Si le mouvement suit deja, on avance simplement.
+            if noeud.mouvements[i + 1] == mouvement:
+                return self._position(noeud, profondeur)
+
+            # Sinon la nouvelle partie s'ecarte de l'arete : on la coupe apres ce mouvement.
+            noeud = noeud.coupe(i + 1)
+
+        else:
+            # Condition ou le mouvement existe deja. Par exemple une partie du passe possedait la meme ouverture.
+            # Dans ce cas, on ne cree pas de nouveau noeud, simplement on retourne celui existant.
+            child = None if noeud.children is None else noeud.children.get(mouvement)
+            if child is not None:
+                return self._position(child, profondeur)
+
+            # Condition ou l'on se trouve au bout d'une feuille (autre que la racine) : pas d'embranchement, on
+            # prolonge simplement son arete.
+            if noeud.children is None and noeud.parent is not None:
+                noeud.fige()
+                noeud.mouvements.append(mouvement)
+                noeud.invalide()
+                return self._position(noeud, profondeur)
 
         # Condition ou le mouvement n'existe pas, l'arbre considere le mouvement comme inedit, ou original
-        obj = PatriciaMerkleTrie(mouvement)  # On cree un nouveau mouvement
-        self.children.append(obj)            # On l'ajoute aux enfants du mouvement en cours
-        return obj                           # On le retourne pour etre utilise comme mouvement courant
+        if noeud.children is None:
+            noeud.fige()
+        obj = _Noeud([mouvement], noeud, profondeur)  # On cree un nouveau mouvement
+        noeud.ajoute_enfant(obj)                      # On l'ajoute aux enfants du mouvement en cours
+        obj.invalide()                                # Les signatures de ses parents sont perimees
+        return self._position(obj, profondeur)        # On le retourne pour etre utilise comme mouvement courant
+
+    def extend(self, mouvements, resultat=None):
+        """
+        On enregistre une suite de mouvements, par exemple une partie entiere, et on retourne le dernier.
+
+        Si le resultat de la partie est donne ('1-0', '1/2-1/2', '0-1' ou '*'), elle est comptee dans les
+        statistiques des positions de son chemin (voir termine).
+        """
+        position = self
+        for mouvement in mouvements:
+            position = position.add(mouvement)
+        if resultat is not None:
+            position.termine(resultat)
+        return position
+
+    def termine(self, resultat='*'):
+        """
+        Compte une partie terminee a cette position, avec son resultat, dans les statistiques de toutes les positions
+        depuis la racine. Un resultat inconnu compte comme '*'.
+        """
+        self._compte(UN.get(resultat, UN['*']))
+
+    def _compte(self, comptes):
+        """
+        Ajoute des comptes de parties terminees a cette position. On remonte vers la racine : chaque noeud du chemin
+        est entre par son premier mouvement, et compte les parties qui y passent.
+        """
+        noeud, i = self._resout()
+        if noeud.children is not None or i + 1 < len(noeud.mouvements):
+            noeud.fins = noeud.fins or {}
+            noeud.fins[i] = noeud.fins.get(i, 0) + comptes
+        while noeud is not None:
+            noeud.resultats += comptes
+            noeud = noeud.parent
+
+    def statistiques(self):
+        """
+        Retourne les Statistiques des parties enregistrees avec leur resultat qui passent par cette position.
+        """
+        noeud, i = self._resout()
+        return Statistiques.depuis(noeud.comptes(i))
+
+    def explore(self):
+        """
+        Retourne les mouvements suivants, du plus joue au moins joue, sous forme de couples (mouvement,
+        Statistiques) : l'explorateur d'ouvertures de cette position.
+        """
+        noeud, i = self._resout()
+        if i + 1 < len(noeud.mouvements):
+            suivants = [(noeud.mouvements[i + 1], noeud.comptes(i + 1))]
+        else:
+            suivants = [(c.mouvements[0], c.resultats) for c in noeud.enfants()]
+        suivants = [(m, Statistiques.depuis(n)) for m, n in suivants]
+        suivants.sort(key=lambda suivant: -suivant[1].parties)
+        return suivants
+
+    def parties(self):
+        """
+        Retourne les parties enregistrees avec leur resultat qui passent par cette position, sous forme de couples
+        (mouvements, Statistiques) : les mouvements depuis la racine, sans celui de la racine, et les resultats des
+        parties qui se sont terminees la. Le parcours se fait avec une pile, comme dump.
+        """
+        noeud, i = self._resout()
+        pile = [(noeud, self.chemin()[:-1] if self._profondeur else [], i)]
+        while pile:
+            noeud, prefixe, debut = pile.pop()
+            # Les mouvements de l'arete avant debut sont dans le prefixe, celui de la racine n'y est jamais
+            for j, comptes in sorted(noeud.terminees().items()):
+                if j >= debut:
+                    yield prefixe + noeud.mouvements[max(debut, noeud.parent is None):j + 1], \
+                        Statistiques.depuis(comptes)
+            prefixe = prefixe + noeud.mouvements[max(debut, noeud.parent is None):]
+            pile.extend((child, prefixe, 0) for child in reversed(list(noeud.enfants())))
+
+    def chemin(self):
+        """
+        Retourne les mouvements depuis la racine jusqu'a cette position, sans celui de la racine.
+        """
+        noeud, i = self._resout()
+        morceaux = [noeud.mouvements[:i + 1]]
+        while noeud.parent is not None:
+            noeud = noeud.parent
+            morceaux.append(noeud.mouvements)
+        return [mouvement for morceau in reversed(morceaux) for mouvement in morceau][1:]
+
+    def precede(self, other):
+        """
+        Verifie que cette position est sur le chemin d'une autre position du meme arbre, avant elle.
+        """
+        if self._profondeur >= other._profondeur:
+            return False
+        noeud, _ = self._resout()
+        autre, _ = other._resout()
+        while autre is not None and autre.debut > self._profondeur:
+            autre = autre.parent
+        return autre is noeud
 
     def get(self, mouvement):
         """
         Retourne le noeud correspondant a un mouvement particulier s'il existe dans la base de donnees.
         """
-        # Condition ou le mouvement existe deja, donc on le retourne
-        for child in self.children:
-            if child.mouvement == mouvement:
-                return child
+        noeud, i = self._resout()
+        if i + 1 < len(noeud.mouvements):
+            child = noeud if noeud.mouvements[i + 1] == mouvement else None
+        else:
+            child = None if noeud.children is None else noeud.children.get(mouvement)
 
-        # Il n'y a pas de sous entree dans notre base. Donc bah rien a retourner.
-        return None
+        # S'il n'y a pas de sous entree dans notre base, bah rien a retourner.
+        return None if child is None else self._position(child, self._profondeur + 1)
 
     def dump(self, r=''):
         """
         Affiche le contenu de la base de donnees.
 
-        Chaque ligne doit correspondre a une partie jouee dans le passe
+        Chaque ligne doit correspondre a une partie jouee dans le passe. Le parcours se fait avec une pile plutot que
+        par recursion, pour ne pas atteindre la limite de recursion de Python sur les longues parties.
         """
-        if self.is_leaf():
-            print(r + self.mouvement)
+        noeud, i = self._resout()
+        pile = [(noeud, r, i)]
+        while pile:
+            noeud, prefixe, i = pile.pop()
+            prefixe += ''.join(noeud.mouvements[i:])
+            if not noeud.children:
+                print(prefixe)
 
-        else:
-            for child in self.children:
-                child.dump(r + self.mouvement)
+            else:
+                # Les enfants sont empiles a l'envers pour etre depiles dans leur ordre d'insertion
+                pile.extend((child, prefixe, 0) for child in reversed(noeud.children.values()))
 
     def hash(self):
         """
         Retourne la signature de ce noeud.
 
-        La signature correspond au hachage du mouvement plus le hachage de tous les noeuds enfants si ce noeud n'est
-        pas terminal.
+        La signature correspond au hachage du mouvement et des signatures de tous les noeuds enfants si ce noeud n'est
+        pas terminal. C'est une suite de digest.TAILLE octets. Chaque noeud garde sa signature en cache : seuls les
+        noeuds sales, c'est-a-dire sur le chemin d'un mouvement ajoute depuis le dernier calcul, sont recalcules.
+        """
+        noeud, i = self._resout()
+        noeud.calcule()
+        return noeud._signature if i == 0 else noeud.signature(i)
+
+    def preuve(self, mouvements):
         """
-        if self.is_leaf():
-            return hash(self.mouvement)
+        Retourne les signatures necessaires pour prouver qu'une suite de mouvements suit cette position (voir le
+        module proof), sous la forme (niveaux, fin).
+
+        niveaux contient, pour chaque position du chemin sauf la derniere, les signatures des enfants places avant et
+        apres celui du chemin. fin contient les signatures des enfants de la derniere position. Leve KeyError si la
+        suite n'est pas enregistree.
+        """
+        self.hash()   # Toutes les signatures du sous-arbre doivent etre en cache
+        noeud, i = self._resout()
+        niveaux = []
+        for mouvement in mouvements:
+            if i + 1 < len(noeud.mouvements):
+                # Au milieu d'une arete, le mouvement suivant est le seul enfant : il n'a pas de voisins
+                if noeud.mouvements[i + 1] != mouvement:
+                    raise KeyError(mouvement)
+                niveaux.append(([], []))
+                i += 1
+                continue
+
+            enfants = list(noeud.enfants())
+            rang = next((k for k, c in enumerate(enfants) if c.mouvements[0] == mouvement), None)
+            if rang is None:
+                raise KeyError(mouvement)
+            signatures = [c._signature for c in enfants]
+            niveaux.append((signatures[:rang], signatures[rang + 1:]))
+            noeud, i = enfants[rang], 0
 
+        if i + 1 < len(noeud.mouvements):
+            fin = [noeud.signature(i + 1)]
         else:
-            h = hash(self.mouvement)
-            for c in self.children:
-                h += c.hash()
-            return hash(h)
+            fin = [c._signature for c in noeud.enfants()]
+        return niveaux, fin
 
 
 if __name__ == "__main__":
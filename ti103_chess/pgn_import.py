@@ -0,0 +1,252 @@
+"""
+Ce module importe des fichiers PGN dans l'arbre de Patricia Merkle.
+
+Les fichiers sont lus partie par partie, sans jamais etre charges en entier : la memoire reste stable quelle que soit
+la taille du fichier. Ils peuvent etre compresses en gzip (.gz) ou en zstandard (.zst, il faut alors le package
+zstandard). Les mouvements sont convertis en UCI par le module chess et les parties sont inserees par lots, avec leur
+resultat : l'arbre obtenu sert d'explorateur d'ouvertures (voir PatriciaMerkleTrie.explore).
+
+L'analyse des parties peut etre repartie sur plusieurs processus : chaque processus construit l'arbre d'un lot de
+parties, le renvoie sous forme compacte (voir trie_compact), puis les arbres partiels sont fusionnes dans l'ordre du
+fichier. L'arbre obtenu est le meme, signature comprise, qu'avec un seul processus.
+
+Utilisation ::
+
+    python -m ti103_chess.pgn_import parties.pgn.gz --processus 4
+"""
+import argparse
+import concurrent.futures
+import gzip
+import io
+import time
+
+import chess.pgn
+
+try:
+    import ti103_chess.patricia_trie as pm
+    import ti103_chess.trie_compact as tc
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import patricia_trie as pm
+    import trie_compact as tc
+
+
+class Rapport:
+    """
+    Le bilan d'une importation.
+    """
+    def __init__(self):
+        self.parties = 0    # Parties inserees dans l'arbre
+        self.rejetees = 0   # Parties illisibles, depuis une position donnee (FEN) ou contenant un mouvement nul
+        self.coups = 0
+        self.duree = 0.0
+
+    def parties_par_seconde(self):
+        """
+        Retourne le debit de l'importation.
+        """
+        return self.parties / self.duree if self.duree else 0.0
+
+    def __str__(self):
+        return (f"{self.parties} parties ({self.coups} coups, {self.rejetees} rejetees) en {self.duree:.2f} s : "
+                f"{self.parties_par_seconde():,.0f} parties/s")
+
+
+class _VisiteurUCI(chess.pgn.BaseVisitor):
+    """
+    Visiteur du module chess qui ne retient que les mouvements UCI de la ligne principale et le resultat d'une partie.
+
+    Les variantes et commentaires sont ignores, ce qui est bien plus rapide que de construire une chess.pgn.Game.
+    """
+    def begin_game(self):
+        self.coups = []
+        self.resultat = '*'
+        self.valide = True
+
+    def visit_header(self, tagname, tagvalue):
+        if tagname == 'Result':
+            self.resultat = tagvalue
+        elif tagname == 'FEN':
+            self.valide = False   # L'arbre ne contient que des parties depuis la position initiale
+
+    def visit_result(self, resultat):
+        # Le resultat ecrit a la fin des mouvements, si l'en-tete Result manque. C'est le cas d'une partie dont les
+        # en-tetes ont ete lus avec la partie precedente, faute de ligne vide entre les deux.
+        if self.resultat == '*':
+            self.resultat = resultat
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def visit_move(self, board, move):
+        if not move:
+            self.valide = False   # Un mouvement nul ne s'encode pas sur 16 bits
+        self.coups.append(move.uci())
+
+    def handle_error(self, error):
+        self.valide = False
+
+    def result(self):
+        return (self.coups if self.valide else None), self.resultat
+
+
+def ouvre(chemin):
+    """
+    Ouvre un fichier PGN en mode texte, en le decompressant au besoin selon son extension.
+    """
+    chemin = str(chemin)
+    if chemin.endswith('.gz'):
+        return gzip.open(chemin, 'rt', encoding='utf-8', errors='replace')
+
+    if chemin.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Le package zstandard est necessaire pour lire les fichiers .zst") from None
+        flux = zstandard.ZstdDecompressor().stream_reader(open(chemin, 'rb'), closefd=True)
+        return io.TextIOWrapper(flux, encoding='utf-8', errors='replace')
+
+    return open(chemin, encoding='utf-8', errors='replace')
+
+
+def lit_parties(flux):
+    """
+    Generateur des parties d'un flux PGN : chaque partie est un couple (mouvements UCI, resultat), ou None si elle
+    est illisible ou ne part pas de la position initiale.
+    """
+    while True:
+        partie = chess.pgn.read_game(flux, Visitor=_VisiteurUCI)
+        if partie is None:
+            return   # Fin du flux
+
+        yield partie if partie[0] is not None else None
+
+
+def textes_parties(flux):
+    """
+    Generateur du texte PGN brut de chaque partie d'un flux, sans l'analyser.
+
+    Une nouvelle partie commence a la premiere ligne d'en-tete ('[...') qui suit des lignes de mouvements.
+    """
+    lignes = []
+    mouvements = False
+    for ligne in flux:
+        if ligne.startswith('['):
+            if mouvements:
+                yield ''.join(lignes)
+                lignes = []
+                mouvements = False
+        elif ligne.strip():
+            mouvements = True
+        lignes.append(ligne)
+
+    if mouvements:
+        yield ''.join(lignes)
+
+
+def parties(chemin):
+    """
+    Generateur des parties lisibles d'un fichier PGN, sous forme de couples (mouvements UCI, resultat).
+    """
+    with ouvre(chemin) as flux:
+        for partie in lit_parties(flux):
+            if partie is not None:
+                yield partie
+
+
+def _lots(iterable, taille):
+    """
+    Regroupe les elements d'un iterable en listes d'au plus taille elements.
+    """
+    lot = []
+    for element in iterable:
+        lot.append(element)
+        if len(lot) == taille:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+
+def _insere(racine, lot, rapport):
+    """
+    Insere un lot de parties dans l'arbre et met a jour le rapport.
+    """
+    for partie in lot:
+        if partie is None:
+            rapport.rejetees += 1
+            continue
+
+        coups, resultat = partie
+        racine.extend(coups, resultat)
+        rapport.parties += 1
+        rapport.coups += len(coups)
+
+
+def _analyse_lot(textes):
+    """
+    Analyse un lot de parties PGN dans un processus fils et retourne leur arbre au format compact, les parties
+    terminees sur chacune de ses lignes et son rapport.
+    """
+    racine = pm.PatriciaMerkleTrie('')
+    rapport = Rapport()
+    _insere(racine, lit_parties(io.StringIO(''.join(textes))), rapport)
+    compact = tc.TrieCompact.depuis_trie(racine)
+    return compact.octets(), compact.fins, rapport
+
+
+def importe(chemin, racine=None, processus=1, taille_lot=1000):
+    """
+    Importe un fichier PGN dans un arbre de Patricia Merkle et retourne l'arbre et le rapport d'importation.
+
+    Avec plusieurs processus, au plus deux lots par processus sont en cours a la fois, pour garder une memoire stable.
+    """
+    racine = racine if racine is not None else pm.PatriciaMerkleTrie('')
+    rapport = Rapport()
+    debut = time.perf_counter()
+
+    if processus == 1:
+        with ouvre(chemin) as flux:
+            for lot in _lots(lit_parties(flux), taille_lot):
+                _insere(racine, lot, rapport)
+
+    else:
+        with ouvre(chemin) as flux, concurrent.futures.ProcessPoolExecutor(processus) as executeur:
+            en_cours = []
+            for lot in _lots(textes_parties(flux), taille_lot):
+                en_cours.append(executeur.submit(_analyse_lot, lot))
+                if len(en_cours) >= 2 * processus:
+                    _fusionne(racine, en_cours.pop(0).result(), rapport)
+            for futur in en_cours:
+                _fusionne(racine, futur.result(), rapport)
+
+    rapport.duree = time.perf_counter() - debut
+    return racine, rapport
+
+
+def _fusionne(racine, resultat, rapport):
+    """
+    Fusionne l'arbre partiel d'un processus fils dans l'arbre principal.
+    """
+    octets, fins, partiel = resultat
+    compact = tc.TrieCompact.depuis_octets(octets)
+    compact.fins = fins
+    compact.vers_trie(racine)
+    rapport.parties += partiel.parties
+    rapport.rejetees += partiel.rejetees
+    rapport.coups += partiel.coups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importe un fichier PGN dans un arbre de Patricia Merkle")
+    parser.add_argument('chemin')
+    parser.add_argument('--processus', type=int, default=1)
+    parser.add_argument('--lot', type=int, default=1000)
+    args = parser.parse_args()
+
+    racine, rapport = importe(args.chemin, processus=args.processus, taille_lot=args.lot)
+    print(rapport)
+    print("Signature :", racine.hash().hex())
+
+
+if __name__ == '__main__':
+    main()
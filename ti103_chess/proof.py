@@ -0,0 +1,109 @@
+"""
+Ce module produit et verifie des preuves d'inclusion d'une partie dans un bloc.
+
+Pour prouver qu'une partie est enregistree dans un bloc, il n'est pas necessaire de fournir tout l'arbre de Patricia
+Merkle : il suffit, pour chaque position de la partie, des signatures des autres mouvements joues depuis cette
+position (ses voisins), des signatures des mouvements qui suivent la fin de la partie, et de l'en-tete du bloc.
+
+Le verificateur remonte alors de la fin de la partie jusqu'a la racine en recalculant une signature par position,
+puis la signature du bloc, et la compare a celle qu'il connait deja. Le cout est proportionnel a la longueur de la
+partie, et la preuve ne pese que quelques centaines d'octets : un client leger peut valider un resultat sans
+telecharger les blocs.
+"""
+import struct
+
+try:
+    import ti103_chess.digest as digest
+    import ti103_chess.moves as moves
+    import ti103_chess.patricia_trie as pm
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import digest
+    import moves
+    import patricia_trie as pm
+
+
+MAGIC = b'PRV1'
+
+# Magic, index du bloc, horodatage, signature du bloc precedent, mouvement de la racine, nombre de mouvements
+_ENTETE = struct.Struct(f'<4sQd{digest.TAILLE}sHI')
+_COMPTE = struct.Struct('<H')
+
+
+class Preuve:
+    """
+    La preuve qu'une partie est enregistree dans un bloc.
+    """
+    def __init__(self, index, horodatage, precedent, racine, mouvements, niveaux, fin):
+        self.index = index
+        self.horodatage = horodatage
+        self.precedent = precedent     # Signature du bloc precedent
+        self.racine = racine           # Mouvement de la racine de l'arbre des transactions
+        self.mouvements = mouvements   # La partie
+        self.niveaux = niveaux         # Signatures des voisins (avant, apres) de chaque mouvement de la partie
+        self.fin = fin                 # Signatures des mouvements qui suivent la fin de la partie
+
+    def octets(self):
+        """
+        Retourne la preuve encodee pour etre envoyee a un client. Les mouvements sont encodes sur 16 bits.
+        """
+        morceaux = [_ENTETE.pack(MAGIC, self.index, self.horodatage, self.precedent, moves.encode(self.racine),
+                                 len(self.mouvements))]
+        morceaux.append(struct.pack(f'<{len(self.mouvements)}H', *map(moves.encode, self.mouvements)))
+        for signatures in [s for avant, apres in self.niveaux for s in (avant, apres)] + [self.fin]:
+            morceaux.append(_COMPTE.pack(len(signatures)))
+            morceaux.extend(signatures)
+        return b''.join(morceaux)
+
+    @classmethod
+    def depuis_octets(cls, octets):
+        """
+        Decode une preuve produite par octets().
+        """
+        magic, index, horodatage, precedent, racine, nombre = _ENTETE.unpack_from(octets)
+        if magic != MAGIC:
+            raise ValueError("Ces octets ne contiennent pas une preuve")
+
+        position = _ENTETE.size
+        mouvements = [moves.decode(c) for c in struct.unpack_from(f'<{nombre}H', octets, position)]
+        position += 2 * nombre
+
+        listes = []
+        for _ in range(2 * nombre + 1):
+            compte, = _COMPTE.unpack_from(octets, position)
+            position += _COMPTE.size
+            listes.append([bytes(octets[position + k * digest.TAILLE:position + (k + 1) * digest.TAILLE])
+                           for k in range(compte)])
+            position += compte * digest.TAILLE
+
+        niveaux = list(zip(listes[0:-1:2], listes[1:-1:2]))
+        return cls(index, horodatage, precedent, moves.decode(racine), mouvements, niveaux, listes[-1])
+
+
+def prouve(bloc, mouvements):
+    """
+    Retourne la preuve qu'une partie est enregistree dans un bloc. Leve KeyError si elle ne l'est pas.
+    """
+    transactions = bloc.transactions
+    if isinstance(transactions, pm.PatriciaMerkleTrie):
+        racine = transactions.mouvement
+    else:
+        racine = transactions.arete(0)[0]
+    niveaux, fin = transactions.preuve(mouvements)
+    return Preuve(bloc.index, bloc.time, bloc.previous_hash, racine, list(mouvements), niveaux, fin)
+
+
+def verifie(preuve, signature_bloc):
+    """
+    Verifie une preuve par rapport a la signature d'un bloc (celle de Block.hash()), en remontant de la fin de la
+    partie vers la racine.
+    """
+    if len(preuve.niveaux) != len(preuve.mouvements):
+        return False
+
+    chemin = [preuve.racine] + preuve.mouvements
+    h = digest.empreinte_noeud(chemin[-1], preuve.fin)
+    for k in range(len(preuve.mouvements) - 1, -1, -1):
+        avant, apres = preuve.niveaux[k]
+        h = digest.empreinte_noeud(chemin[k], avant + [h] + apres)
+
+    return digest.empreinte_bloc(preuve.index, preuve.horodatage, h, preuve.precedent) == signature_bloc
@@ -0,0 +1,124 @@
+"""
+Ce module definit le format des mouvements echanges entre les clients et le serveur.
+
+Un mouvement est envoye dans une trame binaire de quelques octets :
+
+    octets  0          1           2 3           4 5         6 ...
+            version    longueur    demi-coup     mouvement   identifiant de la partie (UTF-8)
+
+Tous les entiers sont gros-boutistes. Le mouvement est son code UCI sur 16 bits (voir le module moves) : les
+coordonnees de la piece a l'ecran ne sont plus envoyees, le client les deduit du mouvement. Le demi-coup (1 pour le
+premier mouvement de la partie) permet au serveur de detecter un client desynchronise.
+
+L'ancien format JSON reste accepte : decode() reconnait les deux, et les clients qui n'ont pas demande le format
+binaire en rejoignant une salle recoivent toujours du JSON.
+
+Un client qui se reconnecte recoit les mouvements qu'il a manques dans une seule trame de lot : le meme en-tete, ou le
+mouvement est remplace par le nombre de mouvements, suivi de l'identifiant de la partie puis des codes des mouvements
+sur 16 bits. Le demi-coup est celui du premier mouvement du lot.
+"""
+import collections
+import json
+import struct
+
+try:
+    import ti103_chess.moves as moves
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py et client.py
+    import moves
+
+
+VERSION = 1
+
+# Version, longueur de l'identifiant de la partie, demi-coup, mouvement
+_TRAME = struct.Struct('>BBHH')
+
+# Un mouvement recu. sid n'est connu que pour les messages JSON, qui le transportent.
+Coup = collections.namedtuple('Coup', ['salle', 'ply', 'mouvement', 'sid'], defaults=[None])
+
+
+def encode(salle, ply, mouvement):
+    """
+    Retourne la trame binaire d'un mouvement UCI joue au demi-coup ply de la partie salle.
+    """
+    identifiant = salle.encode()
+    if len(identifiant) > 255:
+        raise ValueError(f"Identifiant de partie trop long : {salle!r}")
+    if not 0 <= ply <= 0xFFFF:
+        raise ValueError(f"Demi-coup hors limites : {ply}")
+    return _TRAME.pack(VERSION, len(identifiant), ply, moves.encode(mouvement)) + identifiant
+
+
+def encode_lot(salle, ply, mouvements):
+    """
+    Retourne la trame binaire d'une suite de mouvements UCI, le premier etant joue au demi-coup ply.
+    """
+    identifiant = salle.encode()
+    if len(identifiant) > 255 or not 0 <= ply <= 0xFFFF or len(mouvements) > 0xFFFF:
+        raise ValueError(f"Lot hors limites pour la partie {salle!r}")
+    return (_TRAME.pack(VERSION, len(identifiant), ply, len(mouvements)) + identifiant
+            + struct.pack(f'>{len(mouvements)}H', *map(moves.encode, mouvements)))
+
+
+def decode_lot(trame):
+    """
+    Retourne le Coup d'une trame de lot, dont le mouvement est la liste des mouvements UCI du lot.
+    """
+    trame = bytes(trame)
+    if len(trame) < _TRAME.size:
+        raise ValueError("Trame tronquee")
+    version, longueur, ply, nombre = _TRAME.unpack_from(trame)
+    if version != VERSION:
+        raise ValueError(f"Version de protocole inconnue : {version}")
+    if len(trame) != _TRAME.size + longueur + 2 * nombre:
+        raise ValueError("Trame tronquee")
+    salle = trame[_TRAME.size:_TRAME.size + longueur].decode()
+    codes = struct.unpack_from(f'>{nombre}H', trame, _TRAME.size + longueur)
+    return Coup(salle, ply, [moves.decode(c) for c in codes])
+
+
+def encode_json(sid, ply, mouvement, salle=None):
+    """
+    Retourne le message JSON d'un mouvement, pour les clients qui n'utilisent pas les trames binaires.
+    """
+    message = {"sid": sid, "move": mouvement, "ply": ply}
+    if salle is not None:
+        message["salle"] = salle
+    return json.dumps(message)
+
+
+def decode(message):
+    """
+    Retourne le Coup contenu dans une trame binaire ou dans un message JSON. Leve ValueError si le message est
+    illisible ou d'une version inconnue.
+    """
+    if isinstance(message, str):
+        return _decode_json(message)
+
+    message = bytes(message)
+    if len(message) < _TRAME.size:
+        raise ValueError("Trame tronquee")
+    version, longueur, ply, code = _TRAME.unpack_from(message)
+    if version != VERSION:
+        raise ValueError(f"Version de protocole inconnue : {version}")
+    if len(message) != _TRAME.size + longueur:
+        raise ValueError("Trame tronquee")
+    return Coup(message[_TRAME.size:].decode(), ply, moves.decode(code))
+
+
+def _decode_json(message):
+    """
+    Decode un message JSON. Dans l'ancien format, le mouvement UCI est suivi des coordonnees de la piece a l'ecran
+    sur 6 chiffres : on les retire.
+    """
+    try:
+        donnees = json.loads(message)
+        mouvement = donnees["move"]
+        if not isinstance(mouvement, str):
+            raise TypeError(mouvement)
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Message illisible : {message!r}") from None
+
+    if len(mouvement) > 6 and mouvement[-6:].isdigit():
+        mouvement = mouvement[:-6]
+    moves.encode(mouvement)   # Leve ValueError si le mouvement n'est pas un mouvement UCI
+    return Coup(donnees.get("salle"), donnees.get("ply"), mouvement, donnees.get("sid"))
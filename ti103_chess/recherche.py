@@ -0,0 +1,565 @@
+"""
+Ce module est le moteur de jeu de l'ordinateur : il cherche le meilleur mouvement d'une position.
+
+La recherche est un alpha-beta en approfondissement iteratif : profondeur 1, puis 2, puis 3... jusqu'a la profondeur,
+la duree ou le nombre de noeuds demandes. Le mouvement retenu est celui de la derniere profondeur terminee. Aux
+feuilles, une recherche de repos ne joue que les prises, pour ne pas evaluer une position au milieu d'un echange.
+
+L'ordre des mouvements fait l'essentiel des coupures alpha-beta : d'abord le mouvement de la table de transposition,
+puis les prises, de la plus grosse victime par le plus petit attaquant (MVV-LVA), les deux mouvements tueurs du
+demi-coup (les derniers mouvements calmes qui y ont provoque une coupure), et enfin les autres mouvements calmes selon
+leur historique de coupures.
+
+La table de transposition garde le resultat des positions deja cherchees, reconnues par leur cle de Zobrist, tenue a
+jour a chaque mouvement. Sa taille est fixe : elle vit dans un tampon d'octets, a raison de deux mots de 64 bits par
+entree (voir TableTransposition).
+
+Le GIL limite une recherche a un coeur. RechercheParallele repartit la recherche sur plusieurs processus (Lazy SMP) :
+chacun cherche la meme position, dans un ordre un peu different, et tous partagent la meme table de transposition,
+placee en memoire partagee. Les processus auxiliaires y laissent les resultats de positions que le processus
+principal n'a plus a chercher.
+
+chess.Board ne sert qu'a generer et jouer les mouvements.
+"""
+import collections
+import multiprocessing
+import random
+import time
+import weakref
+from multiprocessing import shared_memory
+
+import chess
+
+try:
+    import ti103_chess.zobrist as zobrist
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import zobrist
+
+
+# Valeur des pieces en centiemes de pion, par chess.PieceType
+VALEURS = [0, 100, 320, 330, 500, 900, 20000]
+
+# Le score d'un mat au demi-coup ply est MAT - ply : plus le mat est proche, plus le score est grand
+MAT = 30000
+_INFINI = MAT + 1
+
+# Tables piece-case, du point de vue des Blancs, de a8 a h1 (ligne par ligne, comme on lit l'echiquier)
+_TABLES_PIECES = {
+    chess.PAWN: [0, 0, 0, 0, 0, 0, 0, 0,
+                 50, 50, 50, 50, 50, 50, 50, 50,
+                 10, 10, 20, 30, 30, 20, 10, 10,
+                 5, 5, 10, 25, 25, 10, 5, 5,
+                 0, 0, 0, 20, 20, 0, 0, 0,
+                 5, -5, -10, 0, 0, -10, -5, 5,
+                 5, 10, 10, -20, -20, 10, 10, 5,
+                 0, 0, 0, 0, 0, 0, 0, 0],
+    chess.KNIGHT: [-50, -40, -30, -30, -30, -30, -40, -50,
+                   -40, -20, 0, 0, 0, 0, -20, -40,
+                   -30, 0, 10, 15, 15, 10, 0, -30,
+                   -30, 5, 15, 20, 20, 15, 5, -30,
+                   -30, 0, 15, 20, 20, 15, 0, -30,
+                   -30, 5, 10, 15, 15, 10, 5, -30,
+                   -40, -20, 0, 5, 5, 0, -20, -40,
+                   -50, -40, -30, -30, -30, -30, -40, -50],
+    chess.BISHOP: [-20, -10, -10, -10, -10, -10, -10, -20,
+                   -10, 0, 0, 0, 0, 0, 0, -10,
+                   -10, 0, 5, 10, 10, 5, 0, -10,
+                   -10, 5, 5, 10, 10, 5, 5, -10,
+                   -10, 0, 10, 10, 10, 10, 0, -10,
+                   -10, 10, 10, 10, 10, 10, 10, -10,
+                   -10, 5, 0, 0, 0, 0, 5, -10,
+                   -20, -10, -10, -10, -10, -10, -10, -20],
+    chess.ROOK: [0, 0, 0, 0, 0, 0, 0, 0,
+                 5, 10, 10, 10, 10, 10, 10, 5,
+                 -5, 0, 0, 0, 0, 0, 0, -5,
+                 -5, 0, 0, 0, 0, 0, 0, -5,
+                 -5, 0, 0, 0, 0, 0, 0, -5,
+                 -5, 0, 0, 0, 0, 0, 0, -5,
+                 -5, 0, 0, 0, 0, 0, 0, -5,
+                 0, 0, 0, 5, 5, 0, 0, 0],
+    chess.QUEEN: [-20, -10, -10, -5, -5, -10, -10, -20,
+                  -10, 0, 0, 0, 0, 0, 0, -10,
+                  -10, 0, 5, 5, 5, 5, 0, -10,
+                  -5, 0, 5, 5, 5, 5, 0, -5,
+                  0, 0, 5, 5, 5, 5, 0, -5,
+                  -10, 5, 5, 5, 5, 5, 0, -10,
+                  -10, 0, 5, 0, 0, 0, 0, -10,
+                  -20, -10, -10, -5, -5, -10, -10, -20],
+    chess.KING: [-30, -40, -40, -50, -50, -40, -40, -30,
+                 -30, -40, -40, -50, -50, -40, -40, -30,
+                 -30, -40, -40, -50, -50, -40, -40, -30,
+                 -30, -40, -40, -50, -50, -40, -40, -30,
+                 -20, -30, -30, -40, -40, -30, -30, -20,
+                 -10, -20, -20, -20, -20, -20, -20, -10,
+                 20, 20, 0, 0, 0, 0, 20, 20,
+                 20, 30, 10, 0, 0, 10, 30, 20],
+}
+
+# La valeur de chaque piece sur chaque case, materiel compris : _POSITIONS[couleur][type][case], case comme dans chess
+_POSITIONS = [[[0] * 64] + [[VALEURS[t] + _TABLES_PIECES[t][case if couleur == chess.BLACK else case ^ 56]
+                             for case in chess.SQUARES] for t in chess.PIECE_TYPES]
+              for couleur in (chess.BLACK, chess.WHITE)]
+
+# Les nombres aleatoires des cles de Zobrist, communs avec bitboard.Position.cle
+_ZOBRIST = zobrist.PIECES
+_TRAIT = zobrist.TRAIT
+_ROQUES = zobrist.ROQUES
+_EN_PASSANT = zobrist.EN_PASSANT
+
+
+def evalue(board):
+    """
+    Retourne le score d'une position du point de vue du joueur qui a le trait, en centiemes de pion : le materiel et
+    la place des pieces.
+    """
+    score = 0
+    for couleur, signe in ((chess.WHITE, 1), (chess.BLACK, -1)):
+        positions = _POSITIONS[couleur]
+        occupees = board.occupied_co[couleur]
+        for type_, masque in enumerate((board.pawns, board.knights, board.bishops, board.rooks, board.queens,
+                                        board.kings), 1):
+            table = positions[type_]
+            for case in chess.scan_reversed(masque & occupees):
+                score += signe * table[case]
+    return score if board.turn else -score
+
+
+def _etat(board):
+    """
+    Retourne la partie de la cle de Zobrist qui ne depend pas des pieces : trait, droits de roque et prise en passant.
+    La case en passant ne compte que si une prise en passant est legale, comme dans bitboard.Position.cle.
+    """
+    h = 0 if board.turn else _TRAIT
+    for case in chess.scan_reversed(board.castling_rights):
+        h ^= _ROQUES[case]
+    if board.ep_square is not None and board.has_legal_en_passant():
+        h ^= _EN_PASSANT[board.ep_square & 7]
+    return h
+
+
+def cle(board):
+    """
+    Retourne la cle de Zobrist d'une position, sur 64 bits.
+    """
+    h = _etat(board)
+    for case, piece in board.piece_map().items():
+        h ^= _ZOBRIST[piece.color][piece.piece_type][case]
+    return h
+
+
+def joue(board, move, h):
+    """
+    Joue un mouvement legal sur board et retourne la cle de la nouvelle position, calculee a partir de la cle h de
+    l'ancienne sans la recalculer entierement.
+    """
+    h ^= _etat(board)
+    couleur, depart, arrivee = board.turn, move.from_square, move.to_square
+    zobrist, adverse = _ZOBRIST[couleur], _ZOBRIST[not couleur]
+    type_ = board.piece_type_at(depart)
+    h ^= zobrist[type_][depart]
+    if type_ == chess.KING and board.is_castling(move):
+        rangee = depart & 56
+        if board.is_kingside_castling(move):
+            h ^= zobrist[chess.KING][rangee + 6] ^ zobrist[chess.ROOK][rangee + 7] ^ zobrist[chess.ROOK][rangee + 5]
+        else:
+            h ^= zobrist[chess.KING][rangee + 2] ^ zobrist[chess.ROOK][rangee] ^ zobrist[chess.ROOK][rangee + 3]
+    else:
+        prise = board.piece_type_at(arrivee)
+        if prise:
+            h ^= adverse[prise][arrivee]
+        elif type_ == chess.PAWN and arrivee == board.ep_square:
+            h ^= adverse[chess.PAWN][arrivee - 8 if couleur else arrivee + 8]
+        h ^= zobrist[move.promotion or type_][arrivee]
+    board.push(move)
+    return h ^ _etat(board)
+
+
+def code(move):
+    """
+    Retourne le code sur 16 bits d'un mouvement, comme dans le module moves.
+    """
+    return move.from_square | move.to_square << 6 | ((move.promotion or 1) - 1) << 12
+
+
+def mouvement(code):
+    """
+    Retourne le chess.Move d'un code sur 16 bits.
+    """
+    promotion = code >> 12
+    return chess.Move(code & 63, code >> 6 & 63, promotion + 1 if promotion else None)
+
+
+# Les bornes d'un score de la table de transposition
+EXACTE, INFERIEURE, SUPERIEURE = 0, 1, 2
+
+
+class TableTransposition:
+    """
+    Une table de transposition de taille fixe, dans un tampon d'octets (par defaut, octets octets alloues ici).
+
+    Chaque entree tient dans deux mots de 64 bits : la donnee, et la cle de la position melangee a la donnee (cle ^
+    donnee). Une entree ecrite a moitie, par exemple par un autre processus qui partage le tampon, ne correspond ainsi
+    a aucune cle. La donnee contient :
+
+        bits  0-15   mouvement (code du module moves)
+              16-23  profondeur
+              24-25  borne du score (EXACTE, INFERIEURE ou SUPERIEURE)
+              26-31  generation de la recherche
+              32-63  score, decale de 2**31
+
+    Une position n'a qu'une place possible. Une autre position l'y remplace, sauf si l'entree en place vient de la
+    recherche en cours et d'une profondeur plus grande.
+    """
+    def __init__(self, octets=16 << 20, tampon=None):
+        self._octets = memoryview(bytearray(octets) if tampon is None else tampon)
+        self._mots = self._octets.cast('Q')
+        self.taille = len(self._mots) // 2
+        self.generation = 0
+
+    def nouvelle_recherche(self, generation=None):
+        """
+        Change de generation : les entrees des recherches precedentes deviennent remplacables. Les processus qui
+        partagent une table passent la generation de la recherche en cours.
+        """
+        self.generation = (self.generation + 1) & 63 if generation is None else generation
+
+    def ferme(self):
+        """
+        Libere le tampon de la table, par exemple pour fermer la memoire partagee qui le contient.
+        """
+        self._mots.release()
+        self._octets.release()
+
+    def lit(self, cle):
+        """
+        Retourne l'entree d'une position, (code du mouvement, profondeur, borne, score), ou None si elle est absente.
+        """
+        i = cle % self.taille * 2
+        donnee = self._mots[i + 1]
+        if self._mots[i] ^ donnee != cle or not donnee:
+            return None
+        return donnee & 0xFFFF, donnee >> 16 & 0xFF, donnee >> 24 & 3, (donnee >> 32) - (1 << 31)
+
+    def ecrit(self, cle, code, profondeur, borne, score):
+        """
+        Ecrit l'entree d'une position, selon la politique de remplacement de la table.
+        """
+        i = cle % self.taille * 2
+        ancienne = self._mots[i + 1]
+        if ancienne:
+            if self._mots[i] ^ ancienne == cle:
+                code = code or ancienne & 0xFFFF   # On garde le meilleur mouvement connu
+            elif ancienne >> 26 & 63 == self.generation and ancienne >> 16 & 0xFF > profondeur:
+                return
+        donnee = code | min(profondeur, 255) << 16 | borne << 24 | self.generation << 26 | (score + (1 << 31)) << 32
+        self._mots[i] = cle ^ donnee
+        self._mots[i + 1] = donnee
+
+
+# Le resultat d'une recherche : le meilleur mouvement en UCI (None s'il n'y en a pas), son score du point de vue du
+# joueur qui a le trait, la profondeur terminee, les noeuds visites, la duree en secondes et la variante principale.
+Resultat = collections.namedtuple('Resultat', ['mouvement', 'score', 'profondeur', 'noeuds', 'duree', 'variante'])
+
+
+class _Arret(Exception):
+    """
+    La duree ou le nombre de noeuds de la recherche est epuise.
+    """
+
+
+def _vers_table(score, ply):
+    # Un score de mat est garde dans la table relativement a la position, et non a la racine de la recherche
+    if score > MAT - 1000:
+        return score + ply
+    if score < -MAT + 1000:
+        return score - ply
+    return score
+
+
+def _depuis_table(score, ply):
+    if score > MAT - 1000:
+        return score - ply
+    if score < -MAT + 1000:
+        return score + ply
+    return score
+
+
+class Recherche:
+    """
+    Le moteur de recherche. Sa table de transposition est gardee d'une recherche a l'autre, par exemple d'un mouvement
+    au suivant d'une partie.
+    """
+    def __init__(self, table=None, arret=None, graine=None):
+        self.table = TableTransposition() if table is None else table
+        self.arret = arret       # Un evenement (threading ou multiprocessing) qui arrete la recherche en cours
+        self.graine = graine     # Si elle est donnee, l'ordre des mouvements calmes est un peu melange
+        self.noeuds = 0
+
+    def cherche(self, board, profondeur=64, duree=None, noeuds=None, rapport=None, generation=None):
+        """
+        Cherche le meilleur mouvement d'une position, jusqu'a la profondeur donnee, ou jusqu'a ce que la duree (en
+        secondes) ou le nombre de noeuds soient epuises, ou que l'evenement d'arret soit signale. La fonction rapport
+        est appelee avec le Resultat de chaque profondeur terminee. Retourne le Resultat de la derniere.
+        """
+        debut = time.perf_counter()
+        self._fin = None if duree is None else debut + duree
+        self._max_noeuds = noeuds
+        self.noeuds = 0
+        self._tueurs = [[None, None] for _ in range(256)]
+        self._historique = [[0] * 64 for _ in chess.SQUARES]
+        if self.graine is not None:
+            alea = random.Random(self.graine)
+            self._historique = [[alea.randrange(16) for _ in chess.SQUARES] for _ in chess.SQUARES]
+        self.table.nouvelle_recherche(generation)
+
+        # Les positions deja jouees dans la partie : y revenir est une nulle par repetition
+        board = board.copy()
+        h = cle(board)
+        precedentes = board.copy()
+        self._repetitions = set()
+        while precedentes.move_stack:
+            precedentes.pop()
+            self._repetitions.add(cle(precedentes))
+        self._chemin = []
+
+        legaux = list(board.legal_moves)
+        resultat = Resultat(legaux[0].uci() if legaux else None, 0, 0, 0, 0.0, [])
+        if len(legaux) <= 1:
+            return resultat
+        for p in range(1, profondeur + 1):
+            try:
+                score = self._negamax(board, h, p, -_INFINI, _INFINI, 0)
+            except _Arret:
+                break
+            resultat = Resultat(self._racine.uci(), score, p, self.noeuds, time.perf_counter() - debut,
+                                self._variante(board, h, p))
+            if rapport is not None:
+                rapport(resultat)
+            if abs(score) > MAT - 1000:
+                break   # Un mat est trouve : chercher plus loin n'en trouvera pas de plus court
+        return resultat._replace(noeuds=self.noeuds, duree=time.perf_counter() - debut)
+
+    def _compte(self):
+        self.noeuds += 1
+        if self._max_noeuds is not None and self.noeuds > self._max_noeuds:
+            raise _Arret
+        if not self.noeuds & 1023 and ((self._fin is not None and time.perf_counter() > self._fin) or
+                                       (self.arret is not None and self.arret.is_set())):
+            raise _Arret
+
+    def _negamax(self, board, h, profondeur, alpha, beta, ply):
+        if profondeur <= 0:
+            return self._repos(board, alpha, beta, ply)
+        self._compte()
+        if ply and (h in self._repetitions or h in self._chemin or board.halfmove_clock >= 100):
+            return 0
+
+        alpha_initial = alpha
+        code_table = 0
+        entree = self.table.lit(h)
+        if entree is not None:
+            code_table, profondeur_table, borne, score = entree
+            if ply and profondeur_table >= profondeur:
+                score = _depuis_table(score, ply)
+                if borne == EXACTE or (borne == INFERIEURE and score >= beta) or \
+                        (borne == SUPERIEURE and score <= alpha):
+                    return score
+
+        en_echec = board.is_check()
+        if en_echec:
+            profondeur += 1   # On ne s'arrete pas sur une position en echec
+        mouvements = self._ordonne(board, code_table, ply)
+        if not mouvements:
+            return -MAT + ply if en_echec else 0
+
+        meilleur, meilleur_code = -_INFINI, 0
+        self._chemin.append(h)
+        for move in mouvements:
+            score = -self._negamax(board, joue(board, move, h), profondeur - 1, -beta, -alpha, ply + 1)
+            board.pop()
+            if score > meilleur:
+                meilleur, meilleur_code = score, code(move)
+                if not ply:
+                    self._racine = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not board.is_capture(move) and not move.promotion:
+                            self._coupure(move, profondeur, ply)
+                        break
+        self._chemin.pop()
+
+        borne = SUPERIEURE if meilleur <= alpha_initial else INFERIEURE if meilleur >= beta else EXACTE
+        self.table.ecrit(h, meilleur_code, profondeur, borne, _vers_table(meilleur, ply))
+        return meilleur
+
+    def _repos(self, board, alpha, beta, ply):
+        """
+        La recherche de repos : seules les prises sont jouees, jusqu'a une position calme.
+        """
+        self._compte()
+        note = evalue(board)
+        if note >= beta:
+            return note
+        alpha = max(alpha, note)
+        prises = []
+        for move in board.generate_legal_captures():
+            victime = VALEURS[board.piece_type_at(move.to_square) or chess.PAWN]
+            if note + victime + 200 > alpha or move.promotion:   # Sinon, meme la prise ne remonte pas le score
+                prises.append((victime * 8 - board.piece_type_at(move.from_square), move))
+        prises.sort(key=lambda prise: prise[0], reverse=True)
+        for _, move in prises:
+            board.push(move)
+            score = -self._repos(board, -beta, -alpha, ply + 1)
+            board.pop()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _ordonne(self, board, code_table, ply):
+        """
+        Retourne les mouvements legaux dans l'ordre ou les chercher.
+        """
+        tueurs = self._tueurs[ply]
+        historique = self._historique
+        notes = []
+        for move in board.generate_legal_moves():
+            if code_table and code(move) == code_table:
+                note = 1 << 30
+            elif board.is_capture(move):
+                victime = board.piece_type_at(move.to_square) or chess.PAWN   # Prise en passant
+                note = (1 << 24) + VALEURS[victime] * 8 - board.piece_type_at(move.from_square)
+            elif move.promotion:
+                note = (1 << 24) + VALEURS[move.promotion]
+            elif move == tueurs[0]:
+                note = 1 << 23
+            elif move == tueurs[1]:
+                note = (1 << 23) - 1
+            else:
+                note = historique[move.from_square][move.to_square]
+            notes.append((note, move))
+        notes.sort(key=lambda note: note[0], reverse=True)
+        return [move for _, move in notes]
+
+    def _coupure(self, move, profondeur, ply):
+        """
+        Retient un mouvement calme qui a provoque une coupure : comme tueur du demi-coup, et dans l'historique.
+        """
+        tueurs = self._tueurs[ply]
+        if tueurs[0] != move:
+            tueurs[1], tueurs[0] = tueurs[0], move
+        historique = self._historique[move.from_square]
+        historique[move.to_square] += profondeur * profondeur
+        if historique[move.to_square] > 1 << 22:   # L'historique reste sous les notes des tueurs
+            for depart in self._historique:
+                depart[:] = [note // 2 for note in depart]
+
+    def _variante(self, board, h, profondeur):
+        """
+        Retourne la variante principale, en UCI, en suivant les meilleurs mouvements de la table depuis la racine.
+        """
+        variante, copie = [], board.copy(stack=False)
+        for _ in range(profondeur):
+            entree = self.table.lit(h)
+            if entree is None or not entree[0] or not copie.is_legal(mouvement(entree[0])):
+                break
+            move = mouvement(entree[0])
+            variante.append(move.uci())
+            h = joue(copie, move, h)
+        return variante
+
+
+# Le moteur d'un processus auxiliaire de RechercheParallele, et la memoire partagee de sa table
+_auxiliaire = None
+
+
+def _initialise(nom, arret):
+    global _auxiliaire
+    memoire = shared_memory.SharedMemory(name=nom)
+    _auxiliaire = memoire, Recherche(TableTransposition(tampon=memoire.buf), arret)
+
+
+def _cherche(board, profondeur, duree, noeuds, generation, graine):
+    moteur = _auxiliaire[1]
+    moteur.graine = graine
+    return moteur.cherche(board, profondeur, duree, noeuds, generation=generation)
+
+
+class RechercheParallele:
+    """
+    Une recherche repartie sur plusieurs processus (Lazy SMP), qui partagent une table de transposition de octets
+    octets en memoire partagee.
+
+    Le processus appelant fait la recherche principale ; processus - 1 processus auxiliaires cherchent la meme
+    position, chacun avec un ordre des mouvements calmes different. Quand la recherche principale se termine, les
+    auxiliaires sont arretes, et le resultat le plus profond est retenu. Il faut appeler ferme() a la fin.
+    """
+    def __init__(self, processus=4, octets=64 << 20):
+        self.processus = processus
+        # Les auxiliaires sont lances par spawn : un fork copierait les verrous tenus par les autres fils du processus,
+        # par exemple celui de l'ordinateur d'un client, et l'auxiliaire pourrait les attendre pour toujours
+        contexte = multiprocessing.get_context('spawn')
+        self._memoire = shared_memory.SharedMemory(create=True, size=octets)
+        self._arret = contexte.Event()
+        self.table = TableTransposition(tampon=self._memoire.buf)
+        self._moteur = Recherche(self.table, self._arret)
+        self._pool = None
+        if processus > 1:
+            self._pool = contexte.Pool(processus - 1, _initialise, (self._memoire.name, self._arret))
+
+    def cherche(self, board, profondeur=64, duree=None, noeuds=None, rapport=None):
+        """
+        Comme Recherche.cherche ; le nombre de noeuds du resultat est celui de tous les processus. Si la recherche
+        principale leve une exception, les auxiliaires sont arretes quand meme, et l'evenement d'arret est efface pour
+        la recherche suivante.
+        """
+        self.table.nouvelle_recherche()
+        generation = self.table.generation
+        auxiliaires = [self._pool.apply_async(_cherche, (board, profondeur, duree, noeuds, generation, graine))
+                       for graine in range(1, self.processus)]
+        try:
+            resultat = self._moteur.cherche(board, profondeur, duree, noeuds, rapport, generation)
+        finally:
+            self._arret.set()
+            try:
+                autres = [auxiliaire.get() for auxiliaire in auxiliaires]
+            finally:
+                self._arret.clear()
+        total = resultat.noeuds
+        for autre in autres:
+            total += autre.noeuds
+            if autre.profondeur > resultat.profondeur and autre.mouvement is not None:
+                resultat = autre._replace(duree=resultat.duree)
+        return resultat._replace(noeuds=total)
+
+    def ferme(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+        self.table.ferme()
+        self._memoire.close()
+        self._memoire.unlink()
+
+
+def joueur(duree=1.0, noeuds=None, octets=16 << 20, processus=1):
+    """
+    Retourne une fonction qui choisit le mouvement UCI de l'ordinateur dans une position chess.Board, en au plus duree
+    secondes ou noeuds noeuds, sur un ou plusieurs processus. Sa table de transposition sert d'un mouvement au
+    suivant.
+
+    La fonction a une methode ferme(), qui libere la table, et sur plusieurs processus arrete les auxiliaires et
+    libere la memoire partagee. Elle est appelee au plus tard quand la fonction est detruite, ou a la sortie.
+    """
+    if processus == 1:
+        recherche = Recherche(TableTransposition(octets))
+        liberation = recherche.table.ferme
+    else:
+        recherche = RechercheParallele(processus, octets)
+        liberation = recherche.ferme
+
+    def choisit(board):
+        return recherche.cherche(board, duree=duree, noeuds=noeuds).mouvement
+    choisit.ferme = weakref.finalize(choisit, liberation)
+    return choisit
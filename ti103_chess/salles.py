@@ -0,0 +1,143 @@
+"""
+Ce module tient le registre des salles de jeu du serveur.
+
+Chaque partie se joue dans une salle : deux joueurs (Blanc et Noir) et autant de spectateurs que l'on veut. Un
+mouvement n'est envoye qu'aux autres membres de la salle du joueur, et non plus a tous les clients connectes : avec N
+parties en cours, un mouvement coute quelques messages au lieu de 2N, et les clients n'ont plus a trier ceux qui ne les
+concernent pas.
+
+Le registre ne depend pas de Flask : le serveur lui demande a qui envoyer un mouvement, et s'occupe du transport.
+"""
+import itertools
+import threading
+
+
+COULEURS = ('Blanc', 'Noir')
+SPECTATEUR = 'Spectateur'
+
+
+class Salle:
+    """
+    Une salle de jeu : une partie, ses joueurs et ses spectateurs.
+    """
+    def __init__(self, identifiant):
+        self.identifiant = identifiant
+        self.joueurs = {}        # sid -> couleur, dans l'ordre d'arrivee
+        self.spectateurs = set()
+
+    def membres(self):
+        """
+        Retourne les sid de tous les membres de la salle, joueurs puis spectateurs.
+        """
+        return list(self.joueurs) + list(self.spectateurs)
+
+    def __len__(self):
+        return len(self.joueurs) + len(self.spectateurs)
+
+
+class Registre:
+    """
+    Le registre des salles et des sessions du serveur.
+
+    Les evenements du serveur arrivent de plusieurs fils : toutes les operations sont protegees par un verrou.
+
+    Avec plusieurs processus, accepte dit si une salle revient a celui-ci : le registre ne cree que ces salles, et ses
+    identifiants ne se confondent pas avec ceux des autres processus.
+    """
+    def __init__(self, accepte=None):
+        self.salles = {}          # identifiant -> Salle
+        self.accepte = accepte if accepte is not None else (lambda identifiant: True)
+        self._sessions = {}       # sid -> identifiant de sa salle
+        self._compteur = itertools.count(1)
+        self._verrou = threading.Lock()
+
+    def cree(self, sid, identifiant=None, couleur=COULEURS[0]):
+        """
+        Cree une salle dont le joueur sid prend une couleur, les Blancs par defaut, et retourne son identifiant. Sans
+        identifiant, le registre en choisit un. Leve ValueError si la salle existe deja ou revient a un autre processus.
+        """
+        with self._verrou:
+            if identifiant is None:
+                identifiant = next(i for i in map(str, self._compteur) if i not in self.salles and self.accepte(i))
+            if identifiant in self.salles:
+                raise ValueError(f"La salle {identifiant} existe deja")
+            if not self.accepte(identifiant):
+                raise ValueError(f"La salle {identifiant} revient a un autre processus")
+
+            self._quitte(sid)
+            salle = self.salles[identifiant] = Salle(identifiant)
+            salle.joueurs[sid] = couleur
+            self._sessions[sid] = identifiant
+            return identifiant
+
+    def rejoint(self, sid, identifiant, spectateur=False, couleur=None):
+        """
+        Fait entrer sid dans une salle et retourne son role : la couleur demandee si elle est libre (par exemple a une
+        reconnexion), sinon la couleur libre, ou Spectateur si les deux joueurs sont deja la ou qu'il le demande. Leve
+        KeyError si la salle n'existe pas.
+        """
+        with self._verrou:
+            salle = self.salles[identifiant]
+            if self._sessions.get(sid) == identifiant:
+                return salle.joueurs.get(sid, SPECTATEUR)
+
+            self._quitte(sid)
+            libres = [c for c in COULEURS if c not in salle.joueurs.values()]
+            libres.sort(key=lambda c: c != couleur)   # La couleur demandee d'abord
+            if spectateur or not libres:
+                salle.spectateurs.add(sid)
+                role = SPECTATEUR
+            else:
+                role = salle.joueurs[sid] = libres[0]
+            self._sessions[sid] = identifiant
+            return role
+
+    def quitte(self, sid):
+        """
+        Fait sortir sid de sa salle, par exemple a sa deconnexion, et retourne l'identifiant de la salle ou None. Une
+        salle vide est supprimee.
+        """
+        with self._verrou:
+            return self._quitte(sid)
+
+    def _quitte(self, sid):
+        identifiant = self._sessions.pop(sid, None)
+        if identifiant is not None:
+            salle = self.salles[identifiant]
+            salle.joueurs.pop(sid, None)
+            salle.spectateurs.discard(sid)
+            if not salle:
+                del self.salles[identifiant]
+        return identifiant
+
+    def salle_de(self, sid):
+        """
+        Retourne l'identifiant de la salle de sid, ou None s'il n'est dans aucune salle.
+        """
+        return self._sessions.get(sid)
+
+    def role(self, sid):
+        """
+        Retourne le role de sid dans sa salle (sa couleur ou Spectateur), ou None s'il n'est dans aucune salle.
+        """
+        with self._verrou:
+            identifiant = self._sessions.get(sid)
+            if identifiant is None:
+                return None
+            return self.salles[identifiant].joueurs.get(sid, SPECTATEUR)
+
+    def destinataires(self, sid):
+        """
+        Retourne les sid auxquels envoyer un mouvement joue par sid : les autres membres de sa salle.
+        """
+        with self._verrou:
+            identifiant = self._sessions.get(sid)
+            if identifiant is None:
+                return []
+            return [m for m in self.salles[identifiant].membres() if m != sid]
+
+    def __len__(self):
+        """
+        Retourne le nombre de salles ouvertes.
+        """
+        return len(self.salles)
@@ -1,22 +1,94 @@
-
 import json
+import sys
 
 from flask import Flask, request
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room, leave_room
+
+import explorateur
+import service
 
 app = Flask(__name__)
 
 socket_app = SocketIO(app)
 
+# Les salles, l'arbitre et l'explorateur d'ouvertures (voir le module service) : ce module n'en est que le transport
+jeu = service.Service()
+
+
+def _entre(entree):
+    """
+    Fait quitter au client son ancienne room et rejoindre la nouvelle, et retourne la reponse a lui faire.
+    """
+    if entree.quitte is not None:
+        leave_room(entree.quitte)
+    if entree.rejoint is not None:
+        join_room(entree.rejoint)
+    return entree.reponse
+
+
+@socket_app.on('create')
+def handle_create(data):
+    """
+    Cree une salle, eventuellement avec l'identifiant demande, dont le client prend les Blancs.
+    """
+    return _entre(jeu.cree(request.sid, json.loads(data) if data else {}))
+
+
+@socket_app.on('join')
+def handle_join(data):
+    """
+    Fait entrer le client dans une salle existante, comme joueur s'il reste une couleur libre, sinon comme spectateur.
+    """
+    return _entre(jeu.rejoint(request.sid, json.loads(data)))
+
+
+@socket_app.on('resync')
+def handle_resync(data):
+    """
+    Renvoie a un client qui se reconnecte les mouvements joues dans sa salle apres le demi-coup ply qu'il connait, en
+    un seul lot.
+    """
+    return jeu.resync(request.sid, json.loads(data))
+
+
+@socket_app.on('explore')
+def handle_explore(data):
+    """
+    Renvoie les mouvements joues dans les parties de l'explorateur apres une suite de mouvements, une position donnee
+    par sa FEN, ou apres les mouvements de la partie de la salle du client, avec leurs resultats.
+    """
+    return jeu.explore(request.sid, json.loads(data) if data else {})
+
+
+@socket_app.on('disconnect')
+def handle_disconnect():
+    jeu.deconnecte(request.sid)
+
+
 @socket_app.on('connected')
 def handle_id(data):
-    print("Receiving data")
-    print(data)
-    data_recv = json.loads(data)
-    brd_cast = data_recv["move"]
-    x = {"sid": data_recv["sid"], "move": brd_cast}
-    x_json = json.dumps(x)
-    socket_app.emit("server response",x_json, broadcast=True)
+    """
+    Valide un mouvement, en trame binaire ou en JSON, et le relaie aux autres membres de la salle du joueur.
+    """
+    relais = jeu.joue(request.sid, data)
+    if relais is None:
+        return
+    if relais.refus is not None:
+        socket_app.emit("move rejected", relais.refus, to=request.sid)
+        return
+    salle = jeu.registre.salle_de(request.sid)
+    for envoi in relais.envois:
+        # A toute la salle d'un coup si ses membres sont tous dans ce format
+        if envoi.tous:
+            socket_app.emit("server response", envoi.message, to=salle, skip_sid=request.sid)
+        else:
+            for membre in envoi.membres:
+                socket_app.emit("server response", envoi.message, to=membre)
+
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        jeu.ouvertures, rapport = explorateur.charge(sys.argv[1])
+        print("Explorateur d'ouvertures :", rapport)
+        print("Index des positions :", jeu.ouvertures.indexe())
     socket_app.run(app, debug=True, host='127.0.0.1', port=3000)
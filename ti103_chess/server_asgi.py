@@ -0,0 +1,219 @@
+"""
+Ce module est le mode de production du serveur de jeu, sur asyncio.
+
+server.py utilise le serveur de developpement de Flask-SocketIO, avec un fil par connexion : il ne tient pas plus de
+quelques centaines de clients. Ici, le serveur socketio.AsyncServer du package python-socketio est servi comme
+application ASGI par uvicorn : toutes les connexions d'un processus sont gerees par une seule boucle asyncio.
+
+Les evenements sont les memes que ceux de server.py ('create', 'join', 'connected', 'server response', 'move
+rejected', 'explore') : les clients n'ont pas a changer. Les mouvements peuvent etre en JSON ou en trames binaires
+(voir le module protocole). Les salles, l'arbitre, le relais des mouvements et l'explorateur sont ceux du module
+service, communs aux deux serveurs : ce module n'en est que le transport, avec le bus entre les processus.
+
+Avec plusieurs processus (--workers n), le processus de rang k ecoute sur le port port + k. Chaque partie a un
+processus proprietaire (voir bus.proprietaire) : ses joueurs s'y connectent, et il garde sa salle et son echiquier de
+reference. Un spectateur peut rejoindre la partie depuis n'importe quel processus : les mouvements lui parviennent par
+le bus (un Courtier lance avec les processus, ou Redis avec --bus).
+
+Utilisation ::
+
+    python -m ti103_chess.server_asgi --port 3000 --workers 4 --ouvertures parties.pgn.gz
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import signal
+import sys
+
+import socketio
+
+import ti103_chess.bus as bus_
+import ti103_chess.explorateur as explorateur
+import ti103_chess.protocole as protocole
+import ti103_chess.salles as salles
+import ti103_chess.service as service
+
+
+def cree_application(bus=None, rang=0, nombre=1, ouvertures=None):
+    """
+    Cree le serveur socket.io du processus de rang donne parmi nombre, et retourne l'application ASGI qui le sert,
+    avec le serveur dans son attribut sio et le service de jeu dans son attribut jeu. ouvertures est l'Explorateur
+    qui repond a l'evenement 'explore'.
+    """
+    sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+    # Chaque processus ne cree que les salles dont il est le proprietaire sur le bus
+    jeu = service.Service(ouvertures, (lambda salle: bus_.proprietaire(salle, nombre) == rang) if nombre > 1 else None)
+    observateurs = {}     # Partie d'un autre processus -> sid des spectateurs qui la suivent depuis celui-ci
+    observees = {}        # sid d'un spectateur -> partie d'un autre processus qu'il suit
+    boucle = None
+
+    async def entre(sid, entree):
+        """
+        Fait quitter a sid son ancienne room et rejoindre la nouvelle, et retourne la reponse a lui faire.
+        """
+        if entree.quitte is not None:
+            await sio.leave_room(sid, entree.quitte)
+        if entree.rejoint is not None:
+            await arrete_observation(sid)
+            await sio.enter_room(sid, entree.rejoint)
+        return entree.reponse
+
+    async def envoie(sid, room, envois):
+        for envoi in envois:
+            # A toute la room d'un coup si ses membres sont tous dans ce format
+            if envoi.tous:
+                await sio.emit("server response", envoi.message, room=room, skip_sid=sid)
+            else:
+                for membre in envoi.membres:
+                    await sio.emit("server response", envoi.message, to=membre)
+
+    def room_observee(salle):
+        # Les spectateurs d'une partie d'un autre processus ont leur room, distincte de celle d'une salle homonyme
+        return f'observe/{salle}'
+
+    async def relaie_distant(trame):
+        """
+        Envoie aux spectateurs de ce processus un mouvement publie sur le bus par le proprietaire de la partie.
+        """
+        coup = protocole.decode(trame)
+        membres = list(observateurs.get(coup.salle, ()))
+        await envoie(None, room_observee(coup.salle),
+                     jeu.repartit(membres, trame, lambda: protocole.encode_json(None, coup.ply, coup.mouvement)))
+
+    def recoit(trame):
+        # Appelee dans le fil du bus : le mouvement est relaye depuis la boucle asyncio
+        boucle.call_soon_threadsafe(asyncio.ensure_future, relaie_distant(trame))
+
+    async def observe(sid, salle):
+        """
+        Fait suivre a un spectateur une partie d'un autre processus, en s'abonnant au canal de la partie sur le bus.
+        """
+        nonlocal boucle
+        boucle = asyncio.get_running_loop()
+        await arrete_observation(sid)
+        if salle not in observateurs:
+            observateurs[salle] = set()
+            # L'abonnement attend la confirmation du bus : hors de la boucle asyncio
+            await boucle.run_in_executor(None, bus.abonne, f'salle/{salle}', recoit)
+        observateurs[salle].add(sid)
+        observees[sid] = salle
+        await sio.enter_room(sid, room_observee(salle))
+
+    async def arrete_observation(sid):
+        salle = observees.pop(sid, None)
+        if salle is not None:
+            await sio.leave_room(sid, room_observee(salle))
+            observateurs[salle].discard(sid)
+            if not observateurs[salle]:
+                del observateurs[salle]
+                bus.desabonne(f'salle/{salle}')
+
+    @sio.on('create')
+    async def handle_create(sid, data):
+        return await entre(sid, jeu.cree(sid, json.loads(data) if data else {}))
+
+    @sio.on('join')
+    async def handle_join(sid, data):
+        data_recv = json.loads(data)
+        salle = data_recv["salle"]
+        if salle not in jeu.registre.salles and salle not in jeu.arbitrage and bus is not None \
+                and bus_.proprietaire(salle, nombre) != rang:
+            # La partie est gardee par un autre processus : on ne peut la suivre qu'en spectateur
+            jeu.retient_format(sid, data_recv)
+            ancienne = jeu.quitte(sid)
+            if ancienne is not None:
+                await sio.leave_room(sid, ancienne)
+            await observe(sid, salle)
+            return json.dumps({"salle": salle, "role": salles.SPECTATEUR})
+        return await entre(sid, jeu.rejoint(sid, data_recv))
+
+    @sio.on('resync')
+    async def handle_resync(sid, data):
+        return jeu.resync(sid, json.loads(data))
+
+    @sio.on('explore')
+    async def handle_explore(sid, data):
+        return jeu.explore(sid, json.loads(data) if data else {})
+
+    @sio.on('disconnect')
+    async def handle_disconnect(sid, *args):
+        await arrete_observation(sid)
+        jeu.deconnecte(sid)
+
+    @sio.on('connected')
+    async def handle_id(sid, data):
+        relais = jeu.joue(sid, data)
+        if relais is None:
+            return
+        if relais.refus is not None:
+            await sio.emit("move rejected", relais.refus, to=sid)
+            return
+        salle = jeu.registre.salle_de(sid)
+        await envoie(sid, salle, relais.envois)
+        if bus is not None and nombre > 1:
+            # Pour les spectateurs connectes aux autres processus
+            bus.publie(f'salle/{salle}', relais.trame)
+
+    application = socketio.ASGIApp(sio)
+    application.sio = sio
+    application.jeu = jeu
+    return application
+
+
+def sert(host, port, bus=None, rang=0, nombre=1, ouvertures=None, cle=None):
+    """
+    Sert le processus de rang donne, sur le port donne, jusqu'a son arret. cle est la cle d'authentification du
+    courtier d'un bus tcp://. ouvertures est le chemin du fichier PGN des parties de l'explorateur d'ouvertures.
+    """
+    import uvicorn
+
+    bus = bus_.ouvre(bus, cle) if bus else None
+    if ouvertures is not None:
+        ouvertures, rapport = explorateur.charge(ouvertures)
+        print(f"Explorateur d'ouvertures du processus {rang} : {rapport}")
+        print(f"Index des positions du processus {rang} : {ouvertures.indexe()}")
+    uvicorn.run(cree_application(bus, rang, nombre, ouvertures), host=host, port=port, log_level='warning')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de jeu asyncio (ASGI)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--workers', type=int, default=1, help="Nombre de processus, sur les ports port a port + n - 1")
+    parser.add_argument('--bus', help="Adresse du bus reliant les processus : tcp://hote:port ou redis://... Par "
+                                      "defaut, un courtier est lance sur le port port + n de la machine locale")
+    parser.add_argument('--cle-bus', type=bytes.fromhex, help="Cle d'authentification, en hexadecimal, du courtier "
+                                                              "d'un bus tcp:// donne par --bus")
+    parser.add_argument('--ouvertures', help="Fichier PGN des parties de l'explorateur d'ouvertures")
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        sert(args.host, args.port, ouvertures=args.ouvertures)
+        return
+
+    courtier = None
+    if args.bus is None:
+        # Le courtier n'ecoute que sur la machine locale, avec une cle tiree au hasard (voir le module bus)
+        courtier = bus_.Courtier(('127.0.0.1', args.port + args.workers))
+        args.bus = f'tcp://127.0.0.1:{args.port + args.workers}'
+        args.cle_bus = courtier.authkey
+    processus = [multiprocessing.Process(target=sert, args=(args.host, args.port + k, args.bus, k, args.workers,
+                                                            args.ouvertures, args.cle_bus))
+                 for k in range(args.workers)]
+    for p in processus:
+        p.start()
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))   # Arrete aussi les processus de service
+    try:
+        for p in processus:
+            p.join()
+    finally:
+        for p in processus:
+            p.terminate()
+        if courtier is not None:
+            courtier.ferme()
+
+
+if __name__ == '__main__':
+    main()
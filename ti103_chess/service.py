@@ -0,0 +1,194 @@
+"""
+Ce module est la logique commune des serveurs de jeu : salles, arbitrage, relais des mouvements et explorateur
+d'ouvertures.
+
+server.py (Flask-SocketIO) et server_asgi.py (asyncio) ne different que par leur transport : la facon d'entrer dans
+une room, de repondre et d'envoyer un message. Chaque evenement est traite ici, sans transport : les methodes de
+Service retournent la reponse au client, les rooms a quitter et rejoindre, et les messages a envoyer, que le serveur
+n'a plus qu'a transmettre.
+
+Les messages d'un mouvement sont decrits par des Envoi : les membres destinataires, s'ils forment toute la salle (le
+serveur envoie alors a la room d'un coup, sauf a l'auteur du mouvement), et le message dans leur format.
+"""
+import collections
+import json
+
+try:
+    import ti103_chess.arbitre as arbitre
+    import ti103_chess.explorateur as explorateur
+    import ti103_chess.protocole as protocole
+    import ti103_chess.salles as salles
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import arbitre
+    import explorateur
+    import protocole
+    import salles
+
+
+# L'issue d'une entree dans une salle : la reponse au client, la room a quitter et celle a rejoindre (ou None)
+Entree = collections.namedtuple('Entree', ['reponse', 'quitte', 'rejoint'])
+
+# Un message a des membres d'une salle, qui sont tous ses destinataires ou seulement ceux d'un format
+Envoi = collections.namedtuple('Envoi', ['membres', 'tous', 'message'])
+
+# L'issue d'un mouvement : le refus a renvoyer au joueur (ou None), les Envoi aux autres membres de la salle et la
+# trame binaire du mouvement
+Relais = collections.namedtuple('Relais', ['refus', 'envois', 'trame'])
+
+
+class Service:
+    """
+    L'etat d'un serveur de jeu : le registre des salles, l'arbitre des parties, le format des mouvements de chaque
+    session et l'explorateur d'ouvertures. accepte dit si une salle revient a ce serveur, comme pour salles.Registre.
+    """
+    def __init__(self, ouvertures=None, accepte=None):
+        # Chaque partie se joue dans sa salle, et les mouvements ne sont envoyes qu'a ses membres
+        self.registre = salles.Registre(accepte)
+        # L'arbitre garde l'echiquier de reference de chaque partie et valide les mouvements avant de les relayer
+        self.arbitrage = arbitre.Arbitre()
+        # Les sessions qui ont demande les trames binaires du module protocole. Les autres recoivent du JSON.
+        self.binaires = set()
+        self.ouvertures = ouvertures if ouvertures is not None else explorateur.Explorateur()
+
+    def retient_format(self, sid, data_recv):
+        """
+        Retient le format des mouvements demande par le client en creant ou en rejoignant une salle.
+        """
+        if data_recv.get("binaire"):
+            self.binaires.add(sid)
+        else:
+            self.binaires.discard(sid)
+
+    def _libere(self, salle):
+        """
+        Signale a l'arbitre la partie d'une salle qui vient d'etre supprimee du registre, faute de membres. La partie
+        est gardee un moment, pour que ses joueurs puissent se reconnecter.
+        """
+        if salle is not None and salle not in self.registre.salles:
+            self.arbitrage.abandonne(salle)
+
+    def cree(self, sid, data_recv):
+        """
+        Cree une salle, eventuellement avec l'identifiant demande, dont le client prend les Blancs. Retourne une Entree.
+        """
+        ancienne = self.registre.salle_de(sid)
+        self.retient_format(sid, data_recv)
+        try:
+            salle = self.registre.cree(sid, data_recv.get("salle"))
+        except ValueError as erreur:
+            return Entree(json.dumps({"erreur": str(erreur)}), None, None)
+        self._libere(ancienne)
+        self.arbitrage.nouvelle(salle)
+        return Entree(json.dumps({"salle": salle, "role": salles.COULEURS[0]}), ancienne, salle)
+
+    def rejoint(self, sid, data_recv):
+        """
+        Fait entrer le client dans une salle existante, comme joueur s'il reste une couleur libre, sinon comme
+        spectateur. Retourne une Entree.
+        """
+        salle = data_recv["salle"]
+        ancienne = self.registre.salle_de(sid)
+        self.retient_format(sid, data_recv)
+        try:
+            role = self.registre.rejoint(sid, salle, data_recv.get("spectateur", False), data_recv.get("couleur"))
+        except KeyError:
+            if salle not in self.arbitrage:
+                return Entree(json.dumps({"erreur": f"La salle {salle} n'existe pas"}), None, None)
+            # La salle s'est videe mais sa partie est gardee : le joueur qui se reconnecte la rouvre avec sa couleur
+            role = data_recv.get("couleur") if data_recv.get("couleur") in salles.COULEURS else salles.COULEURS[0]
+            self.registre.cree(sid, salle, role)
+            self.arbitrage.reprend(salle)
+        if ancienne == salle:
+            ancienne = None
+        self._libere(ancienne)
+        return Entree(json.dumps({"salle": salle, "role": role}), ancienne, salle)
+
+    def quitte(self, sid):
+        """
+        Fait sortir le client de sa salle, et retourne la salle quittee (ou None).
+        """
+        salle = self.registre.quitte(sid)
+        self._libere(salle)
+        return salle
+
+    def deconnecte(self, sid):
+        """
+        Oublie une session deconnectee, et retourne la salle quittee (ou None).
+        """
+        self.binaires.discard(sid)
+        return self.quitte(sid)
+
+    def resync(self, sid, data_recv):
+        """
+        Retourne a un client qui se reconnecte les mouvements joues dans sa salle apres le demi-coup ply qu'il connait,
+        en un seul lot.
+        """
+        salle = self.registre.salle_de(sid)
+        if salle is None or salle != data_recv.get("salle"):
+            return json.dumps({"erreur": "Il faut d'abord rejoindre la salle"})
+        ply = data_recv.get("ply")
+        try:
+            coups = self.arbitrage.coups_depuis(salle, ply)
+        except ValueError as erreur:
+            return json.dumps({"erreur": str(erreur)})
+        if sid in self.binaires:
+            return protocole.encode_lot(salle, ply + 1, coups)
+        return json.dumps({"salle": salle, "ply": ply + 1, "coups": coups})
+
+    def explore(self, sid, data_recv):
+        """
+        Retourne les mouvements joues dans les parties de l'explorateur apres une suite de mouvements, une position
+        donnee par sa FEN, ou apres les mouvements de la partie de la salle du client, avec leurs resultats.
+        """
+        limite = data_recv.get("limite", 20)
+        if "fen" in data_recv:
+            try:
+                return json.dumps(self.ouvertures.reponse_position(data_recv["fen"], limite))
+            except ValueError as erreur:
+                return json.dumps({"erreur": str(erreur)})
+        coups = data_recv.get("coups")
+        if coups is None:
+            salle = self.registre.salle_de(sid)
+            coups = self.arbitrage.coups(salle) if salle is not None and salle in self.arbitrage else []
+        return json.dumps(self.ouvertures.reponse(coups, limite))
+
+    def repartit(self, destinataires, trame, encode_json):
+        """
+        Retourne les Envoi d'un mouvement a des destinataires, chacun dans son format : la trame binaire, ou le
+        message JSON retourne par encode_json. Chaque format n'est encode qu'une fois.
+        """
+        en_binaire = [d for d in destinataires if d in self.binaires]
+        en_json = [d for d in destinataires if d not in self.binaires]
+        envois = []
+        if en_binaire:
+            envois.append(Envoi(en_binaire, len(en_binaire) == len(destinataires), trame))
+        if en_json:
+            envois.append(Envoi(en_json, len(en_json) == len(destinataires), encode_json()))
+        return envois
+
+    def joue(self, sid, data):
+        """
+        Valide un mouvement, en trame binaire ou en JSON, et retourne le Relais a transmettre, ou None si le client n'a
+        rejoint aucune partie ou si le message est illisible.
+        """
+        salle = self.registre.salle_de(sid)
+        if salle is None:
+            return None   # Le client n'a rejoint aucune partie : personne a qui envoyer son mouvement
+        try:
+            coup = protocole.decode(data)
+        except ValueError:
+            return None
+
+        # Le mouvement est valide sur l'echiquier de reference. S'il est refuse, le client est resynchronise sur la
+        # position de reference, avec les mouvements de la partie pour garder le compte des demi-coups.
+        try:
+            ply = self.arbitrage.joue(salle, coup.mouvement, self.registre.role(sid), coup.ply)
+        except arbitre.MouvementIllegal as erreur:
+            refus = {"erreur": str(erreur), "fen": self.arbitrage.fen(salle), "coups": self.arbitrage.coups(salle)}
+            return Relais(json.dumps(refus), [], None)
+
+        # Seuls les autres membres de la salle recoivent le mouvement, chacun dans son format
+        trame = protocole.encode(salle, ply, coup.mouvement)
+        envois = self.repartit(self.registre.destinataires(sid), trame,
+                               lambda: protocole.encode_json(coup.sid or sid, ply, coup.mouvement))
+        return Relais(None, envois, trame)
@@ -0,0 +1,233 @@
+"""
+Ce module enregistre les blocs scelles d'une blockchain sur le disque.
+
+Les blocs sont ajoutes a la fin de fichiers segments (segment-00000.log, segment-00001.log, ...) que l'on ne reecrit
+jamais. Chaque enregistrement contient l'en-tete du bloc (index, horodatage, signature du bloc precedent, signature du
+bloc) suivi de son arbre de transactions au format compact (voir trie_compact).
+
+Un fichier index.bin donne, pour chaque bloc, son segment, sa position et sa longueur sur 16 octets : retrouver un bloc
+par son rang est un simple calcul d'adresse. A la relecture, les segments sont ouverts avec mmap et les arbres des
+blocs sont des vues sur ces fichiers : aucun mouvement n'est rejoue.
+
+Les ecritures sont regroupees en memoire et ne sont ecrites puis synchronisees sur le disque (fsync) qu'une fois
+l'intervalle de synchronisation ecoule, lors d'un appel explicite a synchronise(), ou a la fermeture du journal. Un
+minuteur synchronise les blocs en attente au bout de l'intervalle meme si aucun bloc ne suit : un bloc scelle n'attend
+jamais plus d'un intervalle avant d'etre sur le disque.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import ti103_chess.digest as digest
+    import ti103_chess.patricia_trie as pm
+    import ti103_chess.trie_compact as tc
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import digest
+    import patricia_trie as pm
+    import trie_compact as tc
+
+
+MAGIC = b'BLOC'
+
+# Magic, longueur de l'arbre, index, horodatage, signature du bloc precedent, signature du bloc
+_ENREGISTREMENT = struct.Struct(f'<4sIQd{digest.TAILLE}s{digest.TAILLE}s')
+
+# Segment, longueur de l'enregistrement, position dans le segment
+_INDEX = struct.Struct('<IIQ')
+
+
+def _aligne(n):
+    """
+    Retourne n arrondi au multiple de 8 superieur.
+    """
+    return (n + 7) & ~7
+
+
+class Journal:
+    """
+    Le journal des blocs scelles d'une blockchain, dans un dossier.
+
+    En lecture seule, le journal ne modifie aucun fichier : plusieurs processus peuvent ainsi le lire en meme temps
+    que celui qui y ecrit.
+    """
+    def __init__(self, dossier, intervalle_fsync=1.0, taille_segment=64 * 2 ** 20, lecture_seule=False):
+        self.dossier = dossier
+        self.intervalle_fsync = intervalle_fsync   # En secondes. 0 synchronise a chaque bloc.
+        self.taille_segment = taille_segment
+        self.lecture_seule = lecture_seule
+        if not lecture_seule:
+            os.makedirs(dossier, exist_ok=True)
+
+        chemin = os.path.join(dossier, 'index.bin')
+        with open(chemin, 'rb' if lecture_seule else 'ab+') as f:
+            f.seek(0)
+            self._index = bytearray(f.read())
+
+        self._segment = max((int(nom[8:13]) for nom in os.listdir(dossier) if nom.startswith('segment-')), default=0)
+        if lecture_seule:
+            self._index_fichier = self._fichier = None
+            self._fin = os.path.getsize(self._chemin(self._segment))
+        else:
+            self._index_fichier = open(chemin, 'ab')
+            self._fichier = open(self._chemin(self._segment), 'ab')
+            self._fin = self._fichier.tell()
+        self._retablit()
+
+        self._cartes = {}       # Segment -> mmap en lecture seule
+        self._tampon = []       # Enregistrements pas encore ecrits
+        self._tampon_index = []
+        self._synchronise = time.monotonic()
+        # Le minuteur arme tant que des blocs attendent, et le verrou qui protege les ecritures contre lui
+        self._minuterie = None
+        self._verrou = threading.RLock()
+
+    def _chemin(self, segment):
+        """
+        Retourne le chemin du fichier d'un segment.
+        """
+        return os.path.join(self.dossier, f'segment-{segment:05d}.log')
+
+    def _retablit(self):
+        """
+        Oublie les entrees d'index dont l'enregistrement n'a pas ete entierement ecrit, apres un arret brutal.
+        """
+        self._index = self._index[:len(self._index) - len(self._index) % _INDEX.size]
+        while self._index:
+            segment, longueur, position = _INDEX.unpack_from(self._index, len(self._index) - _INDEX.size)
+            taille = self._fin if segment == self._segment else os.path.getsize(self._chemin(segment))
+            if position + longueur <= taille:
+                break
+            del self._index[-_INDEX.size:]
+
+        if not self.lecture_seule:
+            with open(os.path.join(self.dossier, 'index.bin'), 'r+b') as f:
+                f.truncate(len(self._index))
+
+    def __len__(self):
+        """
+        Retourne le nombre de blocs enregistres, y compris ceux qui attendent d'etre ecrits.
+        """
+        return len(self._index) // _INDEX.size + len(self._tampon_index)
+
+    def ajoute(self, bloc):
+        """
+        Ajoute un bloc scelle a la fin du journal.
+        """
+        if self.lecture_seule:
+            raise ValueError("Ce journal est ouvert en lecture seule")
+
+        transactions = bloc.transactions
+        if isinstance(transactions, pm.PatriciaMerkleTrie):
+            transactions = tc.TrieCompact.depuis_trie(transactions)
+        arbre = transactions.octets()
+
+        enregistrement = _ENREGISTREMENT.pack(MAGIC, len(arbre), bloc.index, bloc.time, bloc.previous_hash,
+                                              bloc.hash()) + arbre
+        enregistrement += bytes(_aligne(len(enregistrement)) - len(enregistrement))
+
+        with self._verrou:
+            self._ecrit(enregistrement)
+
+    def _ecrit(self, enregistrement):
+        """
+        Met un enregistrement en attente a la fin du journal, puis le synchronise si l'intervalle est ecoule, ou arme
+        le minuteur qui le synchronisera.
+        """
+        if self._fin and self._fin + len(enregistrement) > self.taille_segment:
+            # Le segment est plein : on ecrit ce qui reste en attente et on passe au suivant
+            self.synchronise()
+            self._fichier.close()
+            self._segment += 1
+            self._fichier = open(self._chemin(self._segment), 'ab')
+            self._fin = 0
+
+        self._tampon.append(enregistrement)
+        self._tampon_index.append(_INDEX.pack(self._segment, len(enregistrement), self._fin))
+        self._fin += len(enregistrement)
+
+        restant = self._synchronise + self.intervalle_fsync - time.monotonic()
+        if restant <= 0:
+            self.synchronise()
+        elif self._minuterie is None:
+            self._minuterie = threading.Timer(restant, self._echeance)
+            self._minuterie.daemon = True
+            self._minuterie.start()
+
+    def _echeance(self):
+        """
+        Synchronise les blocs en attente a la fin de l'intervalle, depuis le fil du minuteur.
+        """
+        with self._verrou:
+            if self._minuterie is not None and not self._fichier.closed:
+                self.synchronise()
+
+    def synchronise(self):
+        """
+        Ecrit les blocs en attente, puis force leur ecriture sur le disque. Le segment est ecrit avant l'index : une
+        entree d'index ne designe jamais un enregistrement absent.
+        """
+        with self._verrou:
+            if self._minuterie is not None:
+                self._minuterie.cancel()
+                self._minuterie = None
+            if self._tampon:
+                self._fichier.write(b''.join(self._tampon))
+                self._fichier.flush()
+                os.fsync(self._fichier.fileno())
+
+                entrees = b''.join(self._tampon_index)
+                self._index_fichier.write(entrees)
+                self._index_fichier.flush()
+                os.fsync(self._index_fichier.fileno())
+                self._index += entrees
+
+                self._tampon.clear()
+                self._tampon_index.clear()
+            self._synchronise = time.monotonic()
+
+    def lit(self, rang):
+        """
+        Retourne le bloc de rang donne (0 pour le premier) sous forme d'un tuple (index, horodatage, signature du bloc
+        precedent, signature, arbre compact). L'arbre est une vue sur le segment, ouvert avec mmap.
+        """
+        if rang < 0:
+            rang += len(self)
+        if not 0 <= rang < len(self):
+            raise IndexError(f"Aucun bloc de rang {rang} dans le journal")
+        with self._verrou:
+            if rang >= len(self._index) // _INDEX.size:
+                self.synchronise()   # Le bloc est encore en attente
+            segment, longueur, position = _INDEX.unpack_from(self._index, rang * _INDEX.size)
+
+        carte = self._cartes.get(segment)
+        if carte is None or len(carte) < position + longueur:
+            with open(self._chemin(segment), 'rb') as f:
+                carte = self._cartes[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        vue = memoryview(carte)[position:position + longueur]
+        magic, taille, index, horodatage, precedent, signature = _ENREGISTREMENT.unpack_from(vue)
+        if magic != MAGIC:
+            raise ValueError(f"Enregistrement corrompu pour le bloc de rang {rang}")
+
+        arbre = tc.TrieCompact.depuis_octets(vue[_ENREGISTREMENT.size:_ENREGISTREMENT.size + taille])
+        return index, horodatage, precedent, signature, arbre
+
+    def ferme(self):
+        """
+        Ecrit les blocs en attente et ferme les fichiers. Les mmap restent valides tant que des blocs les utilisent.
+        """
+        if not self.lecture_seule:
+            with self._verrou:
+                self.synchronise()
+                self._fichier.close()
+                self._index_fichier.close()
+        self._cartes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.ferme()
@@ -0,0 +1,287 @@
+"""
+Ce module indexe les positions d'un arbre de Patricia Merkle par leur cle de Zobrist.
+
+L'arbre enregistre les parties par ordre de mouvements : une meme position, atteinte par des ordres differents (une
+transposition, comme 1. d4 Cf6 2. c4 e6 et 1. c4 e6 2. d4 Cf6), y apparait a plusieurs endroits. L'index associe la
+cle de chaque position (voir bitboard.Position.cle) aux positions de l'arbre qui y menent : on retrouve ainsi toutes
+les parties passees par une position, quel que soit l'ordre de leurs mouvements.
+
+L'index est construit en un seul parcours de l'arbre, en profondeur d'abord, en jouant et annulant les mouvements sur
+une seule bitboard.Position. Il est ensuite tenu a jour par ajoute, qui enregistre une partie dans l'arbre et indexe
+les positions nouvelles. Une partie enregistree directement dans l'arbre n'est pas indexee : il faut alors
+reconstruire l'index. Les mouvements qui ne sont pas legaux ne sont pas indexes, ni les positions qui les suivent.
+
+Chaque position distincte n'a qu'une entree, avec la position de l'arbre qui y mene, ou le tableau de celles qui y
+menent s'il y en a plusieurs. Une position de l'arbre n'y est pas un objet PatriciaMerkleTrie mais un entier : le rang
+de son noeud interne, dans la liste des noeuds de l'index, et sa profondeur. Les entrees tiennent dans un tableau de
+mots de 64 bits, comme la table de transposition du module recherche, sans un objet Python par position. L'index peut
+aussi se limiter aux premiers demi-coups des parties, par exemple aux ouvertures. Le rapport de l'index compte les
+positions dedupliquees et la memoire economisee par rapport a une entree par position de l'arbre.
+
+    index = IndexPositions(racine)
+    index.statistiques(bitboard.Position(fen).cle())
+"""
+import array
+import collections
+import sys
+
+try:
+    import ti103_chess.bitboard as bitboard
+    import ti103_chess.moves as moves
+    import ti103_chess.patricia_trie as pm
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import bitboard
+    import moves
+    import patricia_trie as pm
+
+
+# Le nombre de bits de la profondeur dans l'entier d'une position de l'arbre
+_BITS_PROFONDEUR = 16
+
+# Le bit de la donnee d'une entree qui indique que la cle est atteinte par plusieurs ordres de mouvements
+_TRANSPOSEE = 1 << 63
+
+# Le rapport de l'index, voir IndexPositions.rapport
+Rapport = collections.namedtuple('Rapport', ['positions', 'distinctes', 'transposees', 'ignorees', 'octets',
+                                             'octets_sans_deduplication'])
+
+
+def _joue(echiquier, mouvement):
+    """
+    Joue un mouvement UCI s'il est legal et retourne True, sinon retourne False sans rien jouer.
+    """
+    try:
+        code = moves.encode(mouvement)
+    except ValueError:
+        return False
+    if not echiquier.est_legal(code):
+        return False
+    echiquier.joue(code)
+    return True
+
+
+class IndexPositions:
+    """
+    Un index des positions d'un arbre de Patricia Merkle dont la racine est la position de depart, jusqu'au demi-coup
+    profondeur (toutes les positions si profondeur vaut None).
+    """
+    def __init__(self, racine, profondeur=None):
+        self.racine = racine
+        self.profondeur = profondeur if profondeur is not None else (1 << _BITS_PROFONDEUR) - 1
+        # Les entrees, en adressage ouvert : deux mots par place, la cle et la donnee. La donnee vaut 0 pour une place
+        # libre, l'entier de la position de l'arbre plus un, ou _TRANSPOSEE | rang de son tableau dans _transposees.
+        self._mots = array.array('Q', bytes(16 * 16))   # 16 places pour commencer
+        self._distinctes = 0
+        self._transposees = []  # Tableaux des positions de l'arbre des cles atteintes par plusieurs ordres
+        self._noeuds = []      # Noeuds internes des positions indexees, par rang
+        self._rangs = {}       # Noeud interne -> rang
+        self.positions = 0     # Nombre de positions de l'arbre indexees
+        self.ignorees = 0      # Nombre de positions de l'arbre apres un mouvement illegal
+        self._construit()
+
+    def _indexe(self, cle, noeud, profondeur):
+        """
+        Ajoute une position de l'arbre, donnee par son noeud interne et sa profondeur, a l'entree d'une cle.
+        """
+        rang = self._rangs.get(noeud)
+        if rang is None:
+            rang = self._rangs[noeud] = len(self._noeuds)
+            self._noeuds.append(noeud)
+        position = rang << _BITS_PROFONDEUR | profondeur
+        i = self._place(cle)
+        donnee = self._mots[i + 1]
+        if not donnee:
+            self._mots[i], self._mots[i + 1] = cle, position + 1
+            self._distinctes += 1
+            if self._distinctes * 3 > len(self._mots):   # Plus des deux tiers des places sont prises
+                self._agrandit()
+        elif donnee & _TRANSPOSEE:
+            self._transposees[donnee ^ _TRANSPOSEE].append(position)
+        else:
+            self._mots[i + 1] = _TRANSPOSEE | len(self._transposees)
+            self._transposees.append(array.array('Q', (donnee - 1, position)))
+        self.positions += 1
+
+    def _place(self, cle):
+        """
+        Retourne l'indice du mot de la cle d'une position dans _mots : celui de son entree, ou de la place libre ou
+        l'ecrire. Les places sont essayees l'une apres l'autre a partir de celle de la cle.
+        """
+        mots = self._mots
+        masque = len(mots) // 2 - 1
+        place = cle & masque
+        while mots[2 * place + 1] and mots[2 * place] != cle:
+            place = (place + 1) & masque
+        return 2 * place
+
+    def _agrandit(self):
+        """
+        Double le nombre de places et y replace les entrees.
+        """
+        anciens = self._mots
+        self._mots = array.array('Q', bytes(16 * len(anciens)))
+        for i in range(0, len(anciens), 2):
+            if anciens[i + 1]:
+                j = self._place(anciens[i])
+                self._mots[j], self._mots[j + 1] = anciens[i], anciens[i + 1]
+
+    def _construit(self):
+        """
+        Indexe les positions de l'arbre, en profondeur d'abord avec une pile.
+        """
+        echiquier = bitboard.Position()
+        joues = 0                                # Mouvements joues sur l'echiquier
+        self._indexe(echiquier.cle(), self.racine._noeud, 0)
+        noeud = self.racine._noeud
+        pile = list(reversed(list(noeud.enfants())))
+        while pile:
+            noeud = pile.pop()
+            # Les mouvements joues sont ceux du chemin du dernier noeud parcouru, dont le parent de ce noeud est un
+            # ancetre : on annule jusqu'a lui. Le mouvement de la racine n'est pas joue.
+            while joues >= noeud.debut:
+                echiquier.annule()
+                joues -= 1
+            for k, mouvement in enumerate(noeud.mouvements[:self.profondeur - noeud.debut + 1]):
+                if not _joue(echiquier, mouvement):
+                    self.ignorees += self._ignorees(noeud, k)
+                    break
+                joues += 1
+                self._indexe(echiquier.cle(), noeud, noeud.debut + k)
+            else:
+                if noeud.debut + len(noeud.mouvements) <= self.profondeur:
+                    pile.extend(reversed(list(noeud.enfants())))
+
+    def _ignorees(self, noeud, k):
+        """
+        Retourne le nombre de positions de l'arbre jusqu'au demi-coup profondeur a partir du k-ieme mouvement d'un
+        noeud, sous-arbre compris.
+        """
+        total, pile = 0, [(noeud, k)]
+        while pile:
+            noeud, k = pile.pop()
+            total += max(0, min(len(noeud.mouvements), self.profondeur - noeud.debut + 1) - k)
+            if noeud.debut + len(noeud.mouvements) <= self.profondeur:
+                pile.extend((enfant, 0) for enfant in noeud.enfants())
+        return total
+
+    def ajoute(self, mouvements, resultat=None):
+        """
+        Enregistre une partie dans l'arbre, comme PatriciaMerkleTrie.extend, et indexe les positions nouvelles.
+        Retourne la derniere position de l'arbre.
+        """
+        position, echiquier = self.racine, bitboard.Position()
+        for ply, mouvement in enumerate(mouvements, 1):
+            nouvelle = mouvement not in position
+            position = position.add(mouvement)
+            if echiquier is None:
+                self.ignorees += nouvelle and ply <= self.profondeur
+            elif ply > self.profondeur:
+                echiquier = None   # Les positions suivantes ne sont pas indexees : ce n'est plus la peine de jouer
+            elif not _joue(echiquier, mouvement):
+                echiquier = None
+                self.ignorees += nouvelle
+            elif nouvelle:
+                noeud, _ = position._resout()
+                self._indexe(echiquier.cle(), noeud, ply)
+        if resultat is not None:
+            position.termine(resultat)
+        return position
+
+    def __contains__(self, cle):
+        return bool(self._mots[self._place(cle) + 1])
+
+    def __len__(self):
+        """
+        Retourne le nombre de positions distinctes indexees.
+        """
+        return self._distinctes
+
+    def __iter__(self):
+        """
+        Parcourt les cles des positions distinctes indexees.
+        """
+        for i in range(0, len(self._mots), 2):
+            if self._mots[i + 1]:
+                yield self._mots[i]
+
+    def chemins(self, cle):
+        """
+        Retourne les positions de l'arbre qui menent a une position, une par ordre de mouvements.
+        """
+        donnee = self._mots[self._place(cle) + 1]
+        if donnee & _TRANSPOSEE:
+            positions = self._transposees[donnee ^ _TRANSPOSEE]
+        else:
+            positions = (donnee - 1,) if donnee else ()
+        masque = (1 << _BITS_PROFONDEUR) - 1
+        return [pm.PatriciaMerkleTrie._position(self._noeuds[p >> _BITS_PROFONDEUR], p & masque) for p in positions]
+
+    def premieres(self, cle):
+        """
+        Retourne les positions de l'arbre qui menent a une position pour la premiere fois : une partie qui repasse
+        par la position (une repetition) ne compte qu'a son premier passage.
+
+        Une position en precede une autre si elle est plus haut dans la meme arete, ou dans une arete ancetre : on
+        retient la plus haute de chaque arete, puis on remonte les ancetres de chacune.
+        """
+        chemins = self.chemins(cle)
+        if len(chemins) == 1:
+            return chemins
+        noeuds = [p._resout()[0] for p in chemins]
+        plus_hautes = {}   # Noeud interne -> profondeur de sa position la plus haute
+        for position, noeud in zip(chemins, noeuds):
+            plus_hautes[noeud] = min(plus_hautes.get(noeud, position._profondeur), position._profondeur)
+        premieres = []
+        for position, noeud in zip(chemins, noeuds):
+            if plus_hautes[noeud] < position._profondeur:
+                continue
+            ancetre = noeud.parent
+            while ancetre is not None and ancetre not in plus_hautes:
+                ancetre = ancetre.parent
+            if ancetre is None:
+                premieres.append(position)
+        return premieres
+
+    def statistiques(self, cle):
+        """
+        Retourne les Statistiques des parties enregistrees avec leur resultat qui passent par une position, par tous
+        les ordres de mouvements.
+        """
+        comptes = [sum(s) for s in zip(*(p.statistiques() for p in self.premieres(cle)))]
+        return pm.Statistiques(*comptes) if comptes else pm.Statistiques(0, 0, 0, 0)
+
+    def suivants(self, cle):
+        """
+        Retourne les mouvements joues apres une position, par tous les ordres de mouvements, du plus joue au moins
+        joue, sous forme de couples (mouvement, Statistiques).
+        """
+        suivants = {}
+        for position in self.premieres(cle):
+            for mouvement, statistiques in position.explore():
+                deja = suivants.get(mouvement)
+                suivants[mouvement] = statistiques if deja is None else \
+                    pm.Statistiques(*(a + b for a, b in zip(deja, statistiques)))
+        return sorted(suivants.items(), key=lambda suivant: -suivant[1].parties)
+
+    def parties(self, cle):
+        """
+        Retourne les parties enregistrees avec leur resultat qui passent par une position, par tous les ordres de
+        mouvements, sous forme de couples (mouvements, Statistiques) comme PatriciaMerkleTrie.parties.
+        """
+        for position in self.premieres(cle):
+            yield from position.parties()
+
+    def rapport(self):
+        """
+        Retourne le Rapport de l'index : le nombre de positions de l'arbre indexees, de positions distinctes, de
+        positions atteintes par plusieurs ordres de mouvements, de positions ignorees, la memoire de l'index en octets
+        et une estimation de celle d'un dictionnaire avec une entree par position de l'arbre, un objet
+        PatriciaMerkleTrie.
+        """
+        octets = sys.getsizeof(self._mots) + sys.getsizeof(self._transposees) + sys.getsizeof(self._noeuds) + \
+            sys.getsizeof(self._rangs) + sum(sys.getsizeof(positions) for positions in self._transposees)
+        # Sans deduplication, chaque position de l'arbre a sa cle, sa position et au moins trois mots dans le
+        # dictionnaire : le hachage, la cle et la valeur
+        entree = sys.getsizeof(1 << 63) + sys.getsizeof(self.racine) + 3 * 8
+        return Rapport(self.positions, self._distinctes, len(self._transposees), self.ignorees, octets,
+                       entree * self.positions)
@@ -0,0 +1,332 @@
+"""
+Ce module represente un arbre de Patricia Merkle sous forme compacte, en colonnes, en lecture seule.
+
+Chaque noeud interne (arete) de l'arbre devient une ligne. Les lignes sont rangees en largeur d'abord, de sorte que
+les enfants d'un noeud sont des lignes consecutives. L'arbre tient alors dans quatre colonnes :
+
+1. aretes : pour chaque ligne, l'indice de son premier mouvement dans la colonne coups (entiers 32 bits).
+2. enfants : pour chaque ligne, l'indice de sa premiere ligne enfant (entiers 32 bits). Les enfants de la ligne i
+   sont les lignes enfants[i] a enfants[i + 1] exclue.
+3. coups : les mouvements de toutes les aretes, encodes sur 16 bits par le module moves.
+4. empreintes : la signature du premier mouvement de chaque arete, sur digest.TAILLE octets.
+
+Les deux premieres colonnes ont une case de plus que de lignes, pour que la fin de la derniere ligne soit connue.
+
+Le format sur disque est un en-tete suivi des quatre colonnes, en petit-boutiste, alignees sur 8 octets. Un fichier
+s'ouvre avec mmap sans rien lire : les colonnes sont des vues memoire sur le fichier, et le systeme ne charge que les
+pages reellement consultees. Un serveur peut ainsi servir un arbre de plusieurs millions de parties sans le charger.
+
+Seuls les arbres de mouvements UCI peuvent etre convertis. Les statistiques des resultats (voir patricia_trie) ne
+sont pas dans le format : un arbre compact construit en memoire garde seulement les parties terminees sur chaque ligne
+(fins), que vers_trie compte a nouveau.
+"""
+import array
+import mmap
+import struct
+import sys
+
+try:
+    import ti103_chess.digest as digest
+    import ti103_chess.moves as moves
+    import ti103_chess.patricia_trie as pm
+except ImportError:   # Lance comme un script depuis le dossier du package, comme server.py
+    import digest
+    import moves
+    import patricia_trie as pm
+
+
+MAGIC = b'PMTC'
+VERSION = 1
+
+# Magic, version, taille des signatures, nombre de lignes, nombre de coups, algorithme de hachage
+_ENTETE = struct.Struct('<4sHHII16s')
+
+
+def _aligne(n):
+    """
+    Retourne n arrondi au multiple de 8 superieur.
+    """
+    return (n + 7) & ~7
+
+
+class TrieCompact:
+    """
+    Un arbre de Patricia Merkle compact, en lecture seule.
+
+    Une position dans l'arbre est un couple (ligne, indice) : l'indice du mouvement dans l'arete de la ligne.
+    """
+    def __init__(self, aretes, enfants, coups, empreintes, algorithme, tampon=None, fins=None):
+        self.aretes = aretes
+        self.enfants = enfants
+        self.coups = coups
+        self.empreintes = empreintes
+        self.algorithme = algorithme
+        self._tampon = tampon   # Le mmap ou les octets dont les colonnes sont des vues
+        self.fins = fins or {}  # Ligne -> indice -> comptes des parties qui s'y terminent (voir patricia_trie)
+
+    @classmethod
+    def depuis_trie(cls, racine):
+        """
+        Construit la forme compacte d'un PatriciaMerkleTrie, a partir de sa racine.
+        """
+        racine.hash()   # Toutes les signatures doivent etre en cache
+
+        noeuds = [racine._noeud]
+        k = 0
+        while k < len(noeuds):
+            noeuds.extend(noeuds[k].enfants())
+            k += 1
+
+        aretes = array.array('I', [0])
+        enfants = array.array('I')
+        coups = array.array('H')
+        suivant = 1
+        for noeud in noeuds:
+            coups.extend(moves.encode(m) for m in noeud.mouvements)
+            aretes.append(len(coups))
+            enfants.append(suivant)
+            suivant += 0 if noeud.children is None else len(noeud.children)
+        enfants.append(suivant)
+
+        empreintes = b''.join(noeud._signature for noeud in noeuds)
+        fins = {ligne: noeud.terminees() for ligne, noeud in enumerate(noeuds) if noeud.resultats}
+        return cls(aretes, enfants, coups, empreintes, digest.algorithme(), fins=fins)
+
+    @classmethod
+    def depuis_octets(cls, tampon):
+        """
+        Construit un arbre compact dont les colonnes sont des vues sur un tampon au format du fichier (octets, mmap).
+        """
+        magic, version, taille, lignes, nb_coups, algorithme = _ENTETE.unpack_from(tampon, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Ce tampon ne contient pas un arbre compact")
+
+        # Sur une machine petit-boutiste, les colonnes d'entiers sont des vues sur le tampon, sans copie : ouvrir un
+        # arbre pour n'en lire que la signature, comme le fait la relecture d'une blockchain, ne coute presque rien.
+        vue = memoryview(tampon)
+        debut = _aligne(_ENTETE.size)
+        colonnes = []
+        for code, longueur in (('I', lignes + 1), ('I', lignes + 1), ('H', nb_coups)):
+            fin = debut + longueur * struct.calcsize(code)
+            colonnes.append(cls._colonne(vue[debut:fin], code))
+            debut = _aligne(fin)
+        aretes, enfants, coups = colonnes
+        return cls(aretes, enfants, coups, vue[debut:debut + lignes * taille], algorithme.rstrip(b'\0').decode(),
+                   tampon)
+
+    @staticmethod
+    def _colonne(vue, code):
+        """
+        Retourne une colonne d'entiers lue depuis une vue memoire en petit-boutiste.
+        """
+        if sys.byteorder == 'little':
+            return vue.cast(code)   # Aucune copie
+
+        colonne = array.array(code, vue.tobytes())
+        colonne.byteswap()
+        return colonne
+
+    @classmethod
+    def ouvrir(cls, chemin):
+        """
+        Ouvre un fichier en lecture seule avec mmap. Aucune donnee n'est lue avant d'etre consultee.
+        """
+        with open(chemin, 'rb') as f:
+            tampon = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.depuis_octets(tampon)
+
+    def octets(self):
+        """
+        Retourne l'arbre au format du fichier.
+        """
+        morceaux = [_ENTETE.pack(MAGIC, VERSION, digest.TAILLE, len(self), len(self.coups),
+                                 self.algorithme.encode())]
+        for colonne, code in ((self.aretes, 'I'), (self.enfants, 'I'), (self.coups, 'H')):
+            colonne = array.array(code, colonne)
+            if sys.byteorder != 'little':
+                colonne.byteswap()
+            morceaux.append(colonne.tobytes())
+        morceaux.append(bytes(self.empreintes))
+
+        tampon = bytearray()
+        for morceau in morceaux:
+            tampon += bytes(_aligne(len(tampon)) - len(tampon))   # Chaque colonne commence sur 8 octets
+            tampon += morceau
+        return bytes(tampon)
+
+    def ecrire(self, chemin):
+        """
+        Ecrit l'arbre dans un fichier.
+        """
+        with open(chemin, 'wb') as f:
+            f.write(self.octets())
+
+    def fermer(self):
+        """
+        Libere les vues memoire et ferme le mmap s'il y en a un.
+        """
+        for colonne in (self.aretes, self.enfants, self.coups, self.empreintes):
+            if isinstance(colonne, memoryview):
+                colonne.release()
+        if isinstance(self._tampon, mmap.mmap):
+            self._tampon.close()
+        self._tampon = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def __len__(self):
+        """
+        Retourne le nombre de lignes, c'est-a-dire de noeuds internes.
+        """
+        return len(self.aretes) - 1
+
+    def arete(self, ligne):
+        """
+        Retourne les mouvements UCI de l'arete d'une ligne.
+        """
+        return [moves.decode(c) for c in self.coups[self.aretes[ligne]:self.aretes[ligne + 1]]]
+
+    def cherche(self, mouvements):
+        """
+        Retourne la position (ligne, indice) atteinte en suivant une suite de mouvements UCI depuis la racine, ou None
+        si cette suite n'est pas enregistree.
+        """
+        aretes, enfants, coups = self.aretes, self.enfants, self.coups
+        ligne, i = 0, 0
+        for mouvement in mouvements:
+            code = moves.encode(mouvement)
+            if aretes[ligne] + i + 1 < aretes[ligne + 1]:
+                # Au milieu d'une arete, un seul mouvement suivant possible
+                if coups[aretes[ligne] + i + 1] != code:
+                    return None
+                i += 1
+                continue
+
+            for enfant in range(enfants[ligne], enfants[ligne + 1]):
+                if coups[aretes[enfant]] == code:
+                    ligne, i = enfant, 0
+                    break
+            else:
+                return None
+
+        return ligne, i
+
+    def __contains__(self, mouvements):
+        """
+        Verifie qu'une suite de mouvements UCI est enregistree dans l'arbre.
+        """
+        return self.cherche(mouvements) is not None
+
+    def empreinte(self, ligne):
+        """
+        Retourne la signature enregistree pour une ligne.
+        """
+        taille = digest.TAILLE
+        return bytes(self.empreintes[ligne * taille:(ligne + 1) * taille])
+
+    def hash(self):
+        """
+        Retourne la signature de l'arbre, c'est-a-dire celle de sa racine. Elle est la meme que celle du
+        PatriciaMerkleTrie d'origine.
+        """
+        return self.empreinte(0)
+
+    def signature(self, ligne, i, empreinte=None):
+        """
+        Retourne la signature du i-ieme mouvement de l'arete d'une ligne, calculee a partir des signatures de ses
+        lignes enfants. La fonction empreinte(ligne) donne ces signatures ; par defaut, celles enregistrees.
+        """
+        empreinte = empreinte or self.empreinte
+        codes = self.coups[self.aretes[ligne]:self.aretes[ligne + 1]]
+        h = digest.empreinte_noeud(moves.decode(codes[-1]),
+                                   [empreinte(e) for e in range(self.enfants[ligne], self.enfants[ligne + 1])])
+        for k in range(len(codes) - 2, i - 1, -1):
+            h = digest.empreinte_noeud(moves.decode(codes[k]), [h])
+        return h
+
+    def preuve(self, mouvements):
+        """
+        Retourne les signatures necessaires pour prouver qu'une suite de mouvements UCI est enregistree, exactement
+        comme PatriciaMerkleTrie.preuve.
+        """
+        aretes, enfants, coups = self.aretes, self.enfants, self.coups
+        ligne, i = 0, 0
+        niveaux = []
+        for mouvement in mouvements:
+            code = moves.encode(mouvement)
+            if aretes[ligne] + i + 1 < aretes[ligne + 1]:
+                if coups[aretes[ligne] + i + 1] != code:
+                    raise KeyError(mouvement)
+                niveaux.append(([], []))
+                i += 1
+                continue
+
+            lignes = range(enfants[ligne], enfants[ligne + 1])
+            suivante = next((e for e in lignes if coups[aretes[e]] == code), None)
+            if suivante is None:
+                raise KeyError(mouvement)
+            niveaux.append(([self.empreinte(e) for e in lignes if e < suivante],
+                            [self.empreinte(e) for e in lignes if e > suivante]))
+            ligne, i = suivante, 0
+
+        if aretes[ligne] + i + 1 < aretes[ligne + 1]:
+            fin = [self.signature(ligne, i + 1)]
+        else:
+            fin = [self.empreinte(e) for e in range(enfants[ligne], enfants[ligne + 1])]
+        return niveaux, fin
+
+    def recalcule(self):
+        """
+        Recalcule toutes les signatures a partir des mouvements seulement et retourne la ligne la plus profonde dont la
+        signature enregistree ne correspond pas, ou None si l'arbre est intact. Un mouvement altere change aussi les
+        signatures de toutes les lignes au-dessus de la sienne : c'est sa ligne qui est retournee.
+        """
+        if self.algorithme != digest.algorithme():
+            raise ValueError(f"L'arbre a ete signe avec {self.algorithme}, pas avec {digest.algorithme()}")
+
+        calculees = [None] * len(self)
+        premiere = None
+        # Les enfants ont toujours un indice plus grand que leur parent : on remonte de la derniere ligne a la racine.
+        for ligne in range(len(self) - 1, -1, -1):
+            calculees[ligne] = self.signature(ligne, 0, calculees.__getitem__)
+            if premiere is None and calculees[ligne] != self.empreinte(ligne):
+                premiere = ligne
+        return premiere
+
+    def dump(self, r=''):
+        """
+        Affiche le contenu de la base de donnees, exactement comme PatriciaMerkleTrie.dump.
+        """
+        pile = [(0, r)]
+        while pile:
+            ligne, prefixe = pile.pop()
+            prefixe += ''.join(self.arete(ligne))
+            debut, fin = self.enfants[ligne], self.enfants[ligne + 1]
+            if debut == fin:
+                print(prefixe)
+
+            else:
+                pile.extend((enfant, prefixe) for enfant in range(fin - 1, debut - 1, -1))
+
+    def vers_trie(self, racine=None):
+        """
+        Reconstruit un PatriciaMerkleTrie, ou ajoute le contenu de cet arbre a un PatriciaMerkleTrie existant. Les
+        parties terminees de fins y sont comptees.
+        """
+        racine = racine if racine is not None else pm.PatriciaMerkleTrie(moves.decode(self.coups[0]))
+        pile = [(0, racine)]
+        while pile:
+            ligne, position = pile.pop()
+            fins = self.fins.get(ligne)
+            for i, mouvement in enumerate(self.arete(ligne)):
+                if ligne or i:   # Le premier mouvement de la racine est celui de la racine existante
+                    position = position.add(mouvement)
+                if fins and i in fins:
+                    position._compte(fins[i])
+            debut, fin = self.enfants[ligne], self.enfants[ligne + 1]
+            pile.extend((enfant, position) for enfant in range(fin - 1, debut - 1, -1))
+        return racine
@@ -0,0 +1,21 @@
+"""
+Ce module definit les nombres aleatoires des cles de Zobrist, communs au moteur de recherche (recherche) et aux
+positions en bitboards (bitboard).
+
+La cle d'une position est le ou exclusif des nombres de chacune de ses pieces sur sa case, du trait s'il est aux
+noirs, de chaque droit de roque, et de la colonne en passant si une prise en passant est legale. Les deux modules
+tirent leurs nombres de ces tables : une meme position a la meme cle dans les deux, qu'elle soit sur un chess.Board
+ou sur une bitboard.Position, et qu'elle ait ete calculee entierement ou tenue a jour a chaque mouvement.
+
+Les couleurs et les types de pieces sont numerotes comme dans le module chess (noir = 0, blanc = 1 ; pion = 1, ...,
+roi = 6), les cases aussi (a1 = 0, ..., h8 = 63).
+"""
+import random
+
+
+# Les nombres sont toujours les memes : une cle est stable d'un processus a l'autre
+_ALEA = random.Random(0x103)
+PIECES = [[[_ALEA.getrandbits(64) for _ in range(64)] for _ in range(7)] for _ in range(2)]   # Couleur, type, case
+TRAIT = _ALEA.getrandbits(64)                                # Quand le trait est aux noirs
+ROQUES = [_ALEA.getrandbits(64) for _ in range(64)]          # Par case de depart de la tour, comme castling_rights
+EN_PASSANT = [_ALEA.getrandbits(64) for _ in range(8)]       # Par colonne